@@ -0,0 +1,45 @@
+"""audit_log default partition
+
+Revision ID: a2d6f8b4c135
+Revises: f1a5c9e3b720
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a2d6f8b4c135'
+down_revision: Union[str, None] = 'f1a5c9e3b720'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    # Si el mantenimiento de particiones se retrasa, los INSERT de auditoría caen aquí en vez de fallar;
+    # ensure_monthly_partitions las mueve a su partición mensual
+    op.execute("CREATE TABLE IF NOT EXISTS audit_log_default PARTITION OF audit_log DEFAULT")
+
+
+def downgrade() -> None:
+    # Devolver las filas de la DEFAULT a particiones mensuales antes de eliminarla
+    op.execute("ALTER TABLE audit_log DETACH PARTITION audit_log_default")
+    months = op.get_bind().execute(
+        sa.text("SELECT DISTINCT CAST(date_trunc('month', occurred_at) AS date) FROM audit_log_default")
+    ).scalars().all()
+    for month in months:
+        op.execute(
+            f"CREATE TABLE IF NOT EXISTS audit_log_p{month.year:04d}{month.month:02d} PARTITION OF audit_log "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        )
+    op.execute("INSERT INTO audit_log SELECT * FROM audit_log_default")
+    op.execute("DROP TABLE audit_log_default")
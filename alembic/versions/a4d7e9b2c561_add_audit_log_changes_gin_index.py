@@ -0,0 +1,33 @@
+"""add audit_log.changes GIN index
+
+Revision ID: a4d7e9b2c561
+Revises: f2c6a8d0b153
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4d7e9b2c561'
+down_revision: Union[str, None] = 'f2c6a8d0b153'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # jsonb_path_ops: índice más compacto, solo para el operador de contención @>
+    op.create_index(
+        'idx_audit_log_changes',
+        'audit_log',
+        ['changes'],
+        postgresql_using='gin',
+        postgresql_ops={'changes': 'jsonb_path_ops'},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_audit_log_changes', table_name='audit_log')
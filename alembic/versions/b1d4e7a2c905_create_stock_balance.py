@@ -0,0 +1,58 @@
+"""create stock_balance projection
+
+Revision ID: b1d4e7a2c905
+Revises: fcc870f63c8b
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b1d4e7a2c905'
+down_revision: Union[str, None] = 'fcc870f63c8b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'stock_balance',
+        sa.Column('product_id', sa.UUID(), nullable=False),
+        sa.Column('batch_id', sa.UUID(), nullable=False),
+        sa.Column('location_id', sa.UUID(), nullable=False),
+        sa.Column('physical', sa.Numeric(), server_default='0', nullable=False),
+        sa.Column('reserved', sa.Numeric(), server_default='0', nullable=False),
+        sa.Column('consumed', sa.Numeric(), server_default='0', nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['product_id'], ['product.id']),
+        sa.ForeignKeyConstraint(['batch_id'], ['batch.id']),
+        sa.ForeignKeyConstraint(['location_id'], ['location.id']),
+        sa.PrimaryKeyConstraint('product_id', 'batch_id', 'location_id'),
+    )
+    op.create_index('idx_stock_balance_location', 'stock_balance', ['location_id'])
+
+    # Backfill desde inventario, reservas activas y movimientos de salida existentes
+    op.execute("""
+        INSERT INTO stock_balance (product_id, batch_id, location_id, physical, reserved, consumed)
+        SELECT product_id, batch_id, location_id, sum(physical), sum(reserved), sum(consumed)
+        FROM (
+            SELECT product_id, batch_id, location_id, quantity AS physical, 0 AS reserved, 0 AS consumed
+            FROM inventory WHERE deleted_at IS NULL
+            UNION ALL
+            SELECT product_id, batch_id, location_id, 0, quantity, 0
+            FROM reservation WHERE status = 'active' AND deleted_at IS NULL
+            UNION ALL
+            SELECT product_id, batch_id, from_location_id, 0, 0, quantity
+            FROM movement WHERE from_location_id IS NOT NULL AND deleted_at IS NULL
+        ) s
+        GROUP BY product_id, batch_id, location_id;
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_stock_balance_location', table_name='stock_balance')
+    op.drop_table('stock_balance')
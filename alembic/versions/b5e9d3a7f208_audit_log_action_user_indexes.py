@@ -0,0 +1,34 @@
+"""audit_log indexes for action and user filters
+
+Revision ID: b5e9d3a7f208
+Revises: a2d6f8b4c135
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e9d3a7f208'
+down_revision: Union[str, None] = 'a2d6f8b4c135'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # GET /audit filtra por action o performed_by_user_id y pagina por (occurred_at, id) descendente:
+    # el índice compuesto sirve filtro, orden y comparación de fila sin recorrer todo el rango
+    op.create_index('idx_audit_log_action_occurred', 'audit_log', ['action', 'occurred_at', 'id'])
+    # La mayoría de filas las escribe el sistema (usuario NULL): índice parcial
+    op.create_index(
+        'idx_audit_log_user_occurred', 'audit_log', ['performed_by_user_id', 'occurred_at', 'id'],
+        postgresql_where=sa.text('performed_by_user_id IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_audit_log_user_occurred', table_name='audit_log')
+    op.drop_index('idx_audit_log_action_occurred', table_name='audit_log')
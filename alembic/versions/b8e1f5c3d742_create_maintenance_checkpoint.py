@@ -0,0 +1,34 @@
+"""create maintenance_checkpoint
+
+Revision ID: b8e1f5c3d742
+Revises: a4d7e9b2c561
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e1f5c3d742'
+down_revision: Union[str, None] = 'a4d7e9b2c561'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Progreso de archive_and_purge por tabla: último id archivado de la pasada en curso
+    op.create_table(
+        'maintenance_checkpoint',
+        sa.Column('table_name', sa.Text(), nullable=False),
+        sa.Column('last_id', sa.UUID(), nullable=True),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('completed_at', sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('table_name'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('maintenance_checkpoint')
@@ -0,0 +1,42 @@
+"""create alert_threshold
+
+Revision ID: c3e8f1a4b210
+Revises: b1d4e7a2c905
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e8f1a4b210'
+down_revision: Union[str, None] = 'b1d4e7a2c905'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'alert_threshold',
+        sa.Column('product_id', sa.UUID(), nullable=True),
+        sa.Column('category_id', sa.UUID(), nullable=True),
+        sa.Column('min_stock', sa.Numeric(), nullable=True),
+        sa.Column('min_coverage_days', sa.Integer(), nullable=True),
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('deleted_at', sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.CheckConstraint('(product_id IS NULL) <> (category_id IS NULL)', name='ck_alert_threshold_target'),
+        sa.ForeignKeyConstraint(['product_id'], ['product.id']),
+        sa.ForeignKeyConstraint(['category_id'], ['category.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('product_id'),
+        sa.UniqueConstraint('category_id'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('alert_threshold')
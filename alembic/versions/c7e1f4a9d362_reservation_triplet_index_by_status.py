@@ -0,0 +1,48 @@
+"""reservation triplet index keyed by status instead of partial
+
+Revision ID: c7e1f4a9d362
+Revises: b5e9d3a7f208
+Create Date: 2026-10-18 23:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e1f4a9d362'
+down_revision: Union[str, None] = 'b5e9d3a7f208'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _swap(old: str, new: str, definition: str) -> None:
+    # Se construye el nuevo antes de quitar el viejo: validate_reservation nunca queda sin índice
+    with op.get_context().autocommit_block():
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {new}")
+        op.execute(f"CREATE INDEX CONCURRENTLY {new} ON {definition}")
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {old}")
+
+
+def upgrade() -> None:
+    # El predicado parcial (status = 'active' AND deleted_at IS NULL) también lo cumple
+    # expire_reservations: con pocas reservas activas ambos índices parciales costaban lo mismo
+    # y el planner recorría el del triplete entero. Con status como cuarta clave,
+    # validate_reservation sigue acotando por Index Cond e idx_reservation_active_expiry
+    # es el único índice aplicable al vencimiento.
+    _swap(
+        "idx_reservation_active_triplet",
+        "idx_reservation_triplet_status",
+        "reservation (product_id, batch_id, location_id, status) INCLUDE (quantity, deleted_at)",
+    )
+
+
+def downgrade() -> None:
+    _swap(
+        "idx_reservation_triplet_status",
+        "idx_reservation_active_triplet",
+        "reservation (product_id, batch_id, location_id) INCLUDE (quantity) "
+        "WHERE status = 'active' AND deleted_at IS NULL",
+    )
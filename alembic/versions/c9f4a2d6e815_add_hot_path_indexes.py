@@ -0,0 +1,82 @@
+"""add hot path composite and partial indexes
+
+Revision ID: c9f4a2d6e815
+Revises: b8e1f5c3d742
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9f4a2d6e815'
+down_revision: Union[str, None] = 'b8e1f5c3d742'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Índices derivados de las consultas reales. Las SELECT ORM llevan siempre
+# deleted_at IS NULL (filtro global de soft-delete), por eso los parciales lo
+# incluyen; expire_reservations es un UPDATE Core y no lo lleva.
+INDEXES = [
+    # reports_service.get_stock_history: product_id = ? [AND occurred_at BETWEEN] ORDER BY occurred_at, id
+    (
+        "idx_movement_product_occurred",
+        "movement (product_id, occurred_at, id) WHERE deleted_at IS NULL",
+    ),
+    # get_stock_forecast / check_alerts: SUM(quantity) de salidas de un producto desde `since`
+    (
+        "idx_movement_consumption",
+        "movement (product_id, occurred_at) INCLUDE (quantity, batch_id, from_location_id) "
+        "WHERE from_location_id IS NOT NULL AND deleted_at IS NULL",
+    ),
+    # Mismas consultas acotadas a una ubicación (from_location_id = ?)
+    (
+        "idx_movement_from_location_occurred",
+        "movement (from_location_id, occurred_at) WHERE deleted_at IS NULL",
+    ),
+    # build_portfolio_forecast_query sin filtro de producto (ventana occurred_at >= since)
+    # y el listado de movimientos ORDER BY occurred_at DESC
+    (
+        "idx_movement_occurred",
+        "movement (occurred_at) WHERE deleted_at IS NULL",
+    ),
+    # reservation_validator.validate_reservation: SUM(quantity) de reservas activas del triplete
+    (
+        "idx_reservation_active_triplet",
+        "reservation (product_id, batch_id, location_id) INCLUDE (quantity) "
+        "WHERE status = 'active' AND deleted_at IS NULL",
+    ),
+    # reservation_lifecycle.expire_reservations: activas con reserved_until < now()
+    (
+        "idx_reservation_active_expiry",
+        "reservation (reserved_until) WHERE status = 'active' AND reserved_until IS NOT NULL",
+    ),
+    # Stock por ubicación (forecast/alertas con location_id y sin producto)
+    (
+        "idx_inventory_location",
+        "inventory (location_id) INCLUDE (product_id, quantity) WHERE deleted_at IS NULL",
+    ),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY evita bloquear escrituras en movement/reservation; no puede ir en transacción
+    with op.get_context().autocommit_block():
+        for name, definition in INDEXES:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition}")
+        # idx_reservation_active (id) duplicaba la PK y ninguna consulta lo usaba
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_reservation_active")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_reservation_active ON reservation (id) "
+            "WHERE deleted_at IS NULL"
+        )
+        for name, _ in reversed(INDEXES):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
@@ -0,0 +1,39 @@
+"""create movement_opening_balance
+
+Revision ID: d3a7f1c8e240
+Revises: f4b8e2a7c319
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a7f1c8e240'
+down_revision: Union[str, None] = 'f4b8e2a7c319'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Saldo de apertura de los movimientos retirados con su partición; lo alimenta archive_and_purge
+    op.create_table(
+        'movement_opening_balance',
+        sa.Column('product_id', sa.UUID(), nullable=False),
+        sa.Column('batch_id', sa.UUID(), nullable=False),
+        sa.Column('location_id', sa.UUID(), nullable=False),
+        sa.Column('quantity', sa.Numeric(), server_default='0', nullable=False),
+        sa.Column('retired_until', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['product_id'], ['product.id']),
+        sa.ForeignKeyConstraint(['batch_id'], ['batch.id']),
+        sa.ForeignKeyConstraint(['location_id'], ['location.id']),
+        sa.PrimaryKeyConstraint('product_id', 'batch_id', 'location_id'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('movement_opening_balance')
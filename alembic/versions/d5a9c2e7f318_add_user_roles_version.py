@@ -0,0 +1,29 @@
+"""add user_account.roles_version
+
+Revision ID: d5a9c2e7f318
+Revises: c3e8f1a4b210
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a9c2e7f318'
+down_revision: Union[str, None] = 'c3e8f1a4b210'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'user_account',
+        sa.Column('roles_version', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('user_account', 'roles_version')
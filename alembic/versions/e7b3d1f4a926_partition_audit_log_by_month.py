@@ -0,0 +1,88 @@
+"""partition audit_log by month
+
+Revision ID: e7b3d1f4a926
+Revises: d5a9c2e7f318
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b3d1f4a926'
+down_revision: Union[str, None] = 'd5a9c2e7f318'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Particiones creadas por adelantado; después las mantiene scripts/maintenance/archive_and_purge.py
+MONTHS_AHEAD = 3
+
+
+def _add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE audit_log RENAME TO audit_log_legacy")
+    op.execute("ALTER TABLE audit_log_legacy RENAME CONSTRAINT audit_log_pkey TO audit_log_legacy_pkey")
+
+    # La clave primaria de una tabla particionada debe incluir la columna de partición
+    op.execute("""
+        CREATE TABLE audit_log (
+            id UUID NOT NULL,
+            entity_name TEXT NOT NULL,
+            entity_id UUID NOT NULL,
+            action TEXT NOT NULL,
+            changes JSONB,
+            performed_by_user_id UUID,
+            reason TEXT,
+            occurred_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+            CONSTRAINT audit_log_pkey PRIMARY KEY (id, occurred_at)
+        ) PARTITION BY RANGE (occurred_at)
+    """)
+
+    today = datetime.now(timezone.utc).date()
+    oldest = op.get_bind().execute(sa.text("SELECT min(occurred_at) FROM audit_log_legacy")).scalar()
+    month = date((oldest or today).year, (oldest or today).month, 1)
+    last = _add_months(date(today.year, today.month, 1), MONTHS_AHEAD)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE audit_log_p{month.year:04d}{month.month:02d} PARTITION OF audit_log "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        )
+        month = _add_months(month, 1)
+
+    op.execute("""
+        INSERT INTO audit_log (id, entity_name, entity_id, action, changes, performed_by_user_id, reason, occurred_at)
+        SELECT id, entity_name, entity_id, action, changes, performed_by_user_id, reason, occurred_at
+        FROM audit_log_legacy
+    """)
+    op.execute("DROP TABLE audit_log_legacy")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE audit_log RENAME TO audit_log_partitioned")
+    op.execute("ALTER TABLE audit_log_partitioned RENAME CONSTRAINT audit_log_pkey TO audit_log_partitioned_pkey")
+    op.create_table(
+        'audit_log',
+        sa.Column('entity_name', sa.Text(), nullable=False),
+        sa.Column('entity_id', sa.UUID(), nullable=False),
+        sa.Column('action', sa.Text(), nullable=False),
+        sa.Column('changes', sa.dialects.postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('performed_by_user_id', sa.UUID(), nullable=True),
+        sa.Column('reason', sa.Text(), nullable=True),
+        sa.Column('occurred_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.execute("""
+        INSERT INTO audit_log (id, entity_name, entity_id, action, changes, performed_by_user_id, reason, occurred_at)
+        SELECT id, entity_name, entity_id, action, changes, performed_by_user_id, reason, occurred_at
+        FROM audit_log_partitioned
+    """)
+    op.execute("DROP TABLE audit_log_partitioned")
@@ -0,0 +1,40 @@
+"""reservation expiry index skips soft-deleted rows
+
+Revision ID: e8b4c2f6a913
+Revises: d3a7f1c8e240
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b4c2f6a913'
+down_revision: Union[str, None] = 'd3a7f1c8e240'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _swap(predicate: str) -> None:
+    # Se construye el nuevo antes de quitar el viejo: expire_reservations nunca queda sin índice
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_reservation_active_expiry_new")
+        op.execute(
+            "CREATE INDEX CONCURRENTLY idx_reservation_active_expiry_new ON reservation (reserved_until) "
+            f"WHERE {predicate}"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_reservation_active_expiry")
+        op.execute("ALTER INDEX idx_reservation_active_expiry_new RENAME TO idx_reservation_active_expiry")
+
+
+def upgrade() -> None:
+    # expire_reservations filtra también deleted_at IS NULL; con el predicado anterior el planner
+    # prefería recorrer idx_reservation_active_triplet entero
+    _swap("status = 'active' AND deleted_at IS NULL AND reserved_until IS NOT NULL")
+
+
+def downgrade() -> None:
+    _swap("status = 'active' AND reserved_until IS NOT NULL")
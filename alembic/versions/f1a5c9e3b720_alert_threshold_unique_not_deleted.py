@@ -0,0 +1,39 @@
+"""alert_threshold uniqueness ignores soft-deleted rows
+
+Revision ID: f1a5c9e3b720
+Revises: e8b4c2f6a913
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1a5c9e3b720'
+down_revision: Union[str, None] = 'e8b4c2f6a913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # UNIQUE plano impedía volver a crear el umbral de un producto/categoría tras borrarlo (soft delete)
+    op.drop_constraint('alert_threshold_product_id_key', 'alert_threshold', type_='unique')
+    op.drop_constraint('alert_threshold_category_id_key', 'alert_threshold', type_='unique')
+    op.create_index(
+        'uq_alert_threshold_product', 'alert_threshold', ['product_id'],
+        unique=True, postgresql_where=sa.text('deleted_at IS NULL'),
+    )
+    op.create_index(
+        'uq_alert_threshold_category', 'alert_threshold', ['category_id'],
+        unique=True, postgresql_where=sa.text('deleted_at IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_alert_threshold_category', table_name='alert_threshold')
+    op.drop_index('uq_alert_threshold_product', table_name='alert_threshold')
+    op.create_unique_constraint('alert_threshold_category_id_key', 'alert_threshold', ['category_id'])
+    op.create_unique_constraint('alert_threshold_product_id_key', 'alert_threshold', ['product_id'])
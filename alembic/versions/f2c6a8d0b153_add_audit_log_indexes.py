@@ -0,0 +1,30 @@
+"""add audit_log indexes
+
+Revision ID: f2c6a8d0b153
+Revises: e7b3d1f4a926
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c6a8d0b153'
+down_revision: Union[str, None] = 'e7b3d1f4a926'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Índices sobre la tabla particionada: se crean en cada partición y en las futuras
+    op.create_index('idx_audit_log_entity_occurred', 'audit_log', ['entity_name', 'entity_id', 'occurred_at'])
+    # (occurred_at, id) sirve al orden y a la comparación de fila de la paginación keyset
+    op.create_index('idx_audit_log_occurred_id', 'audit_log', ['occurred_at', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_audit_log_occurred_id', table_name='audit_log')
+    op.drop_index('idx_audit_log_entity_occurred', table_name='audit_log')
@@ -0,0 +1,194 @@
+"""partition movement by month
+
+Revision ID: f4b8e2a7c319
+Revises: c9f4a2d6e815
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4b8e2a7c319'
+down_revision: Union[str, None] = 'c9f4a2d6e815'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Particiones creadas por adelantado; después las mantiene scripts/maintenance/archive_and_purge.py
+MONTHS_AHEAD = 3
+
+COLUMNS = (
+    "code, movement_type_id, product_id, batch_id, from_location_id, to_location_id, reason_id, "
+    "requested_by_user_id, executed_by_user_id, quantity, occurred_at, id, created_at, updated_at, deleted_at"
+)
+
+# Índices de movement en c9f4a2d6e815 (se recrean sobre la tabla particionada)
+HOT_PATH_INDEXES = [
+    ("idx_movement_product_occurred", "(product_id, occurred_at, id) WHERE deleted_at IS NULL"),
+    (
+        "idx_movement_consumption",
+        "(product_id, occurred_at) INCLUDE (quantity, batch_id, from_location_id) "
+        "WHERE from_location_id IS NOT NULL AND deleted_at IS NULL",
+    ),
+    ("idx_movement_from_location_occurred", "(from_location_id, occurred_at) WHERE deleted_at IS NULL"),
+    ("idx_movement_occurred", "(occurred_at) WHERE deleted_at IS NULL"),
+]
+
+PARTITIONED_INDEXES = HOT_PATH_INDEXES + [
+    # code ya no puede ser UNIQUE en la tabla particionada (la clave única debe incluir occurred_at):
+    # la unicidad la garantiza movement_code_registry; este índice sirve a las búsquedas por code
+    ("idx_movement_code", "(code)"),
+    # Sustituye a idx_movement_active: también cubre filas borradas, lo que necesita la FK desde batch
+    ("idx_movement_batch", "(batch_id, occurred_at)"),
+]
+
+
+def _add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE movement RENAME TO movement_legacy")
+    op.execute("ALTER TABLE movement_legacy RENAME CONSTRAINT movement_pkey TO movement_legacy_pkey")
+    op.execute("ALTER TABLE movement_legacy RENAME CONSTRAINT movement_code_key TO movement_legacy_code_key")
+    op.execute("DROP INDEX IF EXISTS idx_movement_active")
+    for name, _ in HOT_PATH_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+
+    # La clave primaria de una tabla particionada debe incluir la columna de partición
+    op.execute("""
+        CREATE TABLE movement (
+            code TEXT NOT NULL,
+            movement_type_id UUID NOT NULL,
+            product_id UUID NOT NULL,
+            batch_id UUID NOT NULL,
+            from_location_id UUID,
+            to_location_id UUID,
+            reason_id UUID NOT NULL,
+            requested_by_user_id UUID,
+            executed_by_user_id UUID,
+            quantity NUMERIC NOT NULL,
+            occurred_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+            id UUID NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+            updated_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+            deleted_at TIMESTAMP WITH TIME ZONE,
+            CONSTRAINT movement_pkey PRIMARY KEY (id, occurred_at),
+            CONSTRAINT movement_movement_type_id_fkey FOREIGN KEY (movement_type_id) REFERENCES movement_type (id),
+            CONSTRAINT movement_product_id_fkey FOREIGN KEY (product_id) REFERENCES product (id),
+            CONSTRAINT movement_batch_id_fkey FOREIGN KEY (batch_id) REFERENCES batch (id),
+            CONSTRAINT movement_from_location_id_fkey FOREIGN KEY (from_location_id) REFERENCES location (id),
+            CONSTRAINT movement_to_location_id_fkey FOREIGN KEY (to_location_id) REFERENCES location (id),
+            CONSTRAINT movement_reason_id_fkey FOREIGN KEY (reason_id) REFERENCES movement_reason (id),
+            CONSTRAINT movement_requested_by_user_id_fkey
+                FOREIGN KEY (requested_by_user_id) REFERENCES user_account (id),
+            CONSTRAINT movement_executed_by_user_id_fkey
+                FOREIGN KEY (executed_by_user_id) REFERENCES user_account (id)
+        ) PARTITION BY RANGE (occurred_at)
+    """)
+
+    today = datetime.now(timezone.utc).date()
+    oldest = op.get_bind().execute(sa.text("SELECT min(occurred_at) FROM movement_legacy")).scalar()
+    month = date((oldest or today).year, (oldest or today).month, 1)
+    last = _add_months(date(today.year, today.month, 1), MONTHS_AHEAD)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE movement_p{month.year:04d}{month.month:02d} PARTITION OF movement "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        )
+        month = _add_months(month, 1)
+
+    op.execute(f"INSERT INTO movement ({COLUMNS}) SELECT {COLUMNS} FROM movement_legacy")
+    for name, definition in PARTITIONED_INDEXES:
+        op.execute(f"CREATE INDEX {name} ON movement {definition}")
+
+    # Registro global de códigos: una fila por movimiento vivo, mantenida por trigger
+    op.execute("""
+        CREATE TABLE movement_code_registry (
+            code TEXT NOT NULL,
+            movement_id UUID NOT NULL,
+            occurred_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            CONSTRAINT movement_code_registry_pkey PRIMARY KEY (code)
+        )
+    """)
+    op.execute("CREATE INDEX idx_movement_code_registry_occurred ON movement_code_registry (occurred_at)")
+    op.execute(
+        "INSERT INTO movement_code_registry (code, movement_id, occurred_at) "
+        "SELECT code, id, occurred_at FROM movement_legacy"
+    )
+    op.execute("""
+        CREATE FUNCTION movement_code_registry_sync() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO movement_code_registry (code, movement_id, occurred_at)
+                VALUES (NEW.code, NEW.id, NEW.occurred_at);
+                RETURN NEW;
+            ELSIF TG_OP = 'DELETE' THEN
+                DELETE FROM movement_code_registry WHERE code = OLD.code AND movement_id = OLD.id;
+                RETURN OLD;
+            END IF;
+            UPDATE movement_code_registry
+            SET code = NEW.code, movement_id = NEW.id, occurred_at = NEW.occurred_at
+            WHERE code = OLD.code AND movement_id = OLD.id;
+            RETURN NEW;
+        END
+        $$
+    """)
+    # DETACH PARTITION no dispara triggers: el job de mantenimiento limpia el registro al retirar particiones
+    op.execute("""
+        CREATE TRIGGER trg_movement_code_registry
+        AFTER INSERT OR DELETE OR UPDATE OF code, id, occurred_at ON movement
+        FOR EACH ROW EXECUTE FUNCTION movement_code_registry_sync()
+    """)
+
+    op.execute("DROP TABLE movement_legacy")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE movement RENAME TO movement_partitioned")
+    op.execute("ALTER TABLE movement_partitioned RENAME CONSTRAINT movement_pkey TO movement_partitioned_pkey")
+    op.execute("DROP TRIGGER IF EXISTS trg_movement_code_registry ON movement_partitioned")
+    for name, _ in PARTITIONED_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+
+    op.create_table(
+        'movement',
+        sa.Column('code', sa.Text(), nullable=False),
+        sa.Column('movement_type_id', sa.UUID(), nullable=False),
+        sa.Column('product_id', sa.UUID(), nullable=False),
+        sa.Column('batch_id', sa.UUID(), nullable=False),
+        sa.Column('from_location_id', sa.UUID(), nullable=True),
+        sa.Column('to_location_id', sa.UUID(), nullable=True),
+        sa.Column('reason_id', sa.UUID(), nullable=False),
+        sa.Column('requested_by_user_id', sa.UUID(), nullable=True),
+        sa.Column('executed_by_user_id', sa.UUID(), nullable=True),
+        sa.Column('quantity', sa.Numeric(), nullable=False),
+        sa.Column('occurred_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('deleted_at', sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['batch_id'], ['batch.id'], name='movement_batch_id_fkey'),
+        sa.ForeignKeyConstraint(['executed_by_user_id'], ['user_account.id'], name='movement_executed_by_user_id_fkey'),
+        sa.ForeignKeyConstraint(['from_location_id'], ['location.id'], name='movement_from_location_id_fkey'),
+        sa.ForeignKeyConstraint(['movement_type_id'], ['movement_type.id'], name='movement_movement_type_id_fkey'),
+        sa.ForeignKeyConstraint(['product_id'], ['product.id'], name='movement_product_id_fkey'),
+        sa.ForeignKeyConstraint(['reason_id'], ['movement_reason.id'], name='movement_reason_id_fkey'),
+        sa.ForeignKeyConstraint(['requested_by_user_id'], ['user_account.id'], name='movement_requested_by_user_id_fkey'),
+        sa.ForeignKeyConstraint(['to_location_id'], ['location.id'], name='movement_to_location_id_fkey'),
+        sa.PrimaryKeyConstraint('id', name='movement_pkey'),
+        sa.UniqueConstraint('code', name='movement_code_key'),
+    )
+    op.execute(f"INSERT INTO movement ({COLUMNS}) SELECT {COLUMNS} FROM movement_partitioned")
+    op.execute("DROP TABLE movement_partitioned")
+    op.execute("DROP TABLE movement_code_registry")
+    op.execute("DROP FUNCTION movement_code_registry_sync()")
+
+    op.execute("CREATE INDEX idx_movement_active ON movement (batch_id, created_at) WHERE deleted_at IS NULL")
+    for name, definition in HOT_PATH_INDEXES:
+        op.execute(f"CREATE INDEX {name} ON movement {definition}")
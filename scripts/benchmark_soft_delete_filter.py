@@ -0,0 +1,134 @@
+# scripts/benchmark_soft_delete_filter.py
+# Microbenchmark del filtro global de soft-delete (do_orm_execute en db/session.py).
+# Compara el hook anterior (closure + with_loader_criteria nuevos por consulta)
+# con el actual (opción construida una vez a nivel de módulo).
+#
+# Uso: desde la raíz del proyecto, con la base de datos accesible:
+#   python -m scripts.benchmark_soft_delete_filter --queries 2000
+# --offline mide solo la construcción de la opción y la cache key (sin DB).
+
+import argparse
+import asyncio
+import time
+import timeit
+from collections import Counter
+
+import sqlalchemy as sa
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, with_loader_criteria
+
+from src.app.db import session as db_session
+from src.app.models.base import SoftDeletable
+from src.app.models.movement import Movement
+from src.app.models.product import Product
+
+
+def _legacy_hook(execute_state):
+    """The previous hook: a fresh closure and loader-criteria option on every SELECT."""
+    if not execute_state.is_select:
+        return
+    if execute_state.execution_options.get("_sa_skip_with_loader_criteria"):
+        return
+
+    def _deleted_filter(cls):
+        col = getattr(cls, "deleted_at", None)
+        if col is None:
+            return sa.true()
+        return col.is_(None)
+
+    execute_state.statement = execute_state.statement.options(
+        with_loader_criteria(SoftDeletable, _deleted_filter, include_aliases=True)
+    )
+
+
+def _sample_statement(i: int = 0):
+    return (
+        select(Product)
+        .join(Movement, Movement.product_id == Product.id)
+        .where(Product.sku == f"bench-{i % 7}")
+        .limit(5)
+    )
+
+
+def _legacy_option():
+    def _deleted_filter(cls):
+        col = getattr(cls, "deleted_at", None)
+        if col is None:
+            return sa.true()
+        return col.is_(None)
+
+    return with_loader_criteria(SoftDeletable, _deleted_filter, include_aliases=True)
+
+
+def bench_offline(number: int) -> None:
+    """Per-statement cost of attaching the criteria and computing the statement cache key."""
+    cases = {
+        "no filter": lambda: _sample_statement()._generate_cache_key(),
+        "legacy": lambda: _sample_statement().options(_legacy_option())._generate_cache_key(),
+        "current": lambda: _sample_statement()
+        .options(db_session._SOFT_DELETE_CRITERIA)
+        ._generate_cache_key(),
+    }
+    for name, fn in cases.items():
+        best = min(timeit.repeat(fn, number=number, repeat=3))
+        print(f"{name:>10}: {best / number * 1e6:8.1f} us/statement")
+
+
+async def _run_queries(queries: int) -> tuple[float, Counter]:
+    stats: Counter = Counter()
+
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        stats[context.cache_hit.name] += 1
+
+    event.listen(db_session.engine.sync_engine, "after_cursor_execute", _count)
+    try:
+        async with db_session.AsyncSessionLocal() as session:
+            started = time.perf_counter()
+            for i in range(queries):
+                await session.execute(_sample_statement(i))
+            return time.perf_counter() - started, stats
+    finally:
+        event.remove(db_session.engine.sync_engine, "after_cursor_execute", _count)
+
+
+async def bench_db(queries: int) -> None:
+    """Wall time and compiled-statement cache hit rate executing the same SELECT shape."""
+    current = db_session._add_filter_deleted_at
+    try:
+        event.remove(Session, "do_orm_execute", current)
+        event.listen(Session, "do_orm_execute", _legacy_hook)
+        legacy_elapsed, legacy_stats = await _run_queries(queries)
+    finally:
+        event.remove(Session, "do_orm_execute", _legacy_hook)
+        event.listen(Session, "do_orm_execute", current)
+    current_elapsed, current_stats = await _run_queries(queries)
+
+    for name, elapsed, stats in (
+        ("legacy", legacy_elapsed, legacy_stats),
+        ("current", current_elapsed, current_stats),
+    ):
+        hits = stats.get("CACHE_HIT", 0)
+        total = sum(stats.values()) or 1
+        print(
+            f"{name:>10}: {elapsed / queries * 1e6:8.1f} us/query, "
+            f"cache hit rate {hits / total:.1%} ({dict(stats)})"
+        )
+    await db_session.shutdown_engine()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the global soft-delete filter")
+    parser.add_argument("--queries", type=int, default=2000, help="Queries per variant against the DB")
+    parser.add_argument("--number", type=int, default=5000, help="Iterations per offline timing")
+    parser.add_argument("--offline", action="store_true", help="Skip the database part")
+    args = parser.parse_args()
+
+    print("Option + cache key construction:")
+    bench_offline(args.number)
+    if not args.offline:
+        print(f"\nExecuting {args.queries} SELECTs per variant:")
+        asyncio.run(bench_db(args.queries))
+
+
+if __name__ == "__main__":
+    main()
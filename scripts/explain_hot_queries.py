@@ -0,0 +1,209 @@
+# scripts/explain_hot_queries.py
+# Comprueba con EXPLAIN que las consultas calientes usan índices.
+#
+# Ejecuta las funciones reales de servicio (reports_service, alerts,
+# reservation_validator, reservation_lifecycle) dentro de una transacción que
+# se revierte, captura el SQL que emiten y lanza EXPLAIN (FORMAT JSON) sobre
+# cada sentencia con sus mismos parámetros. Falla (exit 1) si alguna tabla
+# caliente se lee con Seq Scan o recorriendo un índice entero (sin Index Cond)
+# en lugar de acotar las filas con él.
+#
+# Con enable_seqscan=off (por defecto) se valida que exista un índice capaz de
+# servir el predicado aunque las tablas de desarrollo sean pequeñas; con
+# --planner-defaults se muestra el plan que elegiría el planner tal cual.
+#
+# Uso: desde la raíz del proyecto, con la base de datos migrada:
+#   python -m scripts.explain_hot_queries [--verbose] [--planner-defaults]
+
+import argparse
+import asyncio
+import json
+import re
+import sys
+from decimal import Decimal
+
+import sqlalchemy as sa
+from sqlalchemy import event, func, select
+
+from src.app.db.session import AsyncSessionLocal, engine, shutdown_engine
+from src.app.models.inventory import Inventory
+from src.app.models.movement import Movement
+from src.app.services import alerts, reports_service
+from src.app.services.reservation_lifecycle import expire_reservations
+from src.app.services.reservation_validator import validate_reservation
+
+INDEX_NODES = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+
+
+def _parent(relation: str | None) -> str | None:
+    """Report partitions (movement_p202610) under their partitioned table."""
+    return re.sub(r"_p\d{6}$", "", relation) if relation else relation
+
+
+def _scans(plan: dict):
+    """Yield (node_type, relation, index, has_index_cond) for every scan node in a JSON plan."""
+    node = plan.get("Node Type")
+    if node in INDEX_NODES or node == "Seq Scan":
+        yield node, _parent(plan.get("Relation Name")), plan.get("Index Name"), "Index Cond" in plan
+    for child in plan.get("Plans", []):
+        yield from _scans(child)
+
+
+def _bitmap_relations(plan: dict, relation: str | None = None):
+    """Bitmap Index Scan nodes carry no relation; take it from the parent Bitmap Heap Scan."""
+    relation = _parent(plan.get("Relation Name", relation))
+    if plan.get("Node Type") == "Bitmap Index Scan":
+        yield relation, plan.get("Index Name"), "Index Cond" in plan
+    for child in plan.get("Plans", []):
+        yield from _bitmap_relations(child, relation)
+
+
+async def _capture(fn) -> list[tuple[str, tuple]]:
+    """Run `fn(session)` in a rolled-back transaction and return the SQL it emitted."""
+    captured = []
+
+    def _on_execute(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith(("SELECT", "UPDATE", "WITH", "DELETE")):
+            return
+        captured.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _on_execute)
+    try:
+        async with AsyncSessionLocal() as session:
+            try:
+                await fn(session)
+            except ValueError:
+                # validate_reservation / get_stock_forecast señalizan con ValueError; da igual aquí
+                pass
+            await session.rollback()
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", _on_execute)
+    return captured
+
+
+async def _explain(statement: str, parameters, seqscan: bool) -> dict:
+    async with engine.connect() as conn:
+        async with conn.begin() as tx:
+            if not seqscan:
+                await conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+            result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+            plan = result.scalar_one()
+            await tx.rollback()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+async def _sample_ids() -> dict:
+    """
+    Pick a stocked product with few movements: in production each product is a small slice of
+    movement, while dev seeds often pile most rows on one product and make the planner scan everything.
+    """
+    movements = (
+        select(Movement.product_id, func.count().label("n")).group_by(Movement.product_id).subquery()
+    )
+    async with AsyncSessionLocal() as session:
+        row = (
+            await session.execute(
+                select(Inventory.product_id, Inventory.batch_id, Inventory.location_id)
+                .outerjoin(movements, movements.c.product_id == Inventory.product_id)
+                .where(Inventory.quantity > 0)
+                .order_by(func.coalesce(movements.c.n, 0), Inventory.quantity.desc())
+                .limit(1)
+            )
+        ).first()
+    if row is None:
+        raise SystemExit("No inventory rows found; seed the database first")
+    return {"product_id": row[0], "batch_id": row[1], "location_id": row[2]}
+
+
+def _cases(ids: dict) -> list[tuple[str, object, set[str]]]:
+    """(name, coroutine factory, relations that must be read through an index) per hot path."""
+    p, b, l = ids["product_id"], ids["batch_id"], ids["location_id"]
+    return [
+        ("validate_reservation", lambda s: validate_reservation(s, p, b, l, Decimal("1")), {"inventory", "reservation"}),
+        ("expire_reservations", lambda s: expire_reservations(s), {"reservation"}),
+        ("get_stock_history", lambda s: reports_service.get_stock_history(s, p), {"movement"}),
+        ("get_stock_history (day buckets)", lambda s: reports_service.get_stock_history(s, p, bucket="day"), {"movement"}),
+        ("get_stock_forecast", lambda s: reports_service.get_stock_forecast(s, p), {"inventory", "movement"}),
+        (
+            "get_stock_forecast (location)",
+            lambda s: reports_service.get_stock_forecast(s, p, location_id=l),
+            {"inventory", "movement"},
+        ),
+        ("get_stock_forecast_bulk", lambda s: reports_service.get_stock_forecast_bulk(s), {"movement"}),
+        (
+            "get_stock_forecast_bulk (location)",
+            lambda s: reports_service.get_stock_forecast_bulk(s, location_id=l),
+            {"inventory", "movement"},
+        ),
+        ("check_alerts", lambda s: alerts.check_alerts(s, p), {"inventory", "movement"}),
+    ]
+
+
+def _index_usage(plan: dict) -> tuple[dict[str, set], set[str]]:
+    """Indexes used with an Index Cond per relation, and relations read in full (Seq Scan or whole index)."""
+    used: dict[str, set] = {}
+    full = set()
+    for node, relation, index, has_cond in _scans(plan):
+        if node == "Bitmap Index Scan":
+            continue
+        if node == "Seq Scan" or not has_cond:
+            full.add(relation)
+        else:
+            used.setdefault(relation, set()).add(index)
+    for relation, index, has_cond in _bitmap_relations(plan):
+        if has_cond:
+            used.setdefault(relation, set()).add(index)
+        else:
+            full.add(relation)
+    return used, full
+
+
+async def run(verbose: bool, seqscan: bool) -> int:
+    ids = await _sample_ids()
+    failures = 0
+    for name, fn, expected in _cases(ids):
+        try:
+            statements = await _capture(fn)
+        except sa.exc.DBAPIError as exc:
+            failures += 1
+            print(f"[FAIL] {name}\n       - query failed: {exc.orig}")
+            continue
+        used: dict[str, set] = {}
+        seq: set[str] = set()
+        for statement, parameters in statements:
+            plan = await _explain(statement, parameters, seqscan)
+            plan_used, plan_seq = _index_usage(plan)
+            for relation, indexes in plan_used.items():
+                used.setdefault(relation, set()).update(indexes)
+            seq |= plan_seq
+            if verbose:
+                print(f"--- {name}\n{statement}\n{json.dumps(plan, indent=2, default=str)}")
+
+        problems = [f"full scan of {relation}" for relation in sorted(expected & seq)]
+        missing = sorted(expected - seq - set(used))
+        if missing:
+            problems.append(f"no statement read {missing}")
+        status = "ok" if not problems else "FAIL"
+        failures += bool(problems)
+        detail = ", ".join(f"{rel}: {'/'.join(sorted(used[rel]))}" for rel in sorted(expected & set(used)))
+        print(f"[{status}] {name} ({detail})" + "".join(f"\n       - {p}" for p in problems))
+    await shutdown_engine()
+    return 1 if failures else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Assert hot queries are served by indexes (EXPLAIN)")
+    parser.add_argument("--verbose", action="store_true", help="Print SQL and JSON plans")
+    parser.add_argument(
+        "--planner-defaults",
+        action="store_true",
+        help="Keep enable_seqscan on (small dev tables will usually seq scan)",
+    )
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.verbose, seqscan=args.planner_defaults)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,125 @@
 import argparse
 import asyncio
+import csv
+import gzip
+import hashlib
+import io
 import logging
+import os
+import threading
 import uuid
 import json
-from datetime import datetime, timedelta, timezone
-from typing import List, Optional
+import time
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 import sqlalchemy as sa
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
 from sqlalchemy.dialects import postgresql
 
 logger = logging.getLogger("maintenance")
 logging.basicConfig(level=logging.INFO)
 
-BATCH_SIZE = 100
-
-
-async def _try_advisory_lock(session: AsyncSession, key: int) -> bool:
-    res = await session.execute(sa.text("SELECT pg_try_advisory_lock(:k) AS got").bindparams(k=key))
+BATCH_SIZE = 5000
+MIN_BATCH_SIZE = 100
+MAX_BATCH_SIZE = 100000
+BATCH_SECONDS = 2.0
+AUDIT_MONTHS_AHEAD = 3
+MOVEMENT_MONTHS_AHEAD = 3
+MOVEMENT_RETENTION = timedelta(days=365 * 3)
+DETACH_LOCK_TIMEOUT = "5s"
+ARCHIVE_TARGETS = ("table", "files")
+ARCHIVE_DIR = "archive"
+
+# Column lists must match archive table schemas
+RESERVATION_COLUMNS = [
+    "id", "product_id", "batch_id", "location_id", "event_id", "cost_center_id",
+    "quantity", "reserved_from", "reserved_until", "status", "created_at", "updated_at", "deleted_at"
+]
+BATCH_COLUMNS = [
+    "id", "product_id", "code", "expiration_date", "origin_type", "origin_id", "quarantined",
+    "created_at", "updated_at", "deleted_at"
+]
+MOVEMENT_COLUMNS = [
+    "id", "code", "movement_type_id", "product_id", "batch_id", "from_location_id", "to_location_id",
+    "reason_id", "requested_by_user_id", "executed_by_user_id", "quantity", "occurred_at",
+    "created_at", "updated_at", "deleted_at"
+]
+SERIAL_COLUMNS = [
+    "id", "product_id", "batch_id", "serial_number",
+    "location_id", "status", "created_at", "updated_at", "deleted_at"
+]
+
+# Tablas hijas de batch: independientes entre sí, se archivan en paralelo antes que batch.
+# movement no está aquí: está particionada por mes y se retira por partición completa
+CHILD_TABLES = {
+    "reservation": (RESERVATION_COLUMNS, timedelta(days=365 * 2)),
+    "serial": (SERIAL_COLUMNS, timedelta(days=365 * 3)),
+}
+BATCH_CUTOFF = timedelta(days=365 * 5)
+# Los lotes aún referenciados por movimientos (hasta que su partición se retire) o con saldo
+# inicial se saltan; los saldos que quedan en cero se borran al retirar la partición
+# (ZERO_OPENING_BALANCE_SQL), así que un saldo restante es stock que el lote todavía tiene
+BATCH_UNREFERENCED = (
+    "NOT EXISTS (SELECT 1 FROM movement m WHERE m.batch_id = batch.id) "
+    "AND NOT EXISTS (SELECT 1 FROM movement_opening_balance o WHERE o.batch_id = batch.id)"
+)
+
+# Delta neto por (producto, lote, ubicación) de una partición, con el mismo signo que
+# reports_service._movement_signed_quantity; los movimientos borrados no cuentan en el histórico
+OPENING_BALANCE_SQL = """
+    INSERT INTO movement_opening_balance (product_id, batch_id, location_id, quantity, retired_until)
+    SELECT product_id, batch_id, location_id, sum(delta), CAST(:retired_until AS date)
+    FROM (
+        SELECT product_id, batch_id, to_location_id AS location_id, quantity AS delta
+        FROM {partition} WHERE to_location_id IS NOT NULL AND deleted_at IS NULL
+        UNION ALL
+        SELECT product_id, batch_id, from_location_id, -quantity
+        FROM {partition} WHERE from_location_id IS NOT NULL AND deleted_at IS NULL
+    ) d
+    GROUP BY product_id, batch_id, location_id
+    ON CONFLICT (product_id, batch_id, location_id) DO UPDATE
+    SET quantity = movement_opening_balance.quantity + EXCLUDED.quantity,
+        retired_until = GREATEST(movement_opening_balance.retired_until, EXCLUDED.retired_until),
+        updated_at = now()
+"""
+
+# Un saldo en cero no cambia el histórico (se suma) pero mantendría el lote referenciado para siempre
+ZERO_OPENING_BALANCE_SQL = "DELETE FROM movement_opening_balance WHERE quantity = 0"
+
+
+async def _try_advisory_lock(conn: AsyncConnection, key: int) -> bool:
+    res = await conn.execute(sa.text("SELECT pg_try_advisory_lock(:k) AS got").bindparams(k=key))
     val = res.scalar_one_or_none()
     return bool(val)
 
 
-async def _release_advisory_lock(session: AsyncSession, key: int) -> None:
-    await session.execute(sa.text("SELECT pg_advisory_unlock(:k)").bindparams(k=key))
+async def _release_advisory_lock(conn: AsyncConnection, key: int) -> None:
+    await conn.execute(sa.text("SELECT pg_advisory_unlock(:k)").bindparams(k=key))
+
+
+async def _load_checkpoint(session: AsyncSession, table: str) -> Optional[uuid.UUID]:
+    """Last archived id of an unfinished pass over `table`, or None to start from the beginning."""
+    res = await session.execute(
+        sa.text("SELECT last_id FROM maintenance_checkpoint WHERE table_name = :t AND completed_at IS NULL"),
+        {"t": table},
+    )
+    return res.scalar_one_or_none()
+
+
+async def _save_checkpoint(session: AsyncSession, table: str, last_id: Optional[uuid.UUID],
+                           completed: bool = False) -> None:
+    await session.execute(
+        sa.text("""
+            INSERT INTO maintenance_checkpoint (table_name, last_id, updated_at, completed_at)
+            VALUES (:t, :last_id, now(), CASE WHEN :completed THEN now() END)
+            ON CONFLICT (table_name) DO UPDATE
+            SET last_id = EXCLUDED.last_id, updated_at = EXCLUDED.updated_at, completed_at = EXCLUDED.completed_at
+        """),
+        {"t": table, "last_id": last_id, "completed": completed},
+    )
 
 
 async def _move_batch_atomic(
@@ -33,301 +129,617 @@ async def _move_batch_atomic(
         columns: List[str],
         cutoff_column: str,
         cutoff_dt,
-        limit: int = 100,
+        limit: int = BATCH_SIZE,
         dry_run: bool = True,
-) -> List[str]:
+        extra_filter: Optional[str] = None,
+        params: Optional[dict] = None,
+        after_id: Optional[uuid.UUID] = None,
+) -> Tuple[int, Optional[uuid.UUID]]:
     """
-    Move up to `limit` rows from src_table to archive_table where cutoff_column < cutoff_dt.
-    Strategy: insert-then-delete (INSERT ... ON CONFLICT DO NOTHING; then DELETE rows that exist in archive).
-    Returns list of moved ids (those deleted from source). In dry_run mode logs candidate count and returns [].
+    Move up to `limit` rows from src_table to archive_table where cutoff_column < cutoff_dt
+    (and id > after_id when resuming from a checkpoint).
+    One statement per batch: the DELETE ... RETURNING feeds the INSERT into the archive, so rows
+    never travel to Python and source and archive change atomically. Rows already present in the
+    archive (id conflict) are still removed from the source.
+    Returns (rows moved, highest id moved). In dry_run mode logs the candidate count and returns (0, None).
     """
     cols_csv = ", ".join(columns)
-    insert_cols = cols_csv
+    where = f"{cutoff_column} < :cutoff" + (f" AND {extra_filter}" if extra_filter else "")
+    bind = {"cutoff": cutoff_dt, "limit": limit, **(params or {})}
+    if after_id is not None:
+        where += " AND id > :after_id"
+        bind["after_id"] = after_id
 
     if dry_run:
-        count_sql = f"SELECT count(*) FROM {src_table} WHERE {cutoff_column} < :cutoff"
-        res = await session.execute(sa.text(count_sql).execution_options(_sa_skip_with_loader_criteria=True),
-                                    {"cutoff": cutoff_dt})
+        count_sql = f"SELECT count(*) FROM {src_table} WHERE {where}"
+        res = await session.execute(sa.text(count_sql).execution_options(_sa_skip_with_loader_criteria=True), bind)
         count = res.scalar_one()
         logger.info("DRY RUN - candidates in %s: %d", src_table, int(count))
-        return []
+        return 0, None
 
-    # 1) Insert candidates into archive (avoid UniqueViolation with ON CONFLICT DO NOTHING)
-    sql_insert = f"""
-    WITH candidate AS (
+    # MATERIALIZED: el subquery con LIMIT ... SKIP LOCKED se evalúa una sola vez; dentro de un IN el
+    # planner puede re-ejecutarlo y borrar más de :limit filas, no necesariamente las de menor id
+    sql_move = f"""
+    WITH picked AS MATERIALIZED (
       SELECT id FROM {src_table}
-      WHERE {cutoff_column} < :cutoff
+      WHERE {where}
       ORDER BY id
       LIMIT :limit
+      FOR UPDATE SKIP LOCKED
+    ), moved AS (
+      DELETE FROM {src_table}
+      WHERE id IN (SELECT id FROM picked)
+      RETURNING {cols_csv}
+    ), archived AS (
+      INSERT INTO {archive_table} ({cols_csv})
+      SELECT {cols_csv} FROM moved
+      ON CONFLICT (id) DO NOTHING
     )
-    INSERT INTO {archive_table} ({insert_cols})
-    SELECT {cols_csv}
-    FROM {src_table} s
-    WHERE s.id IN (SELECT id FROM candidate)
-    ON CONFLICT (id) DO NOTHING
-    RETURNING id;
+    SELECT count(*), (SELECT id FROM moved ORDER BY id DESC LIMIT 1) FROM moved;
     """
+    res = await session.execute(sa.text(sql_move).execution_options(_sa_skip_with_loader_criteria=True), bind)
+    moved, last_id = res.one()
+    return int(moved), last_id
 
-    res_ins = await session.execute(
-        sa.text(sql_insert).execution_options(_sa_skip_with_loader_criteria=True),
-        {"cutoff": cutoff_dt, "limit": limit},
-    )
-    inserted_ids = [str(r[0]) for r in res_ins.fetchall()]
-
-    # 2) Collect candidate ids (up to limit) to evaluate which exist in archive (either newly inserted or pre-existing)
-    res_cand = await session.execute(
-        sa.text(
-            f"SELECT id FROM (SELECT id FROM {src_table} WHERE {cutoff_column} < :cutoff ORDER BY id LIMIT :limit) t").execution_options(
-            _sa_skip_with_loader_criteria=True),
-        {"cutoff": cutoff_dt, "limit": limit},
+
+class FileArchive:
+    """
+    Archive target writing rows to gzip-compressed CSV files instead of *_archive tables.
+
+    Layout: <root>/<table>/year=YYYY/month=MM/<table>-<run>-<seq>.csv.gz, partitioned by the month
+    of the row's deleted_at (occurred_at for retired movement partitions), so the files can be
+    queried directly (e.g. DuckDB read_csv with hive_partitioning).
+
+    <root>/manifest.jsonl is an append-only log of file states: "pending" is written (fsynced) before
+    the batch that deleted the rows commits, then "committed" or "discarded" (file removed). Only files
+    whose latest state is "committed" hold archived data. A run that died between the commit and the
+    second line leaves a file "pending"; the next run resolves it against the source table
+    (_reconcile_archive), so such files may hold the only copy of their rows and must not be deleted.
+    """
+
+    def __init__(self, root: Path, run_id: str):
+        self.root = Path(root)
+        self.run_id = run_id
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _encode(value: Any) -> str:
+        if value is None:
+            return ""
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return format(value, "f")
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, default=str)
+        return str(value)
+
+    def _next_path(self, table: str, month: date) -> Path:
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+        folder = self.root / table / f"year={month.year:04d}" / f"month={month.month:02d}"
+        folder.mkdir(parents=True, exist_ok=True)
+        return folder / f"{table}-{self.run_id}-{seq:06d}.csv.gz"
+
+    def write_batch(self, table: str, columns: Sequence[str], rows: Sequence[Sequence[Any]],
+                    date_column: str, source: Optional[str] = None) -> List[dict]:
+        """
+        Write rows grouped by month into new files (fsynced); returns their manifest entries.
+        `source` is the table the rows are deleted from when it is not `table` (a detached partition).
+        """
+        date_idx = columns.index(date_column)
+        by_month: Dict[date, List[Sequence[Any]]] = {}
+        for row in rows:
+            stamp = row[date_idx]
+            by_month.setdefault(date(stamp.year, stamp.month, 1), []).append(row)
+
+        entries = []
+        for month, month_rows in sorted(by_month.items()):
+            path = self._next_path(table, month)
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            writer.writerows([self._encode(v) for v in row] for row in month_rows)
+            payload = gzip.compress(buffer.getvalue().encode("utf-8"))
+            with open(path, "wb") as fh:
+                fh.write(payload)
+                fh.flush()
+                os.fsync(fh.fileno())
+            entries.append({
+                "table": table,
+                "source": source or table,
+                "path": path.relative_to(self.root).as_posix(),
+                "partition": {"year": month.year, "month": month.month},
+                "rows": len(month_rows),
+                "columns": list(columns),
+                "format": "csv.gz",
+                "sha256": hashlib.sha256(payload).hexdigest(),
+                "run_id": self.run_id,
+            })
+        return entries
+
+    def _append(self, entries: List[dict], status: str) -> None:
+        if not entries:
+            return
+        written_at = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            with open(self.root / "manifest.jsonl", "a", encoding="utf-8") as fh:
+                for entry in entries:
+                    fh.write(json.dumps({**entry, "status": status, "written_at": written_at}) + "\n")
+                fh.flush()
+                os.fsync(fh.fileno())
+
+    def prepare(self, entries: List[dict]) -> None:
+        """Record files as pending, before the batch that deleted their rows commits."""
+        self._append(entries, "pending")
+
+    def publish(self, entries: List[dict]) -> None:
+        """Record committed files in the manifest."""
+        self._append(entries, "committed")
+
+    def discard(self, entries: List[dict]) -> None:
+        """Remove files of a batch that rolled back."""
+        for entry in entries:
+            (self.root / entry["path"]).unlink(missing_ok=True)
+        self._append(entries, "discarded")
+
+    def unresolved(self) -> List[dict]:
+        """Entries whose latest state is still pending (the run died around the commit)."""
+        manifest = self.root / "manifest.jsonl"
+        if not manifest.exists():
+            return []
+        latest: Dict[str, dict] = {}
+        with open(manifest, encoding="utf-8") as fh:
+            for line in fh:
+                if line.strip():
+                    entry = json.loads(line)
+                    latest[entry["path"]] = entry
+        keys = ("status", "written_at")
+        return [
+            {k: v for k, v in entry.items() if k not in keys}
+            for entry in latest.values()
+            if entry.get("status") == "pending"
+        ]
+
+    def read_ids(self, entry: dict) -> List[str]:
+        """Ids of the rows stored in an entry's file."""
+        with gzip.open(self.root / entry["path"], "rt", encoding="utf-8", newline="") as fh:
+            return [row["id"] for row in csv.DictReader(fh)]
+
+
+async def _reconcile_archive(session: AsyncSession, archive: FileArchive) -> Tuple[int, int]:
+    """
+    Resolve files left pending by a run that died between writing them and recording the outcome:
+    if none of their rows are still in the source table (or it was dropped), the delete committed and
+    the file is published; otherwise the batch rolled back and the file is discarded.
+    Returns (published, discarded).
+    """
+    published = discarded = 0
+    for entry in await asyncio.to_thread(archive.unresolved):
+        source = entry.get("source", entry["table"])
+        exists = (await session.execute(sa.text("SELECT to_regclass(:t) IS NOT NULL"), {"t": source})).scalar_one()
+        still_there = False
+        if exists:
+            ids = await asyncio.to_thread(archive.read_ids, entry)
+            still_there = (
+                await session.execute(
+                    sa.text(f"SELECT EXISTS (SELECT 1 FROM {source} WHERE id = ANY(CAST(:ids AS uuid[])))"),
+                    {"ids": ids},
+                )
+            ).scalar_one()
+        if still_there:
+            await asyncio.to_thread(archive.discard, [entry])
+            discarded += 1
+        else:
+            await asyncio.to_thread(archive.publish, [entry])
+            published += 1
+        logger.info("Reconciled pending archive file %s: %s", entry["path"], "discarded" if still_there else "committed")
+    return published, discarded
+
+
+async def _move_batch_to_files(
+        session: AsyncSession,
+        archive: FileArchive,
+        src_table: str,
+        columns: List[str],
+        cutoff_column: str,
+        cutoff_dt,
+        limit: int = BATCH_SIZE,
+        extra_filter: Optional[str] = None,
+        params: Optional[dict] = None,
+        after_id: Optional[uuid.UUID] = None,
+) -> Tuple[int, Optional[uuid.UUID], List[dict]]:
+    """
+    Same selection as _move_batch_atomic (ids picked once, see there), but the DELETE ... RETURNING
+    rows are written to files.
+    The files are written before the caller commits; publish/discard them after commit/rollback.
+    """
+    cols_csv = ", ".join(columns)
+    where = f"{cutoff_column} < :cutoff" + (f" AND {extra_filter}" if extra_filter else "")
+    bind = {"cutoff": cutoff_dt, "limit": limit, **(params or {})}
+    if after_id is not None:
+        where += " AND id > :after_id"
+        bind["after_id"] = after_id
+
+    sql_move = f"""
+    WITH picked AS MATERIALIZED (
+      SELECT id FROM {src_table}
+      WHERE {where}
+      ORDER BY id
+      LIMIT :limit
+      FOR UPDATE SKIP LOCKED
     )
-    candidates = [str(r[0]) for r in res_cand.fetchall()]
-
-    exist_ids: List[str] = []
-    if candidates:
-        res_exist = await session.execute(
-            sa.text(f"SELECT id FROM {archive_table} WHERE id = ANY(:ids)").execution_options(
-                _sa_skip_with_loader_criteria=True),
-            {"ids": candidates},
-        )
-        exist_ids = [str(r[0]) for r in res_exist.fetchall()]
-
-    # 3) Delete from source only those ids that actually exist in archive
-    moved_ids: List[str] = []
-    if exist_ids:
-        res_del = await session.execute(
-            sa.text(f"DELETE FROM {src_table} WHERE id = ANY(:ids) RETURNING id").execution_options(
-                _sa_skip_with_loader_criteria=True),
-            {"ids": exist_ids},
-        )
-        moved_ids = [str(r[0]) for r in res_del.fetchall()]
+    DELETE FROM {src_table}
+    WHERE id IN (SELECT id FROM picked)
+    RETURNING {cols_csv};
+    """
+    res = await session.execute(sa.text(sql_move).execution_options(_sa_skip_with_loader_criteria=True), bind)
+    rows = res.all()
+    if not rows:
+        return 0, None, []
+    entries = await asyncio.to_thread(archive.write_batch, src_table, columns, rows, cutoff_column)
+    last_id = max(row[columns.index("id")] for row in rows)
+    return len(rows), last_id, entries
 
-    return moved_ids
+
+async def _move_batch(
+        session: AsyncSession,
+        archive: Optional[FileArchive],
+        src_table: str,
+        columns: List[str],
+        cutoff_dt,
+        limit: int,
+        dry_run: bool,
+        **filters,
+) -> Tuple[int, Optional[uuid.UUID], List[dict]]:
+    """Move one batch to the configured target: *_archive table (archive is None) or files."""
+    if archive is None or dry_run:
+        moved, last_id = await _move_batch_atomic(session, src_table, f"{src_table}_archive", columns, "deleted_at",
+                                                  cutoff_dt, limit=limit, dry_run=dry_run, **filters)
+        return moved, last_id, []
+    return await _move_batch_to_files(session, archive, src_table, columns, "deleted_at", cutoff_dt, limit=limit,
+                                      **filters)
+
+
+async def _commit_batch(session: AsyncSession, archive: Optional[FileArchive], entries: List[dict]) -> None:
+    """
+    Commit the batch. Its files are recorded as pending first and marked committed (or discarded)
+    once the outcome is known, so a crash in between is resolved by _reconcile_archive.
+    """
+    if archive is not None:
+        archive.prepare(entries)
+    try:
+        await session.commit()
+    except Exception:
+        if archive is not None:
+            archive.discard(entries)
+        raise
+    if archive is not None:
+        archive.publish(entries)
 
 
-async def _purge_audit_logs(session: AsyncSession, cutoff_dt, dry_run: bool = True) -> int:
+def _next_batch_size(current: int, elapsed: float, target_seconds: float) -> int:
+    """Scale the batch so each one takes about target_seconds (at most x2 / ÷2 per step)."""
+    if elapsed <= 0:
+        return min(current * 2, MAX_BATCH_SIZE)
+    factor = max(0.5, min(2.0, target_seconds / elapsed))
+    return max(MIN_BATCH_SIZE, min(MAX_BATCH_SIZE, int(current * factor)))
+
+
+def _out_of_time(deadline: Optional[float]) -> bool:
+    return deadline is not None and time.monotonic() >= deadline
+
+
+async def _archive_table(
+        session_factory,
+        src_table: str,
+        columns: List[str],
+        cutoff_dt,
+        batch_size: int,
+        batch_seconds: float,
+        deadline: Optional[float] = None,
+        dry_run: bool = True,
+        archive: Optional[FileArchive] = None,
+        extra_filter: Optional[str] = None,
+) -> Tuple[int, bool]:
+    """
+    Archive every candidate of src_table in time-budgeted batches on its own session.
+    Each batch commits together with the table checkpoint, so an interrupted run resumes after
+    the last archived id. Returns (rows moved, whether the pass finished).
+    """
+    total = 0
+    limit = batch_size
+    async with session_factory() as session:
+        after_id = None if dry_run else await _load_checkpoint(session, src_table)
+        if after_id is not None:
+            logger.info("Resuming %s after id %s", src_table, after_id)
+        while True:
+            if _out_of_time(deadline):
+                logger.info("Max runtime reached: %s stops after %d rows at id %s", src_table, total, after_id)
+                return total, False
+            started = time.monotonic()
+            moved, last_id, entries = await _move_batch(session, archive, src_table, columns, cutoff_dt, limit,
+                                                        dry_run, after_id=after_id, extra_filter=extra_filter)
+            if not moved:
+                break
+            await _save_checkpoint(session, src_table, last_id)
+            await _commit_batch(session, archive, entries)
+            total += moved
+            after_id = last_id
+            elapsed = time.monotonic() - started
+            logger.info("Moved %d %s rows in %.2fs (total %d, batch size %d)", moved, src_table, elapsed, total,
+                        limit)
+            limit = _next_batch_size(limit, elapsed, batch_seconds)
+
+        if not dry_run:
+            await _save_checkpoint(session, src_table, None, completed=True)
+            await session.commit()
+    return total, True
+
+
+async def _partition_to_files(session: AsyncSession, archive: FileArchive, table: str, name: str,
+                              columns: List[str], date_column: str) -> Tuple[int, List[dict]]:
+    """Copy a detached partition into archive files in MAX_BATCH_SIZE chunks (keyset on id)."""
+    # Sin cursor de servidor: un portal abierto impediría el DROP TABLE posterior en la misma transacción
+    select_cols = ", ".join(columns)
+    rows = 0
+    entries: List[dict] = []
+    params: dict = {"limit": MAX_BATCH_SIZE}
+    where = ""
+    while True:
+        chunk = (
+            await session.execute(sa.text(f"SELECT {select_cols} FROM {name} {where}ORDER BY id LIMIT :limit"), params)
+        ).all()
+        if not chunk:
+            break
+        entries += await asyncio.to_thread(archive.write_batch, table, columns, chunk, date_column, name)
+        rows += len(chunk)
+        params["last_id"] = chunk[-1]._mapping["id"]
+        where = "WHERE id > :last_id "
+    return rows, entries
+
+
+async def _retire_movement_partitions(
+        session: AsyncSession,
+        cutoff_dt,
+        months_ahead: int = MOVEMENT_MONTHS_AHEAD,
+        deadline: Optional[float] = None,
+        dry_run: bool = True,
+        archive: Optional[FileArchive] = None,
+) -> dict:
+    """
+    movement is partitioned by month on occurred_at: create the upcoming partitions and retire the
+    ones entirely older than cutoff_dt. Each partition is detached in its own short transaction
+    (bounded by lock_timeout), then copied to movement_archive (or files), its net deltas added to
+    movement_opening_balance (stock history starts from there; balances that net to zero are deleted
+    so their batches can be archived), its codes released from
+    movement_code_registry and the table dropped in a second one. Partitions detached by an
+    interrupted run are picked up again.
+    """
+    from src.app.db.partitions import (
+        add_months, ensure_monthly_partitions, list_detached_partitions, list_partitions,
+    )
+
+    created = await ensure_monthly_partitions(session, "movement", months_ahead, dry_run=dry_run)
+    if not dry_run:
+        await session.commit()
+
+    expired = [(name, month) for name, month in await list_partitions(session, "movement")
+               if add_months(month, 1) <= cutoff_dt.date()]
     if dry_run:
-        res = await session.execute(
-            sa.text("SELECT count(*) FROM audit_log WHERE occurred_at < :cutoff").execution_options(
-                _sa_skip_with_loader_criteria=True),
-            {"cutoff": cutoff_dt},
+        for name, _ in expired:
+            count = (await session.execute(sa.text(f"SELECT count(*) FROM {name}"))).scalar_one()
+            logger.info("DRY RUN - movement partition %s would be retired (%d rows)", name, count)
+        return {"created": created, "retired": [name for name, _ in expired], "moved": 0}
+
+    for name, _ in expired:
+        if _out_of_time(deadline):
+            break
+        try:
+            await session.execute(sa.text(f"SET LOCAL lock_timeout = '{DETACH_LOCK_TIMEOUT}'"))
+            await session.execute(sa.text(f"ALTER TABLE movement DETACH PARTITION {name}"))
+            await session.commit()
+        except sa.exc.DBAPIError as exc:
+            await session.rollback()
+            logger.warning("Could not detach %s (%s); retrying next run", name, exc.orig)
+
+    retired, moved = [], 0
+    for name, month in await list_detached_partitions(session, "movement"):
+        if _out_of_time(deadline):
+            logger.info("Max runtime reached: detached movement partition %s archived next run", name)
+            break
+        started = time.monotonic()
+        entries: List[dict] = []
+        if archive is None:
+            cols_csv = ", ".join(MOVEMENT_COLUMNS)
+            await session.execute(sa.text(
+                f"INSERT INTO movement_archive ({cols_csv}) SELECT {cols_csv} FROM {name} ON CONFLICT (id) DO NOTHING"
+            ))
+            rows = (await session.execute(sa.text(f"SELECT count(*) FROM {name}"))).scalar_one()
+        else:
+            rows, entries = await _partition_to_files(session, archive, "movement", name, MOVEMENT_COLUMNS,
+                                                      "occurred_at")
+        # El histórico de stock arranca desde este saldo: debe confirmarse junto con el DROP
+        await session.execute(
+            sa.text(OPENING_BALANCE_SQL.format(partition=name)), {"retired_until": add_months(month, 1)}
         )
-        return int(res.scalar_one())
-    else:
-        res = await session.execute(
-            sa.text("DELETE FROM audit_log WHERE occurred_at < :cutoff RETURNING id").execution_options(
-                _sa_skip_with_loader_criteria=True),
-            {"cutoff": cutoff_dt},
+        await session.execute(sa.text(ZERO_OPENING_BALANCE_SQL))
+        # Mismos límites que la partición: date -> timestamptz en la zona de la sesión, como su FOR VALUES
+        await session.execute(
+            sa.text(
+                "DELETE FROM movement_code_registry "
+                "WHERE occurred_at >= CAST(:start AS date) AND occurred_at < CAST(:end AS date)"
+            ),
+            {"start": month, "end": add_months(month, 1)},
         )
-        ids = res.fetchall()
-        return len(ids)
+        await session.execute(sa.text(f"DROP TABLE {name}"))
+        await _commit_batch(session, archive, entries)
+        retired.append(name)
+        moved += rows
+        logger.info("Retired movement partition %s (%d rows) in %.2fs", name, rows, time.monotonic() - started)
+    return {"created": created, "retired": retired, "moved": moved}
+
+
+async def _rotate_audit_partitions(
+        session: AsyncSession,
+        cutoff_dt,
+        months_ahead: int = AUDIT_MONTHS_AHEAD,
+        detach_only: bool = False,
+        dry_run: bool = True,
+) -> dict:
+    """
+    audit_log is partitioned by month: create the upcoming partitions and drop (or detach)
+    the ones entirely older than cutoff_dt. Both are catalog operations, no rows are deleted.
+    """
+    from src.app.db.partitions import drop_expired_partitions, ensure_monthly_partitions
+
+    created = await ensure_monthly_partitions(session, "audit_log", months_ahead, dry_run=dry_run)
+    expired = await drop_expired_partitions(session, "audit_log", cutoff_dt, detach_only=detach_only,
+                                            dry_run=dry_run)
+    return {"created": created, "expired": expired}
 
 
-async def maintenance_job(dry_run: bool = True, batch_size: int = BATCH_SIZE, lock_key: Optional[int] = 123456789):
+async def maintenance_job(
+        dry_run: bool = True,
+        batch_size: int = BATCH_SIZE,
+        lock_key: Optional[int] = 123456789,
+        batch_seconds: float = BATCH_SECONDS,
+        audit_months_ahead: int = AUDIT_MONTHS_AHEAD,
+        detach_audit_partitions: bool = False,
+        movement_months_ahead: int = MOVEMENT_MONTHS_AHEAD,
+        max_runtime: Optional[float] = None,
+        restart: bool = False,
+        target: str = "table",
+        archive_dir: str = ARCHIVE_DIR,
+):
     # Lazy imports to avoid circular dependencies
-    from src.app.db.session import AsyncSessionLocal
-
-    # Column lists must match archive table schemas
-    reservation_columns = [
-        "id", "product_id", "batch_id", "location_id", "event_id", "cost_center_id",
-        "quantity", "reserved_from", "reserved_until", "status", "created_at", "updated_at", "deleted_at"
-    ]
-    batch_columns = [
-        "id", "product_id", "code", "expiration_date", "origin_type", "origin_id", "quarantined",
-        "created_at", "updated_at", "deleted_at"
-    ]
-    movement_columns = [
-        "id", "code", "movement_type_id", "product_id", "batch_id", "from_location_id", "to_location_id",
-        "reason_id", "requested_by_user_id", "executed_by_user_id", "quantity", "occurred_at",
-        "created_at", "updated_at", "deleted_at"
-    ]
+    from src.app.db.session import AsyncSessionLocal, engine
 
     start_ts = datetime.now(timezone.utc)
-    logger.info("Starting maintenance_job dry_run=%s batch_size=%d at %s", dry_run, batch_size, start_ts.isoformat())
-    totals = {"reservation": 0, "batch": 0, "movement": 0}
+    deadline = time.monotonic() + max_runtime if max_runtime else None
+    logger.info("Starting maintenance_job dry_run=%s batch_size=%d max_runtime=%s at %s", dry_run, batch_size,
+                max_runtime, start_ts.isoformat())
+    totals: Dict[str, int] = {"reservation": 0, "batch": 0, "movement": 0, "serial": 0}
+    finished: Dict[str, bool] = {}
     errors = 0
-    purged_count = 0
-
-    async with AsyncSessionLocal() as session:  # type: AsyncSession
-        # Forzar encoding de la sesión a UTF8 para evitar problemas de mezcla de codificaciones
-        await session.execute(sa.text("SET client_encoding = 'UTF8'"))
-
-        got_lock = await _try_advisory_lock(session, lock_key)
+    audit_partitions = {"created": [], "expired": []}
+    movement_partitions = {"created": [], "retired": [], "moved": 0}
+    run_id = str(uuid.uuid4())
+    # Con target "files" las tablas *_archive no se usan (pueden no existir)
+    archive = FileArchive(Path(archive_dir), run_id) if target == "files" else None
+
+    # El lock consultivo vive en su propia conexión durante todo el job; las tablas usan sesiones propias
+    async with engine.connect() as lock_conn:
+        got_lock = await _try_advisory_lock(lock_conn, lock_key)
         if not got_lock:
             logger.error("Could not acquire advisory lock %s. Aborting.", lock_key)
             return
 
         try:
-            # 1) Reservations first (dependents of batch)
-            cutoff_res = datetime.now(timezone.utc) - timedelta(days=365 * 2)
-            while True:
-                moved_ids = await _move_batch_atomic(session, "reservation", "reservation_archive", reservation_columns,
-                                                     "deleted_at", cutoff_res, limit=batch_size, dry_run=dry_run)
-                if not moved_ids:
-                    break
-                totals["reservation"] += len(moved_ids)
-                logger.info("Moved reservation ids (batch): %s", moved_ids)
-                if not dry_run:
-                    await session.commit()
+            async with AsyncSessionLocal() as session:
+                # Forzar encoding de la sesión a UTF8 para evitar problemas de mezcla de codificaciones
+                await session.execute(sa.text("SET client_encoding = 'UTF8'"))
 
-            # 2) Movements (must run before batches to avoid FK violations)
-            cutoff_mov = datetime.now(timezone.utc) - timedelta(days=365 * 3)
-            while True:
-                moved_ids = await _move_batch_atomic(session, "movement", "movement_archive", movement_columns,
-                                                     "deleted_at", cutoff_mov, limit=batch_size, dry_run=dry_run)
-                if not moved_ids:
-                    break
-                totals["movement"] += len(moved_ids)
-                logger.info("Moved movement ids (batch): %s", moved_ids)
-                if not dry_run:
+                if restart and not dry_run:
+                    await session.execute(sa.text("DELETE FROM maintenance_checkpoint"))
                     await session.commit()
 
-            # 3) Serials (must run before batches to avoid FK violations)
-            serial_columns = [
-                "id", "product_id", "batch_id", "serial_number",
-                "location_id", "status", "created_at", "updated_at", "deleted_at"
-            ]
-            cutoff_serial = datetime.now(timezone.utc) - timedelta(days=365 * 3)
-
-            while True:
-                moved_ids = await _move_batch_atomic(
-                    session, "serial", "serial_archive", serial_columns,
-                    "deleted_at", cutoff_serial, limit=batch_size, dry_run=dry_run
-                )
-                if not moved_ids:
-                    break
-                totals["serial"] = totals.get("serial", 0) + len(moved_ids)
-                logger.info("Moved serial ids (batch): %s", moved_ids)
-                if not dry_run:
-                    await session.commit()
+                # Archivos que una corrida anterior dejó pendientes entre commit y manifest
+                if archive is not None and not dry_run:
+                    await _reconcile_archive(session, archive)
 
-            # 3) Batches (parents) — but verify children per-lote before deleting
-            cutoff_batch = datetime.now(timezone.utc) - timedelta(days=365 * 5)
-            while True:
-                # collect candidate batch ids up to limit
-                res_cand = await session.execute(
-                    sa.text(
-                        "SELECT id FROM batch WHERE deleted_at < :cutoff ORDER BY id LIMIT :limit"
-                    ).execution_options(_sa_skip_with_loader_criteria=True),
-                    {"cutoff": cutoff_batch, "limit": batch_size},
+                # 1) Movement: pre-create upcoming partitions and retire expired ones whole
+                now = datetime.now(timezone.utc)
+                movement_partitions = await _retire_movement_partitions(
+                    session, now - MOVEMENT_RETENTION, months_ahead=movement_months_ahead, deadline=deadline,
+                    dry_run=dry_run, archive=archive,
                 )
-                candidates = [str(r[0]) for r in res_cand.fetchall()]
-                if not candidates:
-                    break
-
-                # check for residual children in movement referencing these batches
-                res_child = await session.execute(
-                    sa.text(
-                        "SELECT DISTINCT batch_id FROM movement WHERE batch_id = ANY(:ids) LIMIT 1"
-                    ).execution_options(_sa_skip_with_loader_criteria=True),
-                    {"ids": candidates},
-                )
-                residual = [str(r[0]) for r in res_child.fetchall()]
-
-                if residual:
-                    logger.warning(
-                        "Found residual movement children for batch ids, will attempt to move them first: %s", residual)
-                    # Attempt to move movements referencing these batches (only ones older than movement cutoff)
-                    # Use candidate set to limit scope
-                    sql_move_specific = f"""
-                    WITH candidate_mov AS (
-                      SELECT id FROM movement WHERE batch_id = ANY(:ids) AND deleted_at < :cutoff_mov ORDER BY id LIMIT :limit
-                    )
-                    INSERT INTO movement_archive ({', '.join(movement_columns)})
-                    SELECT {', '.join(movement_columns)}
-                    FROM movement m
-                    WHERE m.id IN (SELECT id FROM candidate_mov)
-                    ON CONFLICT (id) DO NOTHING
-                    RETURNING id;
-                    """
-                    res_move_specific = await session.execute(
-                        sa.text(sql_move_specific).execution_options(_sa_skip_with_loader_criteria=True),
-                        {"ids": candidates, "cutoff_mov": cutoff_mov, "limit": batch_size},
+                totals["movement"] = movement_partitions["moved"]
+                logger.info("Movement partitions created=%s retired=%s", movement_partitions["created"],
+                            movement_partitions["retired"])
+
+                # 2) Reservations and serials (children of batch) concurrently
+
+                results = await asyncio.gather(*(
+                    _archive_table(AsyncSessionLocal, table, columns, now - age, batch_size, batch_seconds,
+                                   deadline=deadline, dry_run=dry_run, archive=archive)
+                    for table, (columns, age) in CHILD_TABLES.items()
+                ))
+                for table, (moved, done) in zip(CHILD_TABLES, results):
+                    totals[table] = moved
+                    finished[table] = done
+
+                # 3) Batches (parents) only once every child table finished its pass
+                if all(finished.values()):
+                    totals["batch"], finished["batch"] = await _archive_table(
+                        AsyncSessionLocal, "batch", BATCH_COLUMNS, now - BATCH_CUTOFF, batch_size, batch_seconds,
+                        deadline=deadline, dry_run=dry_run, archive=archive, extra_filter=BATCH_UNREFERENCED,
                     )
-                    moved_specific = [str(r[0]) for r in res_move_specific.fetchall()]
-
-                    if moved_specific:
-                        # delete those that exist now in archive
-                        res_exist = await session.execute(
-                            sa.text("SELECT id FROM movement_archive WHERE id = ANY(:ids)").execution_options(
-                                _sa_skip_with_loader_criteria=True),
-                            {"ids": moved_specific},
-                        )
-                        exist_ids = [str(r[0]) for r in res_exist.fetchall()]
-                        if exist_ids:
-                            await session.execute(
-                                sa.text("DELETE FROM movement WHERE id = ANY(:ids)").execution_options(
-                                    _sa_skip_with_loader_criteria=True),
-                                {"ids": exist_ids},
-                            )
-                            if not dry_run:
-                                await session.commit()
-                            logger.info("Moved and deleted movement ids referencing batches: %s", exist_ids)
-                    # re-evaluate batches in next loop iteration
-                    continue
-
-                # No residual movement children (or they were cleared) — move batches normally
-                moved_ids = await _move_batch_atomic(session, "batch", "batch_archive", batch_columns, "deleted_at",
-                                                     cutoff_batch, limit=batch_size, dry_run=dry_run)
-                if not moved_ids:
-                    break
-                totals["batch"] += len(moved_ids)
-                logger.info("Moved batch ids (batch): %s", moved_ids)
+                else:
+                    finished["batch"] = False
+                    logger.info("Skipping batch archiving until reservation/serial passes finish")
+
+                # 4) Audit log retention by partition
+                cutoff_log = datetime.now(timezone.utc) - timedelta(days=365 * 7)
+                audit_partitions = await _rotate_audit_partitions(session, cutoff_log, months_ahead=audit_months_ahead,
+                                                                  detach_only=detach_audit_partitions, dry_run=dry_run)
+                logger.info("Audit partitions created=%s %s=%s", audit_partitions["created"],
+                            "detached" if detach_audit_partitions else "dropped", audit_partitions["expired"])
                 if not dry_run:
                     await session.commit()
 
-            # 4) Audit logs purge
-            cutoff_log = datetime.now(timezone.utc) - timedelta(days=365 * 7)
-            purged_count = await _purge_audit_logs(session, cutoff_log, dry_run=dry_run)
-            if not dry_run:
-                await session.commit()
-
-            # 5) Write summary to audit_log only on commit
-            if not dry_run:
-                run_id = str(uuid.uuid4())
-                summary = {
-                    "moved_reservations": totals["reservation"],
-                    "moved_batches": totals["batch"],
-                    "moved_movements": totals["movement"],
-                    "moved_serials": totals.get("serial", 0),
-                    "purged_audit_logs": purged_count,
-                    "errors": errors,
-                    "started_at": start_ts.isoformat(),
-                    "finished_at": datetime.now(timezone.utc).isoformat(),
-                }
-
-                # Construir SQL con bindparam JSONB
-                insert_sql = sa.text("""
-                    INSERT INTO audit_log (
-                        id, entity_name, entity_id, action, changes, performed_by_user_id, reason, occurred_at
-                    ) VALUES (
-                        :id, :ename, :eid, :action, :changes, :user, :reason, now()
-                    )
-                """).bindparams(sa.bindparam("changes", type_=postgresql.JSONB))
-
-                params = {
-                    "id": run_id,
-                    "ename": "maintenance_job",
-                    "eid": run_id,
-                    "action": "archive_and_purge",
-                    "changes": summary,  # pasamos el dict directamente
-                    "user": None,
-                    "reason": "scheduled archive_and_purge",
-                }
-
-                await session.execute(insert_sql.execution_options(_sa_skip_with_loader_criteria=True), params)
-                await session.commit()
+                # 5) Write summary to audit_log only on commit
+                if not dry_run:
+                    summary = {
+                        "moved_reservations": totals["reservation"],
+                        "moved_batches": totals["batch"],
+                        "moved_movements": totals["movement"],
+                        "moved_serials": totals["serial"],
+                        "created_audit_partitions": audit_partitions["created"],
+                        "expired_audit_partitions": audit_partitions["expired"],
+                        "created_movement_partitions": movement_partitions["created"],
+                        "retired_movement_partitions": movement_partitions["retired"],
+                        "finished_tables": finished,
+                        "target": target,
+                        "archive_dir": str(archive.root) if archive else None,
+                        "errors": errors,
+                        "started_at": start_ts.isoformat(),
+                        "finished_at": datetime.now(timezone.utc).isoformat(),
+                    }
+
+                    # Construir SQL con bindparam JSONB
+                    insert_sql = sa.text("""
+                        INSERT INTO audit_log (
+                            id, entity_name, entity_id, action, changes, performed_by_user_id, reason, occurred_at
+                        ) VALUES (
+                            :id, :ename, :eid, :action, :changes, :user, :reason, now()
+                        )
+                    """).bindparams(sa.bindparam("changes", type_=postgresql.JSONB))
+
+                    params = {
+                        "id": run_id,
+                        "ename": "maintenance_job",
+                        "eid": run_id,
+                        "action": "archive_and_purge",
+                        "changes": summary,  # pasamos el dict directamente
+                        "user": None,
+                        "reason": "scheduled archive_and_purge",
+                    }
+
+                    await session.execute(insert_sql.execution_options(_sa_skip_with_loader_criteria=True), params)
+                    await session.commit()
 
-            logger.info("Maintenance finished: totals=%s purged_audit_logs=%d dry_run=%s", totals, purged_count,
-                        dry_run)
+            logger.info("Maintenance finished: totals=%s finished=%s expired_audit_partitions=%s dry_run=%s", totals,
+                        finished, audit_partitions["expired"], dry_run)
 
         except Exception as exc:
             errors += 1
-            await session.rollback()
             logger.exception("Error during maintenance_job: %s", exc)
         finally:
             try:
-                await _release_advisory_lock(session, lock_key)
+                await _release_advisory_lock(lock_conn, lock_key)
             except Exception:
                 logger.warning("Failed releasing advisory lock; it may be auto-released at session end.")
 
@@ -335,9 +747,31 @@ async def maintenance_job(dry_run: bool = True, batch_size: int = BATCH_SIZE, lo
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--commit", action="store_true", help="Persist changes (not dry-run)")
-    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Rows per batch")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Rows in the first batch of each table")
+    parser.add_argument("--batch-seconds", type=float, default=BATCH_SECONDS,
+                        help="Target duration per batch; later batch sizes adapt to it")
     parser.add_argument("--lock-key", type=int, default=123456789, help="Advisory lock key (int)")
+    parser.add_argument("--max-runtime", type=float, default=None,
+                        help="Seconds after which tables stop at their next batch boundary (resumed next run)")
+    parser.add_argument("--restart", action="store_true", help="Ignore saved checkpoints and start every table over")
+    parser.add_argument("--target", choices=ARCHIVE_TARGETS, default="table",
+                        help="Archive into *_archive tables or into compressed CSV files")
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR, help="Root directory for --target files")
+    parser.add_argument("--audit-months-ahead", type=int, default=AUDIT_MONTHS_AHEAD,
+                        help="Future monthly audit_log partitions to keep created")
+    parser.add_argument("--detach-audit-partitions", action="store_true",
+                        help="Detach expired audit_log partitions instead of dropping them")
+    parser.add_argument("--movement-months-ahead", type=int, default=MOVEMENT_MONTHS_AHEAD,
+                        help="Future monthly movement partitions to keep created")
     args = parser.parse_args()
 
     BATCH_SIZE = args.batch_size
-    asyncio.run(maintenance_job(dry_run=not args.commit, batch_size=BATCH_SIZE, lock_key=args.lock_key))
+    asyncio.run(maintenance_job(dry_run=not args.commit, batch_size=BATCH_SIZE, lock_key=args.lock_key,
+                                batch_seconds=args.batch_seconds,
+                                audit_months_ahead=args.audit_months_ahead,
+                                detach_audit_partitions=args.detach_audit_partitions,
+                                movement_months_ahead=args.movement_months_ahead,
+                                max_runtime=args.max_runtime,
+                                restart=args.restart,
+                                target=args.target,
+                                archive_dir=args.archive_dir))
@@ -1,6 +1,6 @@
 # Ruta: scripts/maintenance/run_maintenance.ps1
 param(
-  [int]$BatchSize = 50,
+  [int]$BatchSize = 5000,
   [int]$LockKey = 123456789,
   [string]$ProjectRoot = ""
 )
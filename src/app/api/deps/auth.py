@@ -1,5 +1,6 @@
 # src\app\api\deps\auth.py
 from typing import List, Optional
+from uuid import UUID
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
@@ -8,6 +9,7 @@ from sqlalchemy import select
 
 from src.app.db.session import get_session
 from src.app.services.auth import decode_token, get_user_roles
+from src.app.services.auth_cache import AuthPrincipal, auth_cache
 from src.app.models.user import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
@@ -30,11 +32,112 @@ async def get_current_user(token: str = Depends(oauth2_scheme), session: AsyncSe
     return user
 
 
+def _principal_from_claims(payload: dict) -> Optional[AuthPrincipal]:
+    """Build the principal from signed `uid`/`roles`/`rv` claims; None for tokens without them."""
+    try:
+        user_id = UUID(payload["uid"])
+        roles = frozenset(payload["roles"])
+        roles_version = int(payload["rv"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    return AuthPrincipal(
+        user_id=user_id,
+        username=payload.get("sub", ""),
+        active=True,
+        roles=roles,
+        roles_version=roles_version,
+        claims=payload,
+    )
+
+
+async def _current_roles_version(session: AsyncSession, user_id: UUID) -> int:
+    """Server-side roles_version of an active user, cached briefly in auth_cache."""
+    version = auth_cache.get_version(user_id)
+    if version is not None:
+        return version
+    result = await session.execute(
+        select(User.roles_version).where(User.id == user_id, User.active.is_(True))
+    )
+    version = result.scalar_one_or_none()
+    if version is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found or inactive")
+    auth_cache.set_version(user_id, version)
+    return version
+
+
+async def _load_principal(session: AsyncSession, payload: dict) -> AuthPrincipal:
+    """Resolve user and roles from the DB (tokens issued without role claims)."""
+    subject: Optional[str] = payload.get("sub")
+    if not subject:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token subject")
+
+    # Resolver por el uid firmado; sin él, por el mismo campo que firmó el login
+    # (email en /auth/login, username en el login mínimo), como get_user_by_identifier
+    if payload.get("uid"):
+        try:
+            match = User.id == UUID(payload["uid"])
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token subject")
+    elif "@" in subject:
+        match = User.email == subject
+    else:
+        match = User.username == subject
+    result = await session.execute(
+        select(User.id, User.username, User.roles_version).where(match, User.active.is_(True))
+    )
+    row = result.one_or_none()
+    if not row:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found or inactive")
+
+    roles = await get_user_roles(session, row.id)
+    auth_cache.set_version(row.id, row.roles_version)
+    return AuthPrincipal(
+        user_id=row.id,
+        username=row.username,
+        active=True,
+        roles=frozenset(roles),
+        roles_version=row.roles_version,
+        claims=payload,
+    )
+
+
+async def get_current_principal(
+    token: str = Depends(oauth2_scheme), session: AsyncSession = Depends(get_session)
+) -> AuthPrincipal:
+    """
+    Resolve the token to user id and role codes.
+    Roles come from the token's signed claims and are trusted while the user's roles_version
+    matches the server-side one; only when it changed are roles re-read from the DB.
+    """
+    principal = auth_cache.get(token)
+    cached = principal is not None
+    if not cached:
+        try:
+            payload = decode_token(token)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+
+        principal = _principal_from_claims(payload)
+        if principal is None:
+            principal = await _load_principal(session, payload)
+            auth_cache.set(token, principal)
+            return principal
+
+    current = await _current_roles_version(session, principal.user_id)
+    if current == principal.roles_version:
+        if cached:
+            return principal
+    else:
+        roles = await get_user_roles(session, principal.user_id)
+        principal = principal._replace(roles=frozenset(roles), roles_version=current)
+    auth_cache.set(token, principal)
+    return principal
+
+
 def require_roles(required: List[str]):
     """Dependency factory: ensure the current user has any of required roles."""
-    async def dependency(user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)) -> User:
-        user_roles = await get_user_roles(session, user.id)
-        if not any(r in user_roles for r in required):
+    async def dependency(principal: AuthPrincipal = Depends(get_current_principal)) -> AuthPrincipal:
+        if not any(r in principal.roles for r in required):
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient role")
-        return user
+        return principal
     return dependency
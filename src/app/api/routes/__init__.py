@@ -6,7 +6,7 @@ router = APIRouter()
 # Import routers from individual modules under src.app.api.routes
 # Cada módulo debe exponer un APIRouter llamado `router`.
 from src.app.api.routes import alerts as alerts_mod
-from src.app.api.routes import audit as audit_mod
+from src.app.api.routes import audit_logs as audit_logs_mod
 from src.app.api.routes import auth as auth_mod
 from src.app.api.routes import categories as categories_mod
 from src.app.api.routes import inventory as inventory_mod
@@ -19,7 +19,7 @@ from src.app.api.routes import units as units_mod
 # Incluir routers de cada módulo en el agregador
 for sub in (
     alerts_mod,
-    audit_mod,
+    audit_logs_mod,
     auth_mod,
     categories_mod,
     inventory_mod,
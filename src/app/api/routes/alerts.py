@@ -1,13 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
 from decimal import Decimal
+from datetime import datetime, timezone
 
 from src.app.db.session import get_session
+from src.app.models.alert_threshold import AlertThreshold
 from src.app.services.alerts import check_alerts
 from src.app.core.settings import settings
 from src.app.services.notifications.slack_notifier import send_slack_alert
-from src.app.schemas.alert import AlertRead
+from src.app.schemas.alert import AlertRead, AlertThresholdCreate, AlertThresholdRead, AlertThresholdUpdate
+from src.app.services.audit_logger import log_audit
 
 router = APIRouter(prefix="/alerts", tags=["alerts"])
 
@@ -64,3 +69,81 @@ async def stock_alerts_notify(
 
     await send_slack_alert(webhook, alerts)
     return {"alerts": alerts, "sent": True}
+
+
+# --- Umbrales por producto/categoría (alert_threshold) ---
+
+@router.post("/thresholds", response_model=AlertThresholdRead, status_code=status.HTTP_201_CREATED)
+async def create_threshold(payload: AlertThresholdCreate, session: AsyncSession = Depends(get_session)):
+    """Create the alert threshold of a product or a category (one active threshold per target)."""
+    threshold = AlertThreshold(**payload.dict())
+    session.add(threshold)
+    try:
+        await session.commit()
+    except IntegrityError:
+        # uq_alert_threshold_product / uq_alert_threshold_category, o FK a un destino inexistente
+        await session.rollback()
+        raise HTTPException(status_code=400, detail="Threshold already exists for this target or target not found")
+    await session.refresh(threshold)
+    return threshold
+
+
+@router.get("/thresholds", response_model=list[AlertThresholdRead])
+async def list_thresholds(
+    product_id: UUID | None = Query(None),
+    category_id: UUID | None = Query(None),
+    session: AsyncSession = Depends(get_session),
+):
+    stmt = select(AlertThreshold)
+    if product_id:
+        stmt = stmt.where(AlertThreshold.product_id == product_id)
+    if category_id:
+        stmt = stmt.where(AlertThreshold.category_id == category_id)
+    result = await session.execute(stmt)
+    return result.scalars().all()
+
+
+@router.put("/thresholds/{threshold_id}", response_model=AlertThresholdRead)
+async def update_threshold(
+    threshold_id: UUID,
+    payload: AlertThresholdUpdate,
+    session: AsyncSession = Depends(get_session),
+):
+    """Update the limits of an alert threshold; its target cannot change."""
+    result = await session.execute(select(AlertThreshold).where(AlertThreshold.id == threshold_id))
+    threshold = result.scalar_one_or_none()
+    if not threshold:
+        raise HTTPException(status_code=404, detail="Threshold not found")
+
+    threshold.min_stock = payload.min_stock
+    threshold.min_coverage_days = payload.min_coverage_days
+    threshold.updated_at = datetime.now(timezone.utc)
+
+    await session.commit()
+    await session.refresh(threshold)
+    return threshold
+
+
+@router.delete("/thresholds/{threshold_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_threshold(threshold_id: UUID, session: AsyncSession = Depends(get_session)):
+    """Soft delete an alert threshold; its product or category falls back to the next level."""
+    stmt = (
+        update(AlertThreshold)
+        .where(AlertThreshold.id == threshold_id, AlertThreshold.deleted_at.is_(None))
+        .values(deleted_at=datetime.now(timezone.utc), updated_at=datetime.now(timezone.utc))
+    )
+    result = await session.execute(stmt)
+    if result.rowcount == 0:
+        raise HTTPException(status_code=404, detail="Threshold not found or already deleted")
+
+    await log_audit(
+        session=session,
+        entity_type="alert_threshold",
+        entity_id=threshold_id,
+        action="soft_delete",
+        changes={"deleted_at": "now()"},
+        user_id=None,
+    )
+
+    await session.commit()
+    return
@@ -1,9 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import tuple_
+from datetime import datetime
 from uuid import UUID
+import json
 
-from src.app.db.session import get_session
+from src.app.db.session import get_read_session
 from src.app.models.audit_log import AuditLog
 from src.app.schemas.audit_log import AuditLogRead
 
@@ -12,24 +15,67 @@ router = APIRouter(prefix="/audit", tags=["audit"])
 
 @router.get("/", response_model=list[AuditLogRead])
 async def list_audit_logs(
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     entity_name: str | None = Query(None),
     entity_id: UUID | None = Query(None),
+    action: str | None = Query(None),
+    performed_by_user_id: UUID | None = Query(None),
+    start_date: datetime | None = Query(None, description="Logs from this instant (inclusive)"),
+    end_date: datetime | None = Query(None, description="Logs before this instant (exclusive)"),
+    cursor_occurred_at: datetime | None = Query(None, description="occurred_at of the last log of the previous page"),
+    cursor_id: UUID | None = Query(None, description="id of the last log of the previous page"),
+    changes: str | None = Query(
+        None,
+        description='JSON object the changes must contain, e.g. {"direction": "transfer_out", "batch_id": "<uuid>"}',
+    ),
     limit: int = Query(50, ge=1, le=500),
 ) -> list[AuditLogRead]:
-    """List audit logs with optional filters."""
-    stmt = select(AuditLog).order_by(AuditLog.occurred_at.desc()).limit(limit)
+    """
+    List audit logs, newest first, with keyset pagination.
+    To fetch the next page pass the occurred_at and id of the last log received as
+    cursor_occurred_at / cursor_id; pages stay stable while new logs are written.
+    `changes` filters with JSONB containment (changes @> value), served by a GIN index.
+    """
+    if (cursor_occurred_at is None) != (cursor_id is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="cursor_occurred_at and cursor_id must be given together",
+        )
+
+    stmt = select(AuditLog).order_by(AuditLog.occurred_at.desc(), AuditLog.id.desc()).limit(limit)
     if entity_name:
         stmt = stmt.where(AuditLog.entity_name == entity_name)
     if entity_id:
         stmt = stmt.where(AuditLog.entity_id == entity_id)
+    if action:
+        stmt = stmt.where(AuditLog.action == action)
+    if performed_by_user_id:
+        stmt = stmt.where(AuditLog.performed_by_user_id == performed_by_user_id)
+    if changes:
+        try:
+            contained = json.loads(changes)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="changes must be valid JSON")
+        if not isinstance(contained, dict):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="changes must be a JSON object")
+        stmt = stmt.where(AuditLog.changes.contains(contained))
+    # Los límites sobre occurred_at también acotan las particiones mensuales que se recorren
+    if start_date:
+        stmt = stmt.where(AuditLog.occurred_at >= start_date)
+    if end_date:
+        stmt = stmt.where(AuditLog.occurred_at < end_date)
+    if cursor_occurred_at is not None:
+        stmt = stmt.where(
+            AuditLog.occurred_at <= cursor_occurred_at,
+            tuple_(AuditLog.occurred_at, AuditLog.id) < tuple_(cursor_occurred_at, cursor_id),
+        )
 
     result = await session.execute(stmt)
     return result.scalars().all()
 
 
 @router.get("/{log_id}", response_model=AuditLogRead)
-async def get_audit_log(log_id: UUID, session: AsyncSession = Depends(get_session)) -> AuditLogRead:
+async def get_audit_log(log_id: UUID, session: AsyncSession = Depends(get_read_session)) -> AuditLogRead:
     """Get a single audit log entry by ID."""
     result = await session.execute(select(AuditLog).where(AuditLog.id == log_id))
     log = result.scalar_one_or_none()
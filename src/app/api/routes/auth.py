@@ -7,12 +7,13 @@ from typing import Optional
 from src.app.core.security import (
     create_access_token,
     decode_token,
-    verify_password,
 )
 from src.app.models.user import User
 from src.app.schemas.auth import TokenResponse
 from src.app.schemas.user import UserRead
 from src.app.db.session import get_session
+from src.app.services.auth import get_user_roles
+from src.app.services.password_hasher import password_hasher
 
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -41,11 +42,16 @@ async def login(
     if not user or not user.active:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
-    if not verify_password(form_data.password, user.password_hash):
+    # PasswordHasherBusy -> 503 con Retry-After (handler en src/main.py)
+    valid = await password_hasher.verify(form_data.password, user.password_hash)
+    if not valid:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
-    # Firmar token con email como sub
-    token = create_access_token(user.email)
+    # Firmar token con email como sub, más roles y su versión para autorizar sin BD
+    roles = await get_user_roles(session, user.id)
+    token = create_access_token(
+        user.email, user_id=user.id, roles=roles, roles_version=user.roles_version
+    )
     # En Pydantic v1 se usa from_orm
     user_read = UserRead.from_orm(user)
 
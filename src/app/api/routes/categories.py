@@ -8,6 +8,7 @@ from src.app.db.session import get_session
 from src.app.models.category import Category
 from src.app.schemas.category import CategoryCreate, CategoryRead
 from src.app.services.audit_logger import log_audit  # opcional
+from src.app.services.catalog_cache import catalog_cache
 
 router = APIRouter(prefix="/categories", tags=["categories"])
 
@@ -26,14 +27,15 @@ async def create_category(
     category = Category(name=payload.name, parent_id=payload.parent_id)
     session.add(category)
     await session.commit()
+    catalog_cache.invalidate(Category)
     await session.refresh(category)
     return category
 
 
 @router.get("/", response_model=list[CategoryRead])
 async def list_categories(session: AsyncSession = Depends(get_session)):
-    result = await session.execute(select(Category))
-    return result.scalars().all()
+    # Servido desde catalog_cache; las escrituras de este router la invalidan
+    return await catalog_cache.all(session, Category)
 
 
 @router.get("/{category_id}", response_model=CategoryRead)
@@ -62,6 +64,7 @@ async def update_category(
     category.updated_at = datetime.now(timezone.utc)
 
     await session.commit()
+    catalog_cache.invalidate(Category)
     await session.refresh(category)
     return category
 
@@ -89,4 +92,5 @@ async def delete_category(category_id: UUID, session: AsyncSession = Depends(get
     )
 
     await session.commit()
+    catalog_cache.invalidate(Category)
     return
@@ -10,7 +10,9 @@ from src.app.models.inventory import Inventory
 from src.app.models.movement import Movement
 from src.app.models.reservation import Reservation
 from src.app.models.user import User
-from src.app.core.security import verify_password, create_access_token
+from src.app.core.security import create_access_token
+from src.app.services.auth import get_user_roles
+from src.app.services.password_hasher import password_hasher
 
 router = APIRouter()
 
@@ -159,10 +161,15 @@ async def login(payload: dict, session: AsyncSession = Depends(get_session)):
     if not row:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
     user = row._mapping
-    # verify_password expects the hashed password stored in DB
-    if not verify_password(password, user["password_hash"]):
+    # verify expects the hashed password stored in DB
+    # PasswordHasherBusy -> 503 con Retry-After (handler en src/main.py)
+    valid = await password_hasher.verify(password, user["password_hash"])
+    if not valid:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
-    token = create_access_token(subject=user["username"])
+    roles = await get_user_roles(session, user["id"])
+    token = create_access_token(
+        subject=user["username"], user_id=user["id"], roles=roles, roles_version=user["roles_version"]
+    )
     return {"access_token": token, "token_type": "bearer"}
 
 
@@ -3,7 +3,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from uuid import UUID
 
-from src.app.db.session import get_session
+from src.app.db.session import get_read_session
 from src.app.models.inventory import Inventory
 from src.app.schemas.inventory import InventoryRead
 
@@ -12,7 +12,7 @@ router = APIRouter(prefix="/inventory", tags=["inventory"])
 
 @router.get("/", response_model=list[InventoryRead])
 async def list_inventory(
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     product_id: UUID | None = Query(None),
     batch_id: UUID | None = Query(None),
     location_id: UUID | None = Query(None),
@@ -32,7 +32,7 @@ async def list_inventory(
 
 
 @router.get("/{inventory_id}", response_model=InventoryRead)
-async def get_inventory(inventory_id: UUID, session: AsyncSession = Depends(get_session)) -> InventoryRead:
+async def get_inventory(inventory_id: UUID, session: AsyncSession = Depends(get_read_session)) -> InventoryRead:
     """Get a single inventory record by ID."""
     result = await session.execute(select(Inventory).where(Inventory.id == inventory_id))
     inventory = result.scalar_one_or_none()
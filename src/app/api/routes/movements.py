@@ -1,13 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from uuid import UUID
+from datetime import datetime
 
-from src.app.db.session import get_session
+from src.app.db.session import get_read_session, get_session
 from src.app.models.movement import Movement
-from src.app.schemas.movement import MovementCreate, MovementRead
+from src.app.schemas.movement import MovementCreate, MovementRead, MovementBulkCreate, MovementBulkResult
 from src.app.services.inventory_updater import apply_movement
+from src.app.services.movement_ingestion import ingest_movements
+from src.app.services.movement_writer import movement_writer, WriterUnavailable
+from src.app.services.transfer_service import transfer_stock
+from src.app.services.streaming_export import stream_query, EXPORT_FORMATS
 from src.app.api.deps.auth import require_roles
+from src.app.core.settings import settings
 
 router = APIRouter(prefix="/movements", tags=["movements"])
 
@@ -25,6 +32,9 @@ async def create_movement(
 
     Only users with role 'warehouse' or 'admin' can perform this action.
     """
+    if settings.movements_group_commit:
+        return await _create_movement_grouped(payload, session)
+
     stmt = select(Movement).where(Movement.code == payload.code)
     result = await session.execute(stmt)
     existing = result.scalar_one_or_none()
@@ -37,21 +47,13 @@ async def create_movement(
     try:
         if payload.from_location_id and payload.to_location_id:
             # Transfer
-            await apply_movement(
+            await transfer_stock(
                 session,
                 payload.product_id,
                 payload.batch_id,
                 payload.from_location_id,
-                payload.quantity,
-                "transfer_out",
-            )
-            await apply_movement(
-                session,
-                payload.product_id,
-                payload.batch_id,
                 payload.to_location_id,
                 payload.quantity,
-                "transfer_in",
             )
         elif payload.to_location_id:
             # Inbound
@@ -84,9 +86,54 @@ async def create_movement(
     return movement
 
 
+async def _create_movement_grouped(payload: MovementCreate, session: AsyncSession) -> MovementRead:
+    """Hand the movement to the group-commit writer and return the stored row."""
+    try:
+        result = await movement_writer.submit(payload)
+    except WriterUnavailable as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    if result["status"] != "created":
+        raise HTTPException(status_code=400, detail=result["error"])
+    # occurred_at forma parte de la PK (tabla particionada): buscar por id en lugar de session.get
+    stored = await session.execute(select(Movement).where(Movement.id == result["movement_id"]))
+    return stored.scalar_one()
+
+
+@router.post(
+    "/bulk",
+    response_model=MovementBulkResult,
+    dependencies=[Depends(require_roles(["warehouse", "admin"]))],
+)
+async def create_movements_bulk(
+    payload: MovementBulkCreate,
+    session: AsyncSession = Depends(get_session),
+    chunk_size: int | None = Query(None, ge=1, le=5000),
+) -> MovementBulkResult:
+    """Register many movements at once, applying inventory changes set-wise per chunk.
+
+    Each chunk is committed on its own; the response reports success or failure per row.
+    Only users with role 'warehouse' or 'admin' can perform this action.
+    """
+    if not payload.movements:
+        raise HTTPException(status_code=400, detail="No movements provided")
+    if len(payload.movements) > settings.movements_bulk_max_items:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Too many movements (max {settings.movements_bulk_max_items})",
+        )
+
+    items = await ingest_movements(
+        session,
+        payload.movements,
+        chunk_size or settings.movements_bulk_chunk_size,
+    )
+    created = sum(1 for i in items if i["status"] == "created")
+    return MovementBulkResult(total=len(items), created=created, failed=len(items) - created, items=items)
+
+
 @router.get("/", response_model=list[MovementRead])
 async def list_movements(
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     product_id: UUID | None = Query(None),
     batch_id: UUID | None = Query(None),
     limit: int = Query(50, ge=1, le=500),
@@ -102,8 +149,47 @@ async def list_movements(
     return result.scalars().all()
 
 
+@router.get("/export")
+async def export_movements(
+    product_id: UUID | None = Query(None),
+    batch_id: UUID | None = Query(None),
+    start_date: datetime | None = Query(None),
+    end_date: datetime | None = Query(None),
+    format: str = Query("ndjson", regex="^(ndjson|csv)$"),
+):
+    """Stream every matching movement as NDJSON or CSV (no row cap, constant memory)."""
+    stmt = select(
+        Movement.id,
+        Movement.code,
+        Movement.movement_type_id,
+        Movement.product_id,
+        Movement.batch_id,
+        Movement.from_location_id,
+        Movement.to_location_id,
+        Movement.reason_id,
+        Movement.requested_by_user_id,
+        Movement.executed_by_user_id,
+        Movement.quantity,
+        Movement.occurred_at,
+    ).order_by(Movement.occurred_at, Movement.id)
+    if product_id:
+        stmt = stmt.where(Movement.product_id == product_id)
+    if batch_id:
+        stmt = stmt.where(Movement.batch_id == batch_id)
+    if start_date:
+        stmt = stmt.where(Movement.occurred_at >= start_date)
+    if end_date:
+        stmt = stmt.where(Movement.occurred_at <= end_date)
+
+    return StreamingResponse(
+        stream_query(stmt, format),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="movements.{format}"'},
+    )
+
+
 @router.get("/{movement_id}", response_model=MovementRead)
-async def get_movement(movement_id: UUID, session: AsyncSession = Depends(get_session)) -> MovementRead:
+async def get_movement(movement_id: UUID, session: AsyncSession = Depends(get_read_session)) -> MovementRead:
     """Get a single movement by ID."""
     result = await session.execute(select(Movement).where(Movement.id == movement_id))
     movement = result.scalar_one_or_none()
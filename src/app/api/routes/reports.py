@@ -1,12 +1,14 @@
 from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
 from decimal import Decimal
 from datetime import datetime
 
-from src.app.db.session import get_session
+from src.app.db.session import get_read_session
 from src.app.services import reports_service
-from src.app.schemas.report import ReportSummary, ReportHistoryItem, ReportForecast
+from src.app.services.streaming_export import stream_query, EXPORT_FORMATS
+from src.app.schemas.report import ReportSummary, ReportHistoryItem, ReportForecast, ReportForecastItem
 
 router = APIRouter(prefix="/reports", tags=["reports"])
 
@@ -16,7 +18,7 @@ async def stock_summary(
     product_id: UUID | None = Query(None),
     batch_id: UUID | None = Query(None),
     location_id: UUID | None = Query(None),
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
 ):
     return await reports_service.get_stock_summary(session, product_id, batch_id, location_id)
 
@@ -24,21 +26,43 @@ async def stock_summary(
 @router.get("/stock_history", response_model=list[ReportHistoryItem])
 async def stock_history(
     product_id: UUID = Query(...),
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     batch_id: UUID | None = Query(None),
     location_id: UUID | None = Query(None),
     start_date: datetime | None = Query(None),
     end_date: datetime | None = Query(None),
+    bucket: str | None = Query(None, regex="^(hour|day|week)$"),
 ):
-    history = await reports_service.get_stock_history(session, product_id, batch_id, location_id, start_date, end_date)
+    history = await reports_service.get_stock_history(
+        session, product_id, batch_id, location_id, start_date, end_date, bucket
+    )
     # convert dict entries to schema objects
     return [ReportHistoryItem(date=h["date"], balance=h["balance"]) for h in history]
 
 
+@router.get("/stock_history/export")
+async def stock_history_export(
+    product_id: UUID = Query(...),
+    batch_id: UUID | None = Query(None),
+    location_id: UUID | None = Query(None),
+    start_date: datetime | None = Query(None),
+    end_date: datetime | None = Query(None),
+    bucket: str | None = Query(None, regex="^(hour|day|week)$"),
+    format: str = Query("ndjson", regex="^(ndjson|csv)$"),
+):
+    """Stream the full stock history as NDJSON or CSV without materializing it."""
+    stmt = reports_service.build_stock_history_query(product_id, batch_id, location_id, start_date, end_date, bucket)
+    return StreamingResponse(
+        stream_query(stmt, format),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="stock_history.{format}"'},
+    )
+
+
 @router.get("/stock_forecast", response_model=ReportForecast)
 async def stock_forecast(
     product_id: UUID = Query(...),
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     batch_id: UUID | None = Query(None),
     location_id: UUID | None = Query(None),
     lookback_days: int = Query(30, ge=7, le=365),
@@ -60,3 +84,17 @@ async def stock_forecast(
         coverage_days=forecast["coverage_days"],
         depletion_date=forecast["depletion_date"],
     )
+
+
+@router.get("/stock_forecast/bulk", response_model=list[ReportForecastItem])
+async def stock_forecast_bulk(
+    session: AsyncSession = Depends(get_read_session),
+    product_ids: list[UUID] | None = Query(None),
+    category_id: UUID | None = Query(None),
+    location_id: UUID | None = Query(None),
+    lookback_days: int = Query(30, ge=7, le=365),
+):
+    """Forecast coverage for the whole catalog (or a filtered set) with a single set-based query."""
+    return await reports_service.get_stock_forecast_bulk(
+        session, product_ids, category_id, location_id, lookback_days
+    )
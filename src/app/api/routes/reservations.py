@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import update
+from sqlalchemy import case, update
 from uuid import UUID
 from datetime import datetime, timezone
 
@@ -14,6 +14,8 @@ from src.app.services.reservation_lifecycle import (
     fulfill_reservation,
     expire_reservations,
     fulfill_reservation_with_movement,
+    register_reservation,
+    release_reserved_stock,
 )
 from src.app.services.audit_logger import log_audit  # opcional
 
@@ -38,6 +40,7 @@ async def create_reservation(
 
     reservation = Reservation(**payload.dict())
     session.add(reservation)
+    await register_reservation(session, reservation)
     await session.commit()
     await session.refresh(reservation)
     return reservation
@@ -62,15 +65,25 @@ async def get_reservation(reservation_id: UUID, session: AsyncSession = Depends(
 
 @router.delete("/{reservation_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_reservation(reservation_id: UUID, session: AsyncSession = Depends(get_session)):
-    """Soft delete (cancel) a reservation by setting deleted_at."""
+    """Soft delete (cancel) a reservation by setting deleted_at; an active one also becomes cancelled."""
+    # Una reserva activa pasa a 'cancelled' para que expire/release/fulfill no vuelvan a descontarla
+    # de stock_balance.reserved; las ya cerradas conservan su estado
     stmt = (
         update(Reservation)
         .where(Reservation.id == reservation_id, Reservation.deleted_at.is_(None))
-        .values(deleted_at=datetime.now(timezone.utc), updated_at=datetime.now(timezone.utc))
+        .values(
+            status=case((Reservation.status == "active", "cancelled"), else_=Reservation.status),
+            deleted_at=datetime.now(timezone.utc),
+            updated_at=datetime.now(timezone.utc),
+        )
+        .returning(Reservation.status, Reservation.product_id, Reservation.batch_id, Reservation.location_id, Reservation.quantity)
     )
-    result = await session.execute(stmt)
-    if result.rowcount == 0:
+    row = (await session.execute(stmt)).one_or_none()
+    if row is None:
         raise HTTPException(status_code=404, detail="Reservation not found or already deleted")
+    # RETURNING devuelve el estado nuevo: 'cancelled' solo lo asigna este UPDATE a reservas activas
+    if row.status == "cancelled":
+        await release_reserved_stock(session, [(row.product_id, row.batch_id, row.location_id, row.quantity)])
 
     # Opcional: registrar en AuditLog
     await log_audit(
@@ -8,6 +8,7 @@ from src.app.db.session import get_session
 from src.app.models.unit import Unit
 from src.app.schemas.unit import UnitCreate, UnitRead
 from src.app.services.audit_logger import log_audit  # opcional
+from src.app.services.catalog_cache import catalog_cache
 
 router = APIRouter(prefix="/units", tags=["units"])
 
@@ -30,14 +31,15 @@ async def create_unit(
     )
     session.add(unit)
     await session.commit()
+    catalog_cache.invalidate(Unit)
     await session.refresh(unit)
     return unit
 
 
 @router.get("/", response_model=list[UnitRead])
 async def list_units(session: AsyncSession = Depends(get_session)):
-    result = await session.execute(select(Unit))
-    return result.scalars().all()
+    # Servido desde catalog_cache; las escrituras de este router la invalidan
+    return await catalog_cache.all(session, Unit)
 
 
 @router.get("/{unit_id}", response_model=UnitRead)
@@ -67,6 +69,7 @@ async def update_unit(
     unit.updated_at = datetime.now(timezone.utc)
 
     await session.commit()
+    catalog_cache.invalidate(Unit)
     await session.refresh(unit)
     return unit
 
@@ -94,4 +97,5 @@ async def delete_unit(unit_id: UUID, session: AsyncSession = Depends(get_session
     )
 
     await session.commit()
+    catalog_cache.invalidate(Unit)
     return
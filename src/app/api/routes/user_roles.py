@@ -6,6 +6,8 @@ from uuid import UUID
 from src.app.db.session import get_session
 from src.app.models.user_role import UserRole
 from src.app.schemas.user_role import UserRoleCreate, UserRoleRead
+from src.app.services.auth import bump_roles_version
+from src.app.services.auth_cache import auth_cache
 
 router = APIRouter(prefix="/user_roles", tags=["user_roles"])
 
@@ -21,7 +23,9 @@ async def assign_role(payload: UserRoleCreate, session: AsyncSession = Depends(g
 
     user_role = UserRole(**payload.dict())
     session.add(user_role)
+    await bump_roles_version(session, payload.user_id)
     await session.commit()
+    auth_cache.invalidate_user(payload.user_id)
     await session.refresh(user_role)
     return user_role
 
@@ -42,5 +46,7 @@ async def unassign_role(payload: UserRoleCreate, session: AsyncSession = Depends
         raise HTTPException(status_code=404, detail="UserRole not found")
 
     await session.delete(user_role)
+    await bump_roles_version(session, payload.user_id)
     await session.commit()
+    auth_cache.invalidate_user(payload.user_id)
     return
@@ -4,12 +4,14 @@ from sqlalchemy.future import select
 from sqlalchemy import update
 from uuid import UUID
 from datetime import datetime, timezone
-from passlib.hash import bcrypt
 
 from src.app.db.session import get_session
 from src.app.models.user import User
 from src.app.schemas.user import UserCreate, UserRead, UserUpdate
 from src.app.services.audit_logger import log_audit  # opcional
+from src.app.services.auth import bump_roles_version
+from src.app.services.auth_cache import auth_cache
+from src.app.services.password_hasher import password_hasher
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -25,7 +27,7 @@ async def create_user(payload: UserCreate, session: AsyncSession = Depends(get_s
     user = User(
         username=payload.username,
         email=payload.email,
-        password_hash=bcrypt.hash(payload.password),
+        password_hash=await password_hasher.hash(payload.password),
     )
     session.add(user)
     await session.commit()
@@ -60,12 +62,14 @@ async def update_user(user_id: UUID, payload: UserUpdate, session: AsyncSession
     if payload.email:
         user.email = payload.email
     if payload.password:
-        user.password_hash = bcrypt.hash(payload.password)
+        user.password_hash = await password_hasher.hash(payload.password)
     if payload.active is not None:
         user.active = payload.active
 
     user.updated_at = datetime.now(timezone.utc)
+    await bump_roles_version(session, user_id)
     await session.commit()
+    auth_cache.invalidate_user(user_id)
     await session.refresh(user)
     return user
 
@@ -91,5 +95,7 @@ async def delete_user(user_id: UUID, session: AsyncSession = Depends(get_session
         user_id=None,
     )
 
+    await bump_roles_version(session, user_id)
     await session.commit()
+    auth_cache.invalidate_user(user_id)
     return
@@ -1,7 +1,7 @@
 # src/app/core/security.py
 
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, Optional
 
 from jose import jwt
 from passlib.context import CryptContext
@@ -11,8 +11,18 @@ from src.app.core.settings import settings
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
-def create_access_token(subject: str, claims: Optional[Dict[str, Any]] = None) -> str:
-    """Create a JWT access token."""
+def create_access_token(
+    subject: str,
+    claims: Optional[Dict[str, Any]] = None,
+    user_id: Optional[Any] = None,
+    roles: Optional[Iterable[str]] = None,
+    roles_version: Optional[int] = None,
+) -> str:
+    """
+    Create a JWT access token.
+    When user_id, roles and roles_version are given they are signed as `uid`, `roles` and `rv`
+    so role checks can be answered from the token itself.
+    """
     now = datetime.now(timezone.utc)
     expire = now + timedelta(minutes=settings.jwt_access_token_exp_minutes)
     payload: Dict[str, Any] = {
@@ -20,6 +30,12 @@ def create_access_token(subject: str, claims: Optional[Dict[str, Any]] = None) -
         "iat": int(now.timestamp()),
         "exp": int(expire.timestamp()),
     }
+    if user_id is not None:
+        payload["uid"] = str(user_id)
+    if roles is not None:
+        payload["roles"] = sorted(roles)
+    if roles_version is not None:
+        payload["rv"] = roles_version
     if claims:
         payload.update(claims)
     return jwt.encode(payload, settings.jwt_secret, algorithm=settings.jwt_algorithm)
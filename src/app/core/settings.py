@@ -1,6 +1,7 @@
 # src/app/core/settings.py
 from pydantic import BaseSettings, AnyHttpUrl, Field, EmailStr
-from typing import Optional
+from typing import List, Optional
+from uuid import UUID
 
 
 class Settings(BaseSettings):
@@ -14,6 +15,31 @@ class Settings(BaseSettings):
     alerts_min_stock: int = Field(default=10, description="Default minimum stock threshold")
     alerts_min_coverage_days: int = Field(default=7, description="Default minimum coverage days")
     alerts_lookback_days: int = Field(default=30, description="Default lookback period for forecast (days)")
+    alerts_category_ids: List[UUID] = Field(
+        default_factory=list, description="Categories evaluated by the scheduled alert job (empty = whole catalog)"
+    )
+    alerts_notify_batch_size: int = Field(default=50, description="Alerts per Slack message")
+
+    # --- Cache config ---
+    catalog_cache_ttl_seconds: int = Field(default=300, description="TTL for cached catalog tables (seconds)")
+
+    # --- Movements config ---
+    movements_bulk_chunk_size: int = Field(default=1000, description="Movements applied per transaction in bulk ingestion")
+    movements_bulk_max_items: int = Field(default=50000, description="Maximum movements accepted per bulk request")
+    movements_group_commit: bool = Field(default=False, description="Route POST /movements through the group-commit writer")
+    movements_queue_max_size: int = Field(default=10000, description="Pending movements allowed in the writer queue")
+    movements_group_max_batch: int = Field(default=500, description="Maximum movements applied per group commit")
+    movements_group_max_wait_ms: int = Field(default=5, description="Maximum wait to fill a group commit (ms)")
+    audit_async_writer: bool = Field(
+        default=False, description="Write non-critical audit events from a background writer"
+    )
+    audit_queue_max_size: int = Field(default=10000, description="Audit rows queued for the background writer")
+    audit_batch_max_size: int = Field(default=1000, description="Maximum audit rows per background insert")
+    audit_batch_max_wait_ms: int = Field(default=50, description="Maximum wait to fill an audit batch (ms)")
+    audit_write_max_attempts: int = Field(default=3, description="Attempts for a background audit insert")
+    audit_write_retry_base_ms: int = Field(default=100, description="Base backoff between audit insert attempts (ms)")
+    transfers_max_attempts: int = Field(default=5, description="Attempts for a transfer hitting deadlocks")
+    transfers_retry_base_ms: int = Field(default=20, description="Base backoff between transfer attempts (ms)")
 
     # --- Database config ---
     db_user: str = "postgres"
@@ -21,6 +47,15 @@ class Settings(BaseSettings):
     db_host: str = "localhost"
     db_port: int = 5432
     db_name: str = "inventario_db"
+    db_pool_size: int = Field(default=10, description="Connections kept open in the pool")
+    db_max_overflow: int = Field(default=20, description="Extra connections allowed above pool size under bursts")
+    db_pool_timeout: float = Field(default=10.0, description="Seconds to wait for a free connection before failing")
+    db_pool_recycle: int = Field(default=1800, description="Recycle connections older than this (seconds, -1 = never)")
+    db_pool_pre_ping: bool = Field(default=True, description="Check connections are alive on checkout")
+    db_statement_timeout_ms: int = Field(default=0, description="Server-side statement_timeout (ms, 0 = disabled)")
+    replica_max_lag_seconds: float = Field(default=5.0, description="Read replica lag above which reads fall back to the primary")
+    replica_lag_check_interval_seconds: float = Field(default=2.0, description="How often the replica lag is re-checked (seconds)")
+    replica_lag_check_timeout_seconds: float = Field(default=1.0, description="Timeout for the replica lag probe, connect included (seconds)")
 
     @property
     def database_url(self) -> str:
@@ -34,6 +69,18 @@ class Settings(BaseSettings):
     jwt_secret: str = Field(default="change-me", description="JWT signing secret")
     jwt_algorithm: str = Field(default="HS256", description="JWT algorithm")
     jwt_access_token_exp_minutes: int = Field(default=30, description="Access token expiry in minutes")
+    auth_cache_max_entries: int = Field(default=10000, description="Verified tokens kept in the auth cache")
+    auth_cache_ttl_seconds: int = Field(default=60, description="Auth cache entry lifetime (seconds)")
+    password_hash_workers: int = Field(default=4, description="Threads dedicated to bcrypt hash/verify")
+    password_hash_max_pending: int = Field(
+        default=256, description="Hash/verify calls allowed to wait before rejecting with 503"
+    )
+    password_hash_retry_after_seconds: int = Field(
+        default=1, description="Retry-After sent with the 503 when the bcrypt pool is saturated (seconds)"
+    )
+    auth_roles_version_ttl_seconds: int = Field(
+        default=10, description="How long a user's roles_version is trusted before re-reading it (seconds)"
+    )
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,196 @@
+# src/app/db/partitions.py
+# Gestión de particiones mensuales por rango (PARTITION BY RANGE sobre una columna de fecha).
+# Las particiones se nombran <tabla>_pYYYYMM y cubren [primer día del mes, primer día del mes siguiente).
+# Una partición DEFAULT (<tabla>_default) recoge lo que llegue si el mantenimiento se retrasa;
+# ensure_monthly_partitions mueve esas filas a su partición mensual al crearla.
+
+import re
+from datetime import date, datetime, timezone
+from typing import List, Optional, Tuple
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession
+
+_PARTITION_SUFFIX = re.compile(r"_p(\d{4})(\d{2})$")
+_RANGE_KEY = re.compile(r"^RANGE \((\w+)\)$")
+
+# Tablas particionadas por mes y cuántos meses futuros se mantienen creados
+# (scripts/scheduler.py a diario y src/main.py al arrancar)
+PARTITIONED_TABLES = ("movement", "audit_log")
+PARTITION_MONTHS_AHEAD = 3
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month.year:04d}{month.month:02d}"
+
+
+def partition_month(table: str, name: str) -> Optional[date]:
+    """Month covered by a partition named by partition_name, or None for other names."""
+    if not name.startswith(f"{table}_p"):
+        return None
+    match = _PARTITION_SUFFIX.search(name)
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def create_partition_sql(table: str, month: date) -> str:
+    start = month_start(month)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table, start)} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{add_months(start, 1).isoformat()}')"
+    )
+
+
+async def list_partitions(session: AsyncSession, table: str) -> List[Tuple[str, date]]:
+    """Monthly partitions attached to `table`, oldest first."""
+    result = await session.execute(
+        sa.text(
+            """
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            JOIN pg_class p ON p.oid = i.inhparent
+            WHERE p.relname = :table
+            """
+        ),
+        {"table": table},
+    )
+    partitions = []
+    for (name,) in result.all():
+        month = partition_month(table, name)
+        if month is not None:
+            partitions.append((name, month))
+    return sorted(partitions, key=lambda p: p[1])
+
+
+async def list_detached_partitions(session: AsyncSession, table: str) -> List[Tuple[str, date]]:
+    """Tables named like monthly partitions of `table` that are not attached (e.g. left by an interrupted retire)."""
+    result = await session.execute(
+        sa.text(
+            """
+            SELECT c.relname
+            FROM pg_class c
+            WHERE c.relkind = 'r'
+              AND c.relname LIKE :pattern
+              AND NOT c.relispartition
+              AND c.relnamespace = to_regnamespace(current_schema())
+            """
+        ),
+        {"pattern": f"{table}\\_p%"},
+    )
+    partitions = []
+    for (name,) in result.all():
+        month = partition_month(table, name)
+        if month is not None:
+            partitions.append((name, month))
+    return sorted(partitions, key=lambda p: p[1])
+
+
+async def default_partition(session: AsyncSession, table: str) -> Optional[str]:
+    """Name of the DEFAULT partition of `table`, or None if it has none."""
+    result = await session.execute(
+        sa.text(
+            """
+            SELECT d.relname
+            FROM pg_partitioned_table pt
+            JOIN pg_class p ON p.oid = pt.partrelid
+            JOIN pg_class d ON d.oid = pt.partdefid
+            WHERE p.relname = :table
+              AND p.relnamespace = to_regnamespace(current_schema())
+            """
+        ),
+        {"table": table},
+    )
+    return result.scalar_one_or_none()
+
+
+async def _range_column(session: AsyncSession, table: str) -> str:
+    key = await session.execute(sa.text("SELECT pg_get_partkeydef(CAST(:table AS regclass))"), {"table": table})
+    return _RANGE_KEY.match(key.scalar_one()).group(1)
+
+
+async def _move_out_of_default(session: AsyncSession, table: str, column: str, default: str, month: date) -> None:
+    # Con DEFAULT, CREATE ... PARTITION OF falla si la DEFAULT ya tiene filas de ese mes:
+    # se crea la tabla suelta, se le mueven esas filas y se adjunta
+    start, end = month_start(month), add_months(month_start(month), 1)
+    name = partition_name(table, start)
+    await session.execute(sa.text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    await session.execute(
+        sa.text(
+            f"WITH moved AS (DELETE FROM {default} WHERE {column} >= CAST(:start AS date) "
+            f"AND {column} < CAST(:end AS date) RETURNING *) INSERT INTO {name} SELECT * FROM moved"
+        ),
+        {"start": start, "end": end},
+    )
+    await session.execute(
+        sa.text(
+            f"ALTER TABLE {table} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+    )
+
+
+async def ensure_monthly_partitions(
+    session: AsyncSession, table: str, months_ahead: int, start: Optional[date] = None, dry_run: bool = False
+) -> List[str]:
+    """
+    Create the partitions from `start` (default: current month) through `months_ahead` months later,
+    plus one for every month that has rows sitting in the DEFAULT partition (those rows are moved into it).
+    Existing partitions are left untouched; returns the names that were missing.
+    """
+    first = month_start(start or datetime.now(timezone.utc).date())
+    existing = {name for name, _ in await list_partitions(session, table)}
+    months = {add_months(first, offset) for offset in range(months_ahead + 1)}
+
+    default = await default_partition(session, table)
+    if default:
+        column = await _range_column(session, table)
+        stranded = await session.execute(
+            sa.text(f"SELECT DISTINCT CAST(date_trunc('month', {column}) AS date) FROM {default}")
+        )
+        months.update(stranded.scalars())
+
+    created = []
+    for month in sorted(months):
+        name = partition_name(table, month)
+        if name in existing:
+            continue
+        if not dry_run:
+            if default:
+                await _move_out_of_default(session, table, column, default, month)
+            else:
+                await session.execute(sa.text(create_partition_sql(table, month)))
+        created.append(name)
+    return created
+
+
+async def drop_expired_partitions(
+    session: AsyncSession, table: str, cutoff: datetime, detach_only: bool = False, dry_run: bool = False
+) -> List[str]:
+    """
+    Drop (or only detach) partitions whose whole month ends on or before `cutoff`.
+    Retention is a catalog operation: no rows are scanned or deleted one by one.
+    Detached partitions remain as standalone tables for archiving.
+    """
+    expired = [
+        name
+        for name, month in await list_partitions(session, table)
+        if add_months(month, 1) <= cutoff.date()
+    ]
+    if dry_run:
+        return expired
+    for name in expired:
+        await session.execute(sa.text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+        if not detach_only:
+            await session.execute(sa.text(f"DROP TABLE {name}"))
+    return expired
@@ -2,6 +2,7 @@
 from .role import Role
 from .user_role import UserRole
 from .movement import Movement, MovementType, MovementReason
+from .movement_opening_balance import MovementOpeningBalance
 from .reservation import Reservation
 from .event import Event
 from .cost_center import CostCenter
@@ -15,3 +16,5 @@ from .party import Party
 from .warehouse import Warehouse
 from .location import Location
 from .inventory import Inventory
+from .stock_balance import StockBalance
+from .alert_threshold import AlertThreshold
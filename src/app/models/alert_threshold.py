@@ -0,0 +1,32 @@
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import UUID
+import sqlalchemy as sa
+import uuid
+from decimal import Decimal
+from .base import Base, UUIDPrimaryKeyMixin, TimestampMixin
+
+
+class AlertThreshold(Base, UUIDPrimaryKeyMixin, TimestampMixin):
+    """Alert thresholds for a product or a whole category (product overrides category)."""
+    __tablename__ = "alert_threshold"
+
+    product_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), sa.ForeignKey("product.id"))
+    category_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), sa.ForeignKey("category.id"))
+    min_stock: Mapped[Decimal | None] = mapped_column(sa.Numeric, nullable=True)
+    min_coverage_days: Mapped[int | None] = mapped_column(sa.Integer, nullable=True)
+
+    # Un umbral vigente por producto o categoría; los borrados (soft delete) no bloquean recrearlo
+    __table_args__ = (
+        sa.Index(
+            "uq_alert_threshold_product", "product_id",
+            unique=True, postgresql_where=sa.text("deleted_at IS NULL"),
+        ),
+        sa.Index(
+            "uq_alert_threshold_category", "category_id",
+            unique=True, postgresql_where=sa.text("deleted_at IS NULL"),
+        ),
+        sa.CheckConstraint(
+            "(product_id IS NULL) <> (category_id IS NULL)",
+            name="ck_alert_threshold_target",
+        ),
+    )
@@ -8,6 +8,21 @@ from .base import Base, UUIDPrimaryKeyMixin
 
 class AuditLog(Base, UUIDPrimaryKeyMixin):
     __tablename__ = 'audit_log'
+    # Particionada por mes sobre occurred_at (ver src/app/db/partitions.py); por eso forma parte de la PK
+    __table_args__ = (
+        sa.Index('idx_audit_log_entity_occurred', 'entity_name', 'entity_id', 'occurred_at'),
+        sa.Index('idx_audit_log_occurred_id', 'occurred_at', 'id'),
+        sa.Index('idx_audit_log_action_occurred', 'action', 'occurred_at', 'id'),
+        sa.Index(
+            'idx_audit_log_user_occurred', 'performed_by_user_id', 'occurred_at', 'id',
+            postgresql_where=sa.text('performed_by_user_id IS NOT NULL'),
+        ),
+        sa.Index(
+            'idx_audit_log_changes', 'changes',
+            postgresql_using='gin', postgresql_ops={'changes': 'jsonb_path_ops'},
+        ),
+        {'postgresql_partition_by': 'RANGE (occurred_at)'},
+    )
 
     entity_name: Mapped[str] = mapped_column(sa.Text, nullable=False)
     entity_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
@@ -15,4 +30,6 @@ class AuditLog(Base, UUIDPrimaryKeyMixin):
     changes: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
     performed_by_user_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
     reason: Mapped[str | None] = mapped_column(sa.Text, nullable=True)
-    occurred_at: Mapped[datetime] = mapped_column(sa.TIMESTAMP(timezone=True), server_default=sa.func.now())
+    occurred_at: Mapped[datetime] = mapped_column(
+        sa.TIMESTAMP(timezone=True), primary_key=True, server_default=sa.func.now()
+    )
@@ -24,8 +24,14 @@ class MovementReason(Base, UUIDPrimaryKeyMixin):
 
 class Movement(Base, UUIDPrimaryKeyMixin, TimestampMixin):
     __tablename__ = "movement"
-
-    code: Mapped[str] = mapped_column(sa.Text, unique=True, nullable=False)
+    # Particionada por mes sobre occurred_at (ver src/app/db/partitions.py); por eso forma parte de la PK.
+    # code no puede ser UNIQUE aquí: la unicidad la mantiene movement_code_registry (trigger en la BD)
+    __table_args__ = (
+        sa.Index("idx_movement_code", "code"),
+        {"postgresql_partition_by": "RANGE (occurred_at)"},
+    )
+
+    code: Mapped[str] = mapped_column(sa.Text, nullable=False)
     movement_type_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), sa.ForeignKey("movement_type.id"))
     product_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), sa.ForeignKey("product.id"))
     batch_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), sa.ForeignKey("batch.id"))
@@ -35,7 +41,9 @@ class Movement(Base, UUIDPrimaryKeyMixin, TimestampMixin):
     requested_by_user_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), sa.ForeignKey("user_account.id"))
     executed_by_user_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), sa.ForeignKey("user_account.id"))
     quantity: Mapped[float] = mapped_column(sa.Numeric, nullable=False)
-    occurred_at: Mapped[datetime] = mapped_column(sa.TIMESTAMP(timezone=True), server_default=sa.func.now())
+    occurred_at: Mapped[datetime] = mapped_column(
+        sa.TIMESTAMP(timezone=True), primary_key=True, server_default=sa.func.now()
+    )
 
     movement_type = relationship("MovementType")
     reason = relationship("MovementReason")
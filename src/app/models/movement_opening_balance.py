@@ -0,0 +1,25 @@
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import UUID
+import sqlalchemy as sa
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from .base import Base
+
+
+class MovementOpeningBalance(Base):
+    """
+    Net stock delta per (product, batch, location) of the movements already retired with their
+    monthly partition (everything before retired_until). Stock history starts its running
+    balance from here, since those movements are no longer in the movement table.
+    """
+    __tablename__ = "movement_opening_balance"
+
+    product_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), sa.ForeignKey("product.id"), primary_key=True)
+    batch_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), sa.ForeignKey("batch.id"), primary_key=True)
+    location_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), sa.ForeignKey("location.id"), primary_key=True)
+    quantity: Mapped[Decimal] = mapped_column(sa.Numeric, nullable=False, server_default="0")
+    retired_until: Mapped[datetime] = mapped_column(sa.TIMESTAMP(timezone=True), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        sa.TIMESTAMP(timezone=True), server_default=sa.func.now(), nullable=False
+    )
@@ -17,4 +17,4 @@ class Reservation(Base, UUIDPrimaryKeyMixin, TimestampMixin):
     quantity: Mapped[float] = mapped_column(sa.Numeric, nullable=False)
     reserved_from: Mapped[datetime] = mapped_column(sa.TIMESTAMP(timezone=True), server_default=sa.func.now())
     reserved_until: Mapped[datetime | None]
-    status: Mapped[str] = mapped_column(sa.Text, default="active")  # active|released|fulfilled|expired
+    status: Mapped[str] = mapped_column(sa.Text, default="active")  # active|released|fulfilled|expired|cancelled
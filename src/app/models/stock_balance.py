@@ -0,0 +1,29 @@
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import UUID
+import sqlalchemy as sa
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from .base import Base
+
+
+class StockBalance(Base):
+    """
+    Incrementally maintained stock projection per (product, batch, location).
+    Updated in the same transaction as inventory movements and reservation changes.
+    """
+    __tablename__ = "stock_balance"
+
+    product_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), sa.ForeignKey("product.id"), primary_key=True)
+    batch_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), sa.ForeignKey("batch.id"), primary_key=True)
+    location_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), sa.ForeignKey("location.id"), primary_key=True)
+    physical: Mapped[Decimal] = mapped_column(sa.Numeric, nullable=False, server_default="0")
+    reserved: Mapped[Decimal] = mapped_column(sa.Numeric, nullable=False, server_default="0")
+    consumed: Mapped[Decimal] = mapped_column(sa.Numeric, nullable=False, server_default="0")
+    updated_at: Mapped[datetime] = mapped_column(
+        sa.TIMESTAMP(timezone=True), server_default=sa.func.now(), nullable=False
+    )
+
+    __table_args__ = (
+        sa.Index("idx_stock_balance_location", "location_id"),
+    )
@@ -20,6 +20,8 @@ class User(Base):
     email: Mapped[str] = mapped_column(sa.Text, nullable=False, unique=True)
     password_hash: Mapped[str] = mapped_column(sa.Text, nullable=False)
     active: Mapped[bool] = mapped_column(sa.Boolean, nullable=False, server_default=sa.text("true"))
+    # Se incrementa al cambiar roles o estado; invalida los roles firmados en tokens previos
+    roles_version: Mapped[int] = mapped_column(sa.Integer, nullable=False, server_default=sa.text("0"))
     created_at: Mapped[datetime] = mapped_column(
         sa.TIMESTAMP(timezone=True), nullable=False, server_default=sa.text("now()")
     )
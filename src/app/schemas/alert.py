@@ -1,8 +1,9 @@
 # src/app/schemas/alert.py
 
-from pydantic import BaseModel
+from pydantic import BaseModel, root_validator
 from uuid import UUID
 from datetime import datetime
+from decimal import Decimal
 
 class AlertRead(BaseModel):
     type: str
@@ -16,3 +17,32 @@ class AlertRead(BaseModel):
     class Config:
         orm_mode = True
 
+
+class AlertThresholdBase(BaseModel):
+    min_stock: Decimal | None = None
+    min_coverage_days: int | None = None
+
+class AlertThresholdCreate(AlertThresholdBase):
+    # Exactamente uno de los dos (ck_alert_threshold_target)
+    product_id: UUID | None = None
+    category_id: UUID | None = None
+
+    @root_validator
+    def one_target(cls, values):
+        if (values.get("product_id") is None) == (values.get("category_id") is None):
+            raise ValueError("Set exactly one of product_id or category_id")
+        return values
+
+class AlertThresholdUpdate(AlertThresholdBase):
+    pass
+
+class AlertThresholdRead(AlertThresholdBase):
+    id: UUID
+    product_id: UUID | None
+    category_id: UUID | None
+    created_at: datetime
+    updated_at: datetime | None
+    deleted_at: datetime | None
+
+    class Config:
+        orm_mode = True
@@ -28,3 +28,19 @@ class MovementRead(MovementBase):
 
     class Config:
         orm_mode = True
+
+class MovementBulkCreate(BaseModel):
+    movements: list[MovementCreate]
+
+class MovementBulkItem(BaseModel):
+    index: int
+    code: str
+    status: str  # created | failed
+    movement_id: UUID | None = None
+    error: str | None = None
+
+class MovementBulkResult(BaseModel):
+    total: int
+    created: int
+    failed: int
+    items: list[MovementBulkItem]
@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 from uuid import UUID
 from datetime import datetime
+from decimal import Decimal
 
 class ReportSummary(BaseModel):
     physical: str
@@ -10,10 +11,13 @@ class ReportSummary(BaseModel):
 
 class ReportHistoryItem(BaseModel):
     date: datetime
-    balance: float
+    balance: Decimal
 
 class ReportForecast(BaseModel):
     stock: str
     avg_daily_consumption: str
     coverage_days: float | None
     depletion_date: datetime | None
+
+class ReportForecastItem(ReportForecast):
+    product_id: UUID
@@ -2,10 +2,18 @@
 from . import alerts
 from . import audit_logger
 from . import auth
+from . import auth_cache
+from . import catalog_cache
 from . import inventory_updater
+from . import movement_ingestion
+from . import movement_writer
+from . import password_hasher
 from . import reports_service
 from . import reservation_lifecycle
 from . import reservation_validator
+from . import stock_balance
+from . import streaming_export
+from . import transfer_service
 
 from . import notifications
 
@@ -13,9 +21,17 @@ __all__ = [
     "alerts",
     "audit_logger",
     "auth",
+    "auth_cache",
+    "catalog_cache",
     "inventory_updater",
+    "movement_ingestion",
+    "movement_writer",
+    "password_hasher",
     "reports_service",
     "reservation_lifecycle",
     "reservation_validator",
+    "stock_balance",
+    "streaming_export",
+    "transfer_service",
     "notifications",
 ]
@@ -1,5 +1,6 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, or_
+from sqlalchemy.orm import aliased
 from uuid import UUID
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal
@@ -7,6 +8,9 @@ from decimal import Decimal
 from src.app.models.inventory import Inventory
 from src.app.models.reservation import Reservation
 from src.app.models.movement import Movement
+from src.app.models.product import Product
+from src.app.models.alert_threshold import AlertThreshold
+from src.app.services.reports_service import build_portfolio_forecast_query
 
 
 async def check_alerts(
@@ -60,3 +64,56 @@ async def check_alerts(
             )
 
     return alerts
+
+
+async def evaluate_catalog_alerts(
+    session: AsyncSession,
+    category_ids: list[UUID] | None = None,
+    product_ids: list[UUID] | None = None,
+    min_stock: Decimal = Decimal(10),
+    min_coverage_days: int = 7,
+    lookback_days: int = 30,
+) -> list[dict]:
+    """
+    Evaluate low_stock and low_coverage for every product (or the given categories/products) in one query.
+    Thresholds come from alert_threshold: a product row overrides its category row, which overrides the
+    defaults passed in. Each alert carries its product_id.
+    """
+    forecast = build_portfolio_forecast_query(product_ids, category_ids, None, lookback_days).subquery("forecast")
+    by_product = aliased(AlertThreshold)
+    by_category = aliased(AlertThreshold)
+
+    stock = func.coalesce(forecast.c.stock, 0)
+    coverage = forecast.c.coverage_days
+    stock_limit = func.coalesce(by_product.min_stock, by_category.min_stock, min_stock)
+    coverage_limit = func.coalesce(by_product.min_coverage_days, by_category.min_coverage_days, min_coverage_days)
+
+    stmt = (
+        select(Product.id, Product.sku, stock, coverage, stock_limit, coverage_limit)
+        .select_from(Product)
+        .outerjoin(forecast, forecast.c.product_id == Product.id)
+        .outerjoin(by_product, by_product.product_id == Product.id)
+        .outerjoin(by_category, by_category.category_id == Product.category_id)
+        .where(or_(stock < stock_limit, coverage < coverage_limit))
+        .order_by(Product.sku)
+    )
+    if category_ids:
+        stmt = stmt.where(Product.category_id.in_(category_ids))
+    if product_ids:
+        stmt = stmt.where(Product.id.in_(product_ids))
+
+    alerts = []
+    for product_id, sku, stock_v, coverage_v, stock_min, coverage_min in (await session.execute(stmt)).all():
+        if stock_v < stock_min:
+            alerts.append({
+                "type": "low_stock",
+                "product_id": product_id,
+                "message": f"{sku}: stock {stock_v} below minimum {stock_min}",
+            })
+        if coverage_v is not None and coverage_v < coverage_min:
+            alerts.append({
+                "type": "low_coverage",
+                "product_id": product_id,
+                "message": f"{sku}: coverage {float(coverage_v):.1f} days below minimum {coverage_min}",
+            })
+    return alerts
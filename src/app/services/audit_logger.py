@@ -1,8 +1,41 @@
+# src/app/services/audit_logger.py
+# Registro de auditoría: las entradas se acumulan por transacción y se escriben en un único
+# INSERT multi-fila al hacer commit; opcionalmente los eventos no críticos van, ya confirmados,
+# a un escritor en segundo plano.
+
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set
+from uuid import UUID
+
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.app.core.settings import settings
+from src.app.db.session import engine
 from src.app.models.audit_log import AuditLog
-from uuid import UUID
-from datetime import datetime, timezone
-from typing import Optional, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "audit_pending"
+_DEFERRED_KEY = "audit_deferred"
+_SAVEPOINTS_KEY = "audit_savepoints"
+
+
+def _audit_row(entry: Dict[str, Any], occurred_at: datetime) -> Dict[str, Any]:
+    return {
+        "id": uuid.uuid4(),
+        "entity_name": entry["entity_name"],
+        "entity_id": entry["entity_id"],
+        "action": entry["action"],
+        "changes": entry.get("changes"),
+        "performed_by_user_id": entry.get("performed_by_user_id"),
+        "reason": entry.get("reason"),
+        "occurred_at": occurred_at,
+    }
 
 
 async def log_audit(
@@ -12,19 +45,228 @@ async def log_audit(
     action: str,
     changes: Optional[Dict[str, Any]] = None,
     user_id: Optional[UUID] = None,
+    reason: Optional[str] = None,
+    critical: bool = True,
 ) -> None:
     """
-    Insert an audit log entry into audit_log table.
-    The AuditLog ORM/model should align with DB columns (performed_by_user_id / occurred_at).
+    Record an audit log entry for the current transaction.
+    The row is written together with the other entries of the transaction when it commits.
     """
-    # Use explicit field names matching model
-    entry = AuditLog(
-        entity_type=entity_type,
-        entity_id=entity_id,
-        action=action,
-        changes=changes,
-        user_id=user_id,
-        timestamp=datetime.now(timezone.utc),
+    await log_audit_many(
+        session,
+        [
+            {
+                "entity_name": entity_type,
+                "entity_id": entity_id,
+                "action": action,
+                "changes": changes,
+                "performed_by_user_id": user_id,
+                "reason": reason,
+            }
+        ],
+        critical=critical,
     )
-    session.add(entry)
+
+
+async def log_audit_many(session: AsyncSession, entries: List[Dict[str, Any]], critical: bool = True) -> None:
+    """
+    Record several audit log entries.
+    Each entry uses the audit_log column names (entity_name, entity_id, action, changes,
+    performed_by_user_id, reason); ids and occurred_at are filled in here.
+
+    Entries are kept in session.info and inserted with one multi-row statement right before
+    the transaction commits; entries logged inside a savepoint that rolls back are discarded.
+    Non-critical entries are also kept until the transaction commits and are then handed to
+    audit_writer when it is running (own connection, batched); otherwise they are inserted with
+    the transaction. Either way nothing is written for a transaction that rolls back.
+    """
+    if not entries:
+        return
+    now = datetime.now(timezone.utc)
+    rows = [_audit_row(e, now) for e in entries]
+    key = _DEFERRED_KEY if not critical and audit_writer.running else _PENDING_KEY
+    session.info.setdefault(key, []).extend(rows)
     # Do not commit here; caller controls transaction lifecycle.
+
+
+# ----------------------------------------------------------------------
+# Sink por transacción: escribe las entradas pendientes en el commit.
+# ----------------------------------------------------------------------
+@event.listens_for(Session, "before_commit")
+def _write_pending_audit(session: Session) -> None:
+    # before_commit también se dispara al liberar un savepoint: solo escribe el commit de la raíz
+    if session.in_nested_transaction():
+        return
+    rows = session.info.pop(_PENDING_KEY, None)
+    if rows:
+        session.execute(AuditLog.__table__.insert(), rows)
+
+
+@event.listens_for(Session, "after_commit")
+def _hand_off_deferred_audit(session: Session) -> None:
+    if session.in_nested_transaction():
+        # Savepoint liberado: sus filas pasan a la transacción exterior; solo se descarta su marca
+        session.info.get(_SAVEPOINTS_KEY, {}).pop(session.get_nested_transaction(), None)
+        return
+    rows = session.info.pop(_DEFERRED_KEY, [])
+    # Solo quedan pendientes si se confirmó la raíz directamente con savepoints abiertos
+    # (before_commit de la raíz corre antes que los suyos): ya están confirmadas, escribirlas aparte
+    rows += session.info.pop(_PENDING_KEY, [])
+    if rows:
+        audit_writer.submit(rows)
+
+
+@event.listens_for(Session, "after_transaction_create")
+def _mark_audit_savepoint(session: Session, transaction) -> None:
+    if transaction.nested:
+        marks = session.info.setdefault(_SAVEPOINTS_KEY, {})
+        marks[transaction] = (len(session.info.get(_PENDING_KEY, ())), len(session.info.get(_DEFERRED_KEY, ())))
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_rolled_back_audit(session: Session, previous_transaction) -> None:
+    if not previous_transaction.nested:
+        return
+    mark = session.info.get(_SAVEPOINTS_KEY, {}).pop(previous_transaction, None)
+    if mark is None:
+        return
+    for key, length in zip((_PENDING_KEY, _DEFERRED_KEY), mark):
+        rows = session.info.get(key)
+        if rows:
+            del rows[length:]
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _reset_audit_sink(session: Session, transaction) -> None:
+    if transaction.parent is None:
+        # Rollback o cierre de la transacción raíz: lo pendiente no llegó a confirmarse
+        session.info.pop(_PENDING_KEY, None)
+        session.info.pop(_DEFERRED_KEY, None)
+        session.info.pop(_SAVEPOINTS_KEY, None)
+
+
+class AuditWriter:
+    """
+    Background writer for non-critical audit rows.
+
+    `offer` queues rows without waiting; a worker task gathers up to `max_batch` rows (waiting at
+    most `max_wait_ms`) and inserts them on its own connection. log_audit_many only hands rows
+    over (through `submit`) once the originating transaction has committed.
+
+    Failed inserts are retried with backoff (settings.audit_write_max_attempts); a batch that still
+    fails is inserted row by row, so only rows that cannot be written at all are lost (and logged).
+    """
+
+    def __init__(self, max_queue: int, max_batch: int, max_wait_ms: int):
+        self._max_queue = max_queue
+        self._max_batch = max_batch
+        self._max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._overflow: Set[asyncio.Task] = set()
+        self._stopping = False
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done() and not self._stopping
+
+    def qsize(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stopping = False
+        self._queue = asyncio.Queue(maxsize=self._max_queue)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop accepting rows, write what is already queued and wait for the worker."""
+        if self.running:
+            # running pasa a False antes del marcador: lo que llegue después va por submit/_write
+            self._stopping = True
+            await self._queue.put(None)
+            await self._task
+            self._task = None
+            # Filas que quedaron detrás del marcador
+            rows = []
+            while not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is not None:
+                    rows.append(item)
+            for start in range(0, len(rows), self._max_batch):
+                await self._write(rows[start:start + self._max_batch])
+        while self._overflow:
+            await asyncio.gather(*list(self._overflow))
+
+    def offer(self, rows: List[Dict[str, Any]]) -> bool:
+        """Queue rows for the background insert; False when not running or the queue is full."""
+        if not self.running or self._queue.qsize() + len(rows) > self._max_queue:
+            return False
+        for row in rows:
+            self._queue.put_nowait(row)
+        return True
+
+    def submit(self, rows: List[Dict[str, Any]]) -> None:
+        """
+        Hand over rows of a committed transaction. They can no longer go into that transaction,
+        so when the queue is full (or the writer stopped meanwhile) they are inserted by a separate task.
+        """
+        if self.offer(rows):
+            return
+        task = asyncio.get_running_loop().create_task(self._write(rows))
+        self._overflow.add(task)
+        task.add_done_callback(self._overflow.discard)
+
+    async def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is None:
+                break
+            batch = [first]
+            deadline = asyncio.get_running_loop().time() + self._max_wait
+            while len(batch) < self._max_batch:
+                timeout = deadline - asyncio.get_running_loop().time()
+                try:
+                    item = self._queue.get_nowait() if timeout <= 0 else await asyncio.wait_for(
+                        self._queue.get(), timeout
+                    )
+                except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._write(batch)
+
+    async def _insert(self, rows: List[Dict[str, Any]]) -> None:
+        async with engine.begin() as conn:
+            await conn.execute(AuditLog.__table__.insert(), rows)
+
+    async def _write(self, rows: List[Dict[str, Any]]) -> None:
+        for attempt in range(1, settings.audit_write_max_attempts + 1):
+            try:
+                await self._insert(rows)
+                return
+            except Exception:
+                logger.warning("Audit writer failed to insert %d rows (attempt %d)", len(rows), attempt, exc_info=True)
+                if attempt < settings.audit_write_max_attempts:
+                    await asyncio.sleep(settings.audit_write_retry_base_ms / 1000 * (2 ** (attempt - 1)))
+
+        if len(rows) == 1:
+            logger.error("Audit row lost: %r", rows[0])
+            return
+        # Último recurso: fila a fila, para que una fila inválida no arrastre al resto del lote
+        for row in rows:
+            try:
+                await self._insert([row])
+            except Exception:
+                logger.exception("Audit row lost: %r", row)
+
+
+audit_writer = AuditWriter(
+    max_queue=settings.audit_queue_max_size,
+    max_batch=settings.audit_batch_max_size,
+    max_wait_ms=settings.audit_batch_max_wait_ms,
+)
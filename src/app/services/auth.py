@@ -3,13 +3,14 @@
 
 from typing import Optional, List
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, or_
+from sqlalchemy import select, or_, update
 from jose import jwt, JWTError
 
-from src.app.core.security import verify_password, hash_password, settings
+from src.app.core.security import settings
 from src.app.models.user import User
 from src.app.models.role import Role
 from src.app.models.user_role import UserRole
+from src.app.services.password_hasher import password_hasher
 
 
 async def authenticate_user(session: AsyncSession, username: str, password: str) -> Optional[User]:
@@ -26,7 +27,7 @@ async def authenticate_user(session: AsyncSession, username: str, password: str)
     user: Optional[User] = result.scalar_one_or_none()
     if not user or not user.password_hash:
         return None
-    if not verify_password(password, user.password_hash):
+    if not await password_hasher.verify(password, user.password_hash):
         return None
     return user
 
@@ -42,6 +43,13 @@ async def get_user_roles(session: AsyncSession, user_id) -> List[str]:
     return [r[0] for r in result.all()]
 
 
+async def bump_roles_version(session: AsyncSession, user_id) -> None:
+    """Increment the user's roles_version so tokens signed with older roles are re-checked against the DB."""
+    await session.execute(
+        update(User).where(User.id == user_id).values(roles_version=User.roles_version + 1)
+    )
+
+
 def decode_token(token: str) -> dict:
     """Decode JWT without DB."""
     try:
@@ -71,7 +79,7 @@ async def signup_user(
     user = User(
         username=username,
         email=email,
-        password_hash=hash_password(password),
+        password_hash=await password_hasher.hash(password),
         active=active,
     )
     session.add(user)
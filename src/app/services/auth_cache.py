@@ -0,0 +1,111 @@
+# src/app/services/auth_cache.py
+# Caché LRU/TTL de tokens verificados y de la versión de roles de cada usuario,
+# para autorizar sin consultar la BD en cada petición.
+
+import time
+from collections import OrderedDict
+from typing import Dict, FrozenSet, NamedTuple, Optional, Set
+from uuid import UUID
+
+from src.app.core.settings import settings
+
+
+class AuthPrincipal(NamedTuple):
+    """Authenticated identity resolved from a token."""
+    user_id: UUID
+    username: str
+    active: bool
+    roles: FrozenSet[str]
+    roles_version: int
+    claims: dict
+
+
+class AuthCache:
+    """
+    Bounded LRU cache of token -> AuthPrincipal with a TTL.
+
+    Entries never outlive the token's own `exp` claim. Tokens are indexed by user id so user
+    and role changes can drop every cached token of that user at once.
+
+    Alongside, it keeps the server-side roles_version of each user for `version_ttl_seconds`;
+    that short TTL bounds how long other workers keep trusting roles after a change.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int, version_ttl_seconds: int):
+        self._max_entries = max_entries
+        self._ttl = ttl_seconds
+        self._version_ttl = version_ttl_seconds
+        self._entries: "OrderedDict[str, tuple[float, AuthPrincipal]]" = OrderedDict()
+        self._by_user: Dict[UUID, Set[str]] = {}
+        self._versions: "OrderedDict[UUID, tuple[float, int]]" = OrderedDict()
+
+    def get(self, token: str) -> Optional[AuthPrincipal]:
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        expires_at, principal = entry
+        if time.time() >= expires_at:
+            self._discard(token)
+            return None
+        self._entries.move_to_end(token)
+        return principal
+
+    def set(self, token: str, principal: AuthPrincipal) -> None:
+        expires_at = time.time() + self._ttl
+        token_exp = principal.claims.get("exp")
+        if token_exp is not None:
+            expires_at = min(expires_at, float(token_exp))
+        self._discard(token)
+        self._entries[token] = (expires_at, principal)
+        self._by_user.setdefault(principal.user_id, set()).add(token)
+        while len(self._entries) > self._max_entries:
+            oldest = next(iter(self._entries))
+            self._discard(oldest)
+
+    def get_version(self, user_id: UUID) -> Optional[int]:
+        entry = self._versions.get(user_id)
+        if entry is None:
+            return None
+        expires_at, version = entry
+        if time.time() >= expires_at:
+            del self._versions[user_id]
+            return None
+        self._versions.move_to_end(user_id)
+        return version
+
+    def set_version(self, user_id: UUID, version: int) -> None:
+        self._versions.pop(user_id, None)
+        self._versions[user_id] = (time.time() + self._version_ttl, version)
+        while len(self._versions) > self._max_entries:
+            self._versions.popitem(last=False)
+
+    def invalidate_user(self, user_id: UUID) -> None:
+        """Drop every cached token and the roles_version of a user (after user or role changes)."""
+        for token in list(self._by_user.get(user_id, ())):
+            self._discard(token)
+        self._versions.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._by_user.clear()
+        self._versions.clear()
+
+    def _discard(self, token: str) -> None:
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._by_user.get(entry[1].user_id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._by_user[entry[1].user_id]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+auth_cache = AuthCache(
+    max_entries=settings.auth_cache_max_entries,
+    ttl_seconds=settings.auth_cache_ttl_seconds,
+    version_ttl_seconds=settings.auth_roles_version_ttl_seconds,
+)
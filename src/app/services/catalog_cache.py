@@ -0,0 +1,80 @@
+# src/app/services/catalog_cache.py
+# Caché de catálogos (tipos/razones de movimiento, unidades, categorías) compartida por el proceso.
+
+import asyncio
+import time
+from typing import Dict, List, Optional, Type
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.core.settings import settings
+from src.app.models.category import Category
+from src.app.models.movement import MovementType, MovementReason
+from src.app.models.unit import Unit
+
+# Column used as lookup key for each cached catalog
+CATALOG_KEYS: Dict[Type, str] = {
+    MovementType: "code",
+    MovementReason: "code",
+    Unit: "code",
+    Category: "name",
+}
+
+
+class CatalogCache:
+    """
+    Process-wide, TTL-bound cache of small catalog tables.
+
+    Each catalog is loaded whole with one SELECT and kept as plain dicts of column values keyed by
+    code (or name for categories), so cached entries are never bound to a session. Writers call
+    `invalidate`; other processes pick up changes once the TTL expires.
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self._ttl = ttl_seconds
+        self._entries: Dict[Type, Dict[str, dict]] = {}
+        self._loaded_at: Dict[Type, float] = {}
+        self._locks: Dict[Type, asyncio.Lock] = {}
+
+    def _fresh(self, model: Type) -> bool:
+        loaded_at = self._loaded_at.get(model)
+        return loaded_at is not None and time.monotonic() - loaded_at < self._ttl
+
+    async def _load(self, session: AsyncSession, model: Type) -> Dict[str, dict]:
+        lock = self._locks.setdefault(model, asyncio.Lock())
+        async with lock:
+            if self._fresh(model):
+                return self._entries[model]
+            # ORM select so the global soft-delete filter applies
+            result = await session.execute(select(model))
+            columns = [c.key for c in model.__table__.columns]
+            rows = [{c: getattr(obj, c) for c in columns} for obj in result.scalars().all()]
+            self._entries[model] = {row[CATALOG_KEYS[model]]: row for row in rows}
+            self._loaded_at[model] = time.monotonic()
+            return self._entries[model]
+
+    async def all(self, session: AsyncSession, model: Type) -> List[dict]:
+        """All cached rows of a catalog; loads it if missing or expired."""
+        entries = self._entries[model] if self._fresh(model) else await self._load(session, model)
+        return list(entries.values())
+
+    async def get(self, session: AsyncSession, model: Type, key: str) -> Optional[dict]:
+        """Cached row of a catalog by code (or name for Category); None if it does not exist."""
+        entries = self._entries[model] if self._fresh(model) else await self._load(session, model)
+        return entries.get(key)
+
+    def invalidate(self, model: Optional[Type] = None) -> None:
+        """Drop one catalog (or all of them) so the next lookup reloads from the database."""
+        for m in [model] if model is not None else list(self._loaded_at):
+            self._loaded_at.pop(m, None)
+            self._entries.pop(m, None)
+
+    async def warm(self, session: AsyncSession) -> None:
+        """Load every catalog (used at application startup)."""
+        for model in CATALOG_KEYS:
+            self.invalidate(model)
+            await self._load(session, model)
+
+
+catalog_cache = CatalogCache(ttl_seconds=settings.catalog_cache_ttl_seconds)
@@ -1,12 +1,29 @@
-from typing import Optional
+from typing import Any, Dict, Iterable, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update, tuple_, func, literal_column
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import IntegrityError
 from decimal import Decimal
 from uuid import UUID
+import uuid
 
 from src.app.models.inventory import Inventory
-from src.app.services.audit_logger import log_audit
+from src.app.services.audit_logger import log_audit, log_audit_many
+from src.app.services.stock_balance import Triplet, apply_balance_deltas, batched
+
+
+def inventory_audit_changes(key: Triplet, **fields: Any) -> Dict[str, Any]:
+    """
+    `changes` payload of an inventory audit entry: the triplet ids (as strings) plus `fields`, so
+    containment filters such as {"direction": "transfer_out", "batch_id": ...} hit the GIN index.
+    """
+    product_id, batch_id, location_id = key
+    return {
+        "product_id": str(product_id),
+        "batch_id": str(batch_id),
+        "location_id": str(location_id),
+        **fields,
+    }
 
 
 async def apply_movement(
@@ -16,64 +33,152 @@ async def apply_movement(
     location_id: UUID,
     quantity: Decimal,
     direction: str,
-) -> None:
+) -> UUID:
     """
     Update inventory according to a movement and record audit inside the same transaction.
 
     direction: "in" (increase), "out" (decrease), "transfer_in", "transfer_out"
 
+    Each direction is a single atomic statement, safe under concurrent writers on the same triplet:
+    - in / transfer_in: INSERT ... ON CONFLICT (uq_inventory_triplet) DO UPDATE SET quantity = quantity + q
+    - out / transfer_out: UPDATE ... SET quantity = quantity - q WHERE quantity >= q
+
     This function expects to be called either standalone or enclosed by an outer transaction
-    (async with session.begin()). It will flush as needed to obtain row ids for audit entries.
+    (async with session.begin()). Returns the id of the affected inventory row.
     """
-    stmt = select(Inventory).where(
-        Inventory.product_id == product_id,
-        Inventory.batch_id == batch_id,
-        Inventory.location_id == location_id,
-    )
-    result = await session.execute(stmt)
-    inv: Optional[Inventory] = result.scalar_one_or_none()
+    table = Inventory.__table__
 
     if direction in ("in", "transfer_in"):
-        if inv:
-            inv.quantity = (inv.quantity or 0) + quantity
-            await session.flush()
-            await log_audit(
-                session=session,
-                entity_type="inventory",
-                entity_id=inv.id,
-                action="increase",
-                changes={"direction": direction, "quantity": str(quantity)},
-                user_id=None,
-            )
-        else:
-            inv = Inventory(
-                product_id=product_id,
-                batch_id=batch_id,
-                location_id=location_id,
-                quantity=quantity,
-            )
-            session.add(inv)
-            await session.flush()
-            await log_audit(
-                session=session,
-                entity_type="inventory",
-                entity_id=inv.id,
-                action="create",
-                changes={"direction": direction, "quantity": str(quantity)},
-                user_id=None,
-            )
+        stmt = pg_insert(table).values(
+            id=uuid.uuid4(),
+            product_id=product_id,
+            batch_id=batch_id,
+            location_id=location_id,
+            quantity=quantity,
+        )
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_inventory_triplet",
+            set_={"quantity": table.c.quantity + stmt.excluded.quantity, "updated_at": func.now()},
+        ).returning(
+            table.c.id,
+            # xmax = 0 only for freshly inserted tuples
+            literal_column("xmax = 0").label("inserted"),
+        )
+        inv_id, inserted = (await session.execute(stmt)).one()
+        action = "create" if inserted else "increase"
     elif direction in ("out", "transfer_out"):
-        if not inv or (inv.quantity or 0) < quantity:
-            raise IntegrityError(None, None, Exception("Insufficient stock"))
-        inv.quantity = (inv.quantity or 0) - quantity
-        await session.flush()
-        await log_audit(
-            session=session,
-            entity_type="inventory",
-            entity_id=inv.id,
-            action="decrease",
-            changes={"direction": direction, "quantity": str(quantity)},
-            user_id=None,
+        stmt = (
+            update(table)
+            .where(
+                table.c.product_id == product_id,
+                table.c.batch_id == batch_id,
+                table.c.location_id == location_id,
+                table.c.quantity >= quantity,
+            )
+            .values(quantity=table.c.quantity - quantity, updated_at=func.now())
+            .returning(table.c.id)
         )
+        inv_id = (await session.execute(stmt)).scalar_one_or_none()
+        if inv_id is None:
+            raise IntegrityError(None, None, Exception("Insufficient stock"))
+        action = "decrease"
     else:
         raise ValueError("Invalid direction")
+
+    key = (product_id, batch_id, location_id)
+    if action == "decrease":
+        await apply_balance_deltas(session, physical={key: -quantity}, consumed={key: quantity})
+    else:
+        await apply_balance_deltas(session, physical={key: quantity})
+
+    await log_audit(
+        session=session,
+        entity_type="inventory",
+        entity_id=inv_id,
+        action=action,
+        changes=inventory_audit_changes(key, direction=direction, quantity=str(quantity)),
+        user_id=None,
+        critical=False,
+    )
+    return inv_id
+
+
+async def lock_inventory(session: AsyncSession, triplets: Iterable[Triplet]) -> Dict[Triplet, Decimal]:
+    """
+    Load and row-lock (SELECT ... FOR UPDATE) the inventory rows of the given triplets, one query
+    per UPSERT_BATCH_ROWS triplets. Rows are locked in (product_id, batch_id, location_id) order,
+    the same order every inventory writer follows, so concurrent callers cannot deadlock each other.
+    Triplets without an inventory row are absent from the result (stock 0).
+    """
+    balances: Dict[Triplet, Decimal] = {}
+    for keys in batched(sorted(set(triplets))):
+        stmt = (
+            select(Inventory.product_id, Inventory.batch_id, Inventory.location_id, Inventory.quantity)
+            .where(tuple_(Inventory.product_id, Inventory.batch_id, Inventory.location_id).in_(keys))
+            .order_by(Inventory.product_id, Inventory.batch_id, Inventory.location_id)
+            .with_for_update()
+        )
+        result = await session.execute(stmt)
+        balances.update({(p, b, l): Decimal(q) for p, b, l, q in result.all()})
+    return balances
+
+
+async def apply_inventory_deltas(
+    session: AsyncSession,
+    deltas: Dict[Triplet, Decimal],
+    reason: Optional[str] = None,
+    consumed: Optional[Dict[Triplet, Decimal]] = None,
+) -> Dict[Triplet, UUID]:
+    """
+    Apply aggregated quantity deltas to inventory with INSERT ... ON CONFLICT DO UPDATE on
+    uq_inventory_triplet (one statement per UPSERT_BATCH_ROWS triplets, to stay under the bind
+    parameter limit), and record one audit entry per touched row with a single multi-row INSERT.
+    stock_balance is updated with the same deltas; `consumed` holds the gross outbound quantity per triplet.
+
+    Callers are responsible for checking that negative deltas do not drive stock below zero
+    (see lock_inventory). Returns the inventory id for each triplet.
+    """
+    rows = [
+        {"id": uuid.uuid4(), "product_id": p, "batch_id": b, "location_id": l, "quantity": q}
+        # Mismo orden de triplete que lock_inventory
+        for (p, b, l), q in sorted(deltas.items())
+        if q != 0
+    ]
+    if not rows:
+        return {}
+
+    ids: Dict[Triplet, UUID] = {}
+    for batch in batched(rows):
+        stmt = pg_insert(Inventory.__table__).values(batch)
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_inventory_triplet",
+            set_={
+                "quantity": Inventory.__table__.c.quantity + stmt.excluded.quantity,
+                "updated_at": func.now(),
+            },
+        ).returning(
+            Inventory.__table__.c.id,
+            Inventory.__table__.c.product_id,
+            Inventory.__table__.c.batch_id,
+            Inventory.__table__.c.location_id,
+        )
+        result = await session.execute(stmt)
+        ids.update({(p, b, l): inv_id for inv_id, p, b, l in result.all()})
+    await apply_balance_deltas(session, physical=deltas, consumed=consumed)
+
+    await log_audit_many(
+        session,
+        [
+            {
+                "entity_name": "inventory",
+                "entity_id": ids[key],
+                "action": "increase" if delta > 0 else "decrease",
+                "changes": inventory_audit_changes(key, delta=str(delta)),
+                "reason": reason,
+            }
+            for key, delta in deltas.items()
+            if delta != 0
+        ],
+        critical=False,
+    )
+    return ids
@@ -0,0 +1,151 @@
+# src/app/services/movement_ingestion.py
+# Ingesta masiva de movimientos: valida, agrega deltas por (producto, lote, ubicación) y los aplica por lotes.
+
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from decimal import Decimal
+from uuid import UUID
+import uuid
+
+from src.app.db.session import with_deleted
+from src.app.models.movement import Movement
+from src.app.schemas.movement import MovementCreate
+from src.app.services.inventory_updater import Triplet, lock_inventory, apply_inventory_deltas
+
+
+def movement_legs(payload: MovementCreate) -> List[Tuple[UUID, Decimal, str]]:
+    """
+    Split a movement into its inventory legs: (location_id, signed delta, direction).
+    Outgoing legs come first so stock checks see the source before the destination.
+    """
+    legs: List[Tuple[UUID, Decimal, str]] = []
+    if payload.from_location_id and payload.to_location_id:
+        legs.append((payload.from_location_id, -payload.quantity, "transfer_out"))
+        legs.append((payload.to_location_id, payload.quantity, "transfer_in"))
+    elif payload.to_location_id:
+        legs.append((payload.to_location_id, payload.quantity, "in"))
+    elif payload.from_location_id:
+        legs.append((payload.from_location_id, -payload.quantity, "out"))
+    return legs
+
+
+def _result(index: int, code: str, movement_id: Optional[UUID] = None, error: Optional[str] = None) -> dict:
+    return {
+        "index": index,
+        "code": code,
+        "status": "failed" if error else "created",
+        "movement_id": movement_id,
+        "error": error,
+    }
+
+
+async def apply_movement_batch(session: AsyncSession, movements: Sequence[MovementCreate]) -> List[dict]:
+    """
+    Validate and apply a batch of movements with a fixed number of statements per UPSERT_BATCH_ROWS
+    triplets: one code lookup, one locking inventory read, one inventory upsert, one stock_balance
+    upsert, one audit insert and one movement insert.
+
+    Rows that fail validation (missing location, duplicate code, insufficient stock) are reported as failed
+    and skipped; the rest are applied. Does not commit; the caller controls the transaction.
+    Returns one result dict per input row, in input order.
+    """
+    results: List[Optional[dict]] = [None] * len(movements)
+
+    # 1) Structural validation and duplicates inside the payload
+    seen_codes: set = set()
+    candidates: List[int] = []
+    for i, m in enumerate(movements):
+        if not m.from_location_id and not m.to_location_id:
+            results[i] = _result(i, m.code, error="Invalid movement: no location specified")
+        elif m.code in seen_codes:
+            results[i] = _result(i, m.code, error="Duplicate movement code in payload")
+        else:
+            seen_codes.add(m.code)
+            candidates.append(i)
+
+    # 2) Codes already registered (including soft-deleted rows, the unique constraint still applies)
+    if candidates:
+        stmt = with_deleted(
+            select(Movement.code)
+            .where(Movement.code.in_([movements[i].code for i in candidates]))
+        )
+        existing = set((await session.execute(stmt)).scalars().all())
+        if existing:
+            remaining = []
+            for i in candidates:
+                if movements[i].code in existing:
+                    results[i] = _result(i, movements[i].code, error="Movement code already exists")
+                else:
+                    remaining.append(i)
+            candidates = remaining
+
+    # 3) Lock current stock for every touched triplet and replay the rows in order
+    legs_by_row = {i: movement_legs(movements[i]) for i in candidates}
+    triplets = {
+        (movements[i].product_id, movements[i].batch_id, loc)
+        for i, legs in legs_by_row.items()
+        for loc, _, _ in legs
+    }
+    balances = await lock_inventory(session, triplets)
+
+    deltas: Dict[Triplet, Decimal] = {}
+    consumed: Dict[Triplet, Decimal] = {}
+    accepted: List[int] = []
+    for i in candidates:
+        m = movements[i]
+        row_deltas = [((m.product_id, m.batch_id, loc), delta) for loc, delta, _ in legs_by_row[i]]
+        short = next(
+            (key for key, delta in row_deltas if delta < 0 and balances.get(key, Decimal(0)) + delta < 0),
+            None,
+        )
+        if short is not None:
+            results[i] = _result(i, m.code, error="Insufficient stock")
+            continue
+        for key, delta in row_deltas:
+            balances[key] = balances.get(key, Decimal(0)) + delta
+            deltas[key] = deltas.get(key, Decimal(0)) + delta
+            if delta < 0:
+                consumed[key] = consumed.get(key, Decimal(0)) - delta
+        accepted.append(i)
+
+    if not accepted:
+        return results
+
+    # 4) Set-based writes
+    await apply_inventory_deltas(session, deltas, reason="bulk movement ingestion", consumed=consumed)
+
+    rows = []
+    for i in accepted:
+        movement_id = uuid.uuid4()
+        rows.append({"id": movement_id, **movements[i].dict()})
+        results[i] = _result(i, movements[i].code, movement_id=movement_id)
+    await session.execute(Movement.__table__.insert(), rows)
+
+    return results
+
+
+async def ingest_movements(
+    session: AsyncSession,
+    movements: Sequence[MovementCreate],
+    chunk_size: int,
+) -> List[dict]:
+    """
+    Apply movements in chunks of `chunk_size`, committing after each chunk.
+    A database error (e.g. FK violation) rolls back and fails only the rows of its own chunk.
+    """
+    results: List[dict] = []
+    for start in range(0, len(movements), chunk_size):
+        chunk = movements[start:start + chunk_size]
+        try:
+            chunk_results = await apply_movement_batch(session, chunk)
+            await session.commit()
+        except SQLAlchemyError as e:
+            await session.rollback()
+            error = str(getattr(e, "orig", None) or e)
+            chunk_results = [_result(i, m.code, error=error) for i, m in enumerate(chunk)]
+        for r in chunk_results:
+            r["index"] += start
+        results.extend(chunk_results)
+    return results
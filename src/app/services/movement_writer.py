@@ -0,0 +1,159 @@
+# src/app/services/movement_writer.py
+# Escritor de movimientos con group commit: agrupa peticiones concurrentes en una sola transacción.
+
+import asyncio
+import logging
+from typing import List, Optional, Tuple
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.app.core.settings import settings
+from src.app.db.session import AsyncSessionLocal
+from src.app.schemas.movement import MovementCreate
+from src.app.services.movement_ingestion import apply_movement_batch
+
+logger = logging.getLogger(__name__)
+
+_Item = Tuple[MovementCreate, asyncio.Future]
+
+
+class WriterUnavailable(Exception):
+    """Raised when the writer is stopped or its queue is full."""
+
+
+class MovementWriter:
+    """
+    In-process group-commit pipeline for movements.
+
+    Callers `submit` a movement and await its own result; a background worker drains the queue,
+    waiting at most `max_wait_ms` to gather up to `max_batch` movements, and applies them in one
+    transaction with apply_movement_batch. Row-level failures (insufficient stock, duplicate code)
+    only fail their own caller; if the whole group fails, each movement is retried in its own
+    transaction so one bad row cannot fail the others. Unexpected errors are raised to the caller
+    whose movement caused them, and the worker keeps serving.
+    """
+
+    def __init__(self, session_factory, max_queue: int, max_batch: int, max_wait_ms: int):
+        self._session_factory = session_factory
+        self._max_queue = max_queue
+        self._max_batch = max_batch
+        self._max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def qsize(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self._max_queue)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop accepting work, drain what is already queued and wait for the worker."""
+        if not self.running:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def submit(self, payload: MovementCreate) -> dict:
+        """Enqueue a movement and wait for its result dict (see movement_ingestion)."""
+        if not self.running:
+            raise WriterUnavailable("Movement writer is not running")
+        fut = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((payload, fut))
+        except asyncio.QueueFull:
+            raise WriterUnavailable("Movement writer queue is full")
+        return await fut
+
+    async def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is None:
+                break
+            group: List[_Item] = [first]
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self._max_wait
+            while len(group) < self._max_batch:
+                timeout = deadline - loop.time()
+                try:
+                    item = self._queue.get_nowait() if timeout <= 0 else await asyncio.wait_for(self._queue.get(), timeout)
+                except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                group.append(item)
+            await self._flush(group)
+
+        # Drain anything enqueued before the stop marker was seen
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None:
+                await self._flush([item])
+
+    async def _flush(self, group: List[_Item]) -> None:
+        # Un error inesperado no debe terminar el worker ni dejar futures sin resolver
+        try:
+            await self._flush_group(group)
+        except Exception as e:
+            logger.exception("Unexpected error in movement writer")
+            for _, fut in group:
+                if not fut.done():
+                    fut.set_exception(e)
+
+    async def _flush_group(self, group: List[_Item]) -> None:
+        pending = [(p, f) for p, f in group if not f.cancelled()]
+        if not pending:
+            return
+        try:
+            results = await self._apply([p for p, _ in pending])
+        except Exception:
+            logger.warning("Group commit of %d movements failed; retrying individually", len(pending), exc_info=True)
+            for payload, fut in pending:
+                await self._flush_one(payload, fut)
+            return
+
+        for (_, fut), result in zip(pending, results):
+            if not fut.done():
+                fut.set_result(result)
+
+    async def _flush_one(self, payload: MovementCreate, fut: asyncio.Future) -> None:
+        try:
+            result = (await self._apply([payload]))[0]
+        except SQLAlchemyError as e:
+            error = str(getattr(e, "orig", None) or e)
+            result = {"index": 0, "code": payload.code, "status": "failed", "movement_id": None, "error": error}
+        except Exception as e:
+            logger.exception("Unexpected error applying movement %s", payload.code)
+            if not fut.done():
+                fut.set_exception(e)
+            return
+        if not fut.done():
+            fut.set_result(result)
+
+    async def _apply(self, payloads: List[MovementCreate]) -> List[dict]:
+        async with self._session_factory() as session:
+            try:
+                results = await apply_movement_batch(session, payloads)
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+        return results
+
+
+movement_writer = MovementWriter(
+    AsyncSessionLocal,
+    max_queue=settings.movements_queue_max_size,
+    max_batch=settings.movements_group_max_batch,
+    max_wait_ms=settings.movements_group_max_wait_ms,
+)
@@ -0,0 +1,96 @@
+# src/app/services/password_hasher.py
+# Hash y verificación bcrypt fuera del event loop, en un pool de hilos acotado y con métricas de cola.
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from src.app.core.security import hash_password, verify_password
+from src.app.core.settings import settings
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many hash/verify calls are already waiting."""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hash/verify on a dedicated, size-limited thread pool.
+
+    At most `max_workers` calls run at once (one per thread); callers beyond that wait on a
+    semaphore, and once `max_pending` are waiting new calls fail fast with PasswordHasherBusy
+    instead of piling up. `stats()` exposes queue depth and timings for monitoring.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self._max_workers = max_workers
+        self._max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._limiter: Optional[asyncio.Semaphore] = None
+        self._waiting = 0
+        self._running = 0
+        self._peak_waiting = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_seconds = 0.0
+        self._run_seconds = 0.0
+
+    async def hash(self, plain_password: str) -> str:
+        return await self._submit(hash_password, plain_password)
+
+    async def verify(self, plain_password: str, password_hash: str) -> bool:
+        return await self._submit(verify_password, plain_password, password_hash)
+
+    def stats(self) -> dict:
+        completed = self._completed or 1
+        return {
+            "max_workers": self._max_workers,
+            "max_pending": self._max_pending,
+            "running": self._running,
+            "waiting": self._waiting,
+            "peak_waiting": self._peak_waiting,
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "avg_wait_ms": round(self._wait_seconds / completed * 1000, 2),
+            "avg_run_ms": round(self._run_seconds / completed * 1000, 2),
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def _submit(self, fn, *args):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="bcrypt")
+            self._limiter = asyncio.Semaphore(self._max_workers)
+
+        if self._waiting >= self._max_pending:
+            self._rejected += 1
+            raise PasswordHasherBusy("Password hasher queue is full")
+
+        queued_at = time.perf_counter()
+        self._waiting += 1
+        self._peak_waiting = max(self._peak_waiting, self._waiting)
+        try:
+            await self._limiter.acquire()
+        finally:
+            self._waiting -= 1
+
+        started_at = time.perf_counter()
+        self._running += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._running -= 1
+            self._limiter.release()
+            self._completed += 1
+            self._wait_seconds += started_at - queued_at
+            self._run_seconds += time.perf_counter() - started_at
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.password_hash_workers,
+    max_pending=settings.password_hash_max_pending,
+)
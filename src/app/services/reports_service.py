@@ -1,13 +1,15 @@
 from typing import List
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, case, literal_column, Select
 from datetime import datetime, timedelta, timezone
 from uuid import UUID
 from decimal import Decimal
 
 from src.app.models.inventory import Inventory
-from src.app.models.reservation import Reservation
 from src.app.models.movement import Movement
+from src.app.models.movement_opening_balance import MovementOpeningBalance
+from src.app.models.product import Product
+from src.app.models.stock_balance import StockBalance
 
 
 def _inventory_filters(product_id: UUID | None, batch_id: UUID | None, location_id: UUID | None):
@@ -21,14 +23,14 @@ def _inventory_filters(product_id: UUID | None, batch_id: UUID | None, location_
     return filters
 
 
-def _reservation_filters(product_id: UUID | None, batch_id: UUID | None, location_id: UUID | None):
-    filters = [Reservation.status == "active"]
+def _balance_filters(product_id: UUID | None, batch_id: UUID | None, location_id: UUID | None):
+    filters = []
     if product_id is not None:
-        filters.append(Reservation.product_id == product_id)
+        filters.append(StockBalance.product_id == product_id)
     if batch_id is not None:
-        filters.append(Reservation.batch_id == batch_id)
+        filters.append(StockBalance.batch_id == batch_id)
     if location_id is not None:
-        filters.append(Reservation.location_id == location_id)
+        filters.append(StockBalance.location_id == location_id)
     return filters
 
 
@@ -55,20 +57,14 @@ async def get_stock_summary(
     batch_id: UUID | None = None,
     location_id: UUID | None = None,
 ) -> dict:
-    inv_filters = _inventory_filters(product_id, batch_id, location_id)
-    inv_stmt = select(func.coalesce(func.sum(Inventory.quantity), 0)).where(*inv_filters)
-    inv_result = await session.execute(inv_stmt)
-    physical = inv_result.scalar_one()
-
-    res_filters = _reservation_filters(product_id, batch_id, location_id)
-    res_stmt = select(func.coalesce(func.sum(Reservation.quantity), 0)).where(*res_filters)
-    res_result = await session.execute(res_stmt)
-    reserved = res_result.scalar_one()
-
-    mov_filters = _movement_location_sum_filter(product_id, batch_id, location_id)
-    mov_stmt = select(func.coalesce(func.sum(Movement.quantity), 0)).where(*mov_filters)
-    mov_result = await session.execute(mov_stmt)
-    consumed = mov_result.scalar_one()
+    """Read physical/reserved/consumed totals from the maintained stock_balance projection (single query)."""
+    filters = _balance_filters(product_id, batch_id, location_id)
+    stmt = select(
+        func.coalesce(func.sum(StockBalance.physical), 0),
+        func.coalesce(func.sum(StockBalance.reserved), 0),
+        func.coalesce(func.sum(StockBalance.consumed), 0),
+    ).where(*filters)
+    physical, reserved, consumed = (await session.execute(stmt)).one()
 
     available = Decimal(physical) - Decimal(reserved)
 
@@ -80,54 +76,109 @@ async def get_stock_summary(
     }
 
 
-async def get_stock_history(
-    session: AsyncSession,
+HISTORY_BUCKETS = ("hour", "day", "week")
+
+
+def _movement_signed_quantity(location_id: UUID | None):
+    """Signed stock delta of a movement, as seen from one location or from the whole product."""
+    if location_id:
+        return case(
+            (Movement.from_location_id == location_id, -Movement.quantity),
+            (Movement.to_location_id == location_id, Movement.quantity),
+            else_=0,
+        )
+    return (
+        case((Movement.to_location_id.isnot(None), Movement.quantity), else_=0)
+        - case((Movement.from_location_id.isnot(None), Movement.quantity), else_=0)
+    )
+
+
+def _opening_balance(product_id: UUID, batch_id: UUID | None, location_id: UUID | None):
+    """Stock carried by movements already retired with their partition (0 when none were)."""
+    filters = [MovementOpeningBalance.product_id == product_id]
+    if batch_id:
+        filters.append(MovementOpeningBalance.batch_id == batch_id)
+    if location_id:
+        filters.append(MovementOpeningBalance.location_id == location_id)
+    return select(func.coalesce(func.sum(MovementOpeningBalance.quantity), 0)).where(*filters).scalar_subquery()
+
+
+def build_stock_history_query(
     product_id: UUID,
     batch_id: UUID | None = None,
     location_id: UUID | None = None,
     start_date: datetime | None = None,
     end_date: datetime | None = None,
-) -> List[dict]:
-    stmt = select(
-        Movement.occurred_at,
-        Movement.quantity,
-        Movement.from_location_id,
-        Movement.to_location_id,
-    ).where(Movement.product_id == product_id)
+    bucket: str | None = None,
+) -> Select:
+    """
+    Running stock balance over time, computed in SQL with SUM(...) OVER (ORDER BY occurred_at).
+    With bucket=hour|day|week, deltas are first aggregated per date_trunc bucket so one point is
+    returned per bucket instead of one per movement. Selects (date, balance).
+    Without start_date the balance is absolute: it starts from movement_opening_balance, the net
+    stock of the movements already retired by archive_and_purge. With start_date it is relative
+    to that instant, as before.
+    """
+    if bucket is not None and bucket not in HISTORY_BUCKETS:
+        raise ValueError(f"Invalid bucket '{bucket}', expected one of {', '.join(HISTORY_BUCKETS)}")
 
+    filters = [Movement.product_id == product_id]
     if batch_id:
-        stmt = stmt.where(Movement.batch_id == batch_id)
+        filters.append(Movement.batch_id == batch_id)
     if location_id:
-        stmt = stmt.where(
-            (Movement.from_location_id == location_id) | (Movement.to_location_id == location_id)
-        )
+        filters.append((Movement.from_location_id == location_id) | (Movement.to_location_id == location_id))
     if start_date:
-        stmt = stmt.where(Movement.occurred_at >= start_date)
+        filters.append(Movement.occurred_at >= start_date)
     if end_date:
-        stmt = stmt.where(Movement.occurred_at <= end_date)
+        filters.append(Movement.occurred_at <= end_date)
 
-    stmt = stmt.order_by(Movement.occurred_at.asc())
-    result = await session.execute(stmt)
-    movements = result.all()
+    delta = _movement_signed_quantity(location_id)
 
-    history = []
-    balance = 0.0
-    for occurred_at, qty, from_loc, to_loc in movements:
-        qty_f = float(qty)
-        if location_id:
-            if from_loc == location_id:
-                balance -= qty_f
-            elif to_loc == location_id:
-                balance += qty_f
-        else:
-            if from_loc:
-                balance -= qty_f
-            if to_loc:
-                balance += qty_f
+    def _with_opening(running):
+        return running if start_date else _opening_balance(product_id, batch_id, location_id) + running
 
-        history.append({"date": occurred_at, "balance": balance})
+    if bucket:
+        # bucket is whitelisted above; inlined so SELECT and GROUP BY share the same expression
+        period = func.date_trunc(literal_column(f"'{bucket}'"), Movement.occurred_at)
+        per_bucket = (
+            select(period.label("date"), func.sum(delta).label("delta"))
+            .where(*filters)
+            .group_by(period)
+            .subquery()
+        )
+        stmt = select(
+            per_bucket.c.date,
+            _with_opening(func.sum(per_bucket.c.delta).over(order_by=per_bucket.c.date)).label("balance"),
+        ).order_by(per_bucket.c.date)
+    else:
+        stmt = (
+            select(
+                Movement.occurred_at.label("date"),
+                _with_opening(
+                    func.sum(delta).over(
+                        order_by=(Movement.occurred_at, Movement.id),
+                        rows=(None, 0),
+                    )
+                ).label("balance"),
+            )
+            .where(*filters)
+            .order_by(Movement.occurred_at, Movement.id)
+        )
+    return stmt
 
-    return history
+
+async def get_stock_history(
+    session: AsyncSession,
+    product_id: UUID,
+    batch_id: UUID | None = None,
+    location_id: UUID | None = None,
+    start_date: datetime | None = None,
+    end_date: datetime | None = None,
+    bucket: str | None = None,
+) -> List[dict]:
+    stmt = build_stock_history_query(product_id, batch_id, location_id, start_date, end_date, bucket)
+    result = await session.execute(stmt)
+    return [{"date": date, "balance": Decimal(balance)} for date, balance in result.all()]
 
 
 async def get_stock_forecast(
@@ -171,3 +222,80 @@ async def get_stock_forecast(
         "coverage_days": round(coverage_days, 1),
         "depletion_date": depletion_date,
     }
+
+
+def build_portfolio_forecast_query(
+    product_ids: List[UUID] | None = None,
+    category_ids: List[UUID] | None = None,
+    location_id: UUID | None = None,
+    lookback_days: int = 30,
+) -> Select:
+    """
+    Stock and windowed consumption for every product (or a filtered set) with one grouped subquery each,
+    joined and turned into avg daily consumption, coverage days and depletion date for all rows at once.
+    Selects (product_id, stock, avg_daily_consumption, coverage_days, depletion_date).
+    """
+    since = datetime.now(timezone.utc) - timedelta(days=lookback_days)
+
+    inv_filters = []
+    mov_filters = [Movement.from_location_id.isnot(None), Movement.occurred_at >= since]
+    if product_ids:
+        inv_filters.append(Inventory.product_id.in_(product_ids))
+        mov_filters.append(Movement.product_id.in_(product_ids))
+    if category_ids:
+        in_category = select(Product.id).where(Product.category_id.in_(category_ids))
+        inv_filters.append(Inventory.product_id.in_(in_category))
+        mov_filters.append(Movement.product_id.in_(in_category))
+    if location_id is not None:
+        inv_filters.append(Inventory.location_id == location_id)
+        mov_filters.append(Movement.from_location_id == location_id)
+
+    stock_q = (
+        select(Inventory.product_id, func.sum(Inventory.quantity).label("stock"))
+        .where(*inv_filters)
+        .group_by(Inventory.product_id)
+        .subquery("stock")
+    )
+    consumed_q = (
+        select(Movement.product_id, func.sum(Movement.quantity).label("consumed"))
+        .where(*mov_filters)
+        .group_by(Movement.product_id)
+        .subquery("consumed")
+    )
+
+    stock = func.coalesce(stock_q.c.stock, 0)
+    avg_daily = func.coalesce(consumed_q.c.consumed, 0) / lookback_days
+    coverage = case((avg_daily > 0, func.greatest(stock, 0) / avg_daily), else_=None)
+
+    return select(
+        func.coalesce(stock_q.c.product_id, consumed_q.c.product_id).label("product_id"),
+        stock.label("stock"),
+        func.round(avg_daily, 2).label("avg_daily_consumption"),
+        func.round(coverage, 1).label("coverage_days"),
+        (func.now() + coverage * literal_column("interval '1 day'")).label("depletion_date"),
+    ).select_from(
+        stock_q.join(consumed_q, stock_q.c.product_id == consumed_q.c.product_id, full=True)
+    )
+
+
+async def get_stock_forecast_bulk(
+    session: AsyncSession,
+    product_ids: List[UUID] | None = None,
+    category_id: UUID | None = None,
+    location_id: UUID | None = None,
+    lookback_days: int = 30,
+) -> List[dict]:
+    stmt = build_portfolio_forecast_query(
+        product_ids, [category_id] if category_id else None, location_id, lookback_days
+    )
+    result = await session.execute(stmt)
+    return [
+        {
+            "product_id": product_id,
+            "stock": str(Decimal(stock)),
+            "avg_daily_consumption": str(Decimal(avg_daily)),
+            "coverage_days": float(coverage) if coverage is not None else None,
+            "depletion_date": depletion_date,
+        }
+        for product_id, stock, avg_daily, coverage, depletion_date in result.all()
+    ]
@@ -1,6 +1,5 @@
 from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 from datetime import datetime, timezone
 from uuid import UUID
 import uuid
@@ -9,24 +8,52 @@ from src.app.models.reservation import Reservation
 from src.app.models.movement import Movement, MovementType, MovementReason
 from src.app.services.inventory_updater import apply_movement
 from src.app.services.audit_logger import log_audit
+from src.app.services.catalog_cache import catalog_cache
+from src.app.services.stock_balance import apply_balance_deltas
+
+_RESERVED_COLUMNS = (
+    Reservation.product_id,
+    Reservation.batch_id,
+    Reservation.location_id,
+    Reservation.quantity,
+)
+
+
+async def release_reserved_stock(session: AsyncSession, rows) -> None:
+    """Subtract closed reservations (product_id, batch_id, location_id, quantity rows) from stock_balance."""
+    reserved = {}
+    for product_id, batch_id, location_id, quantity in rows:
+        key = (product_id, batch_id, location_id)
+        reserved[key] = reserved.get(key, 0) - quantity
+    await apply_balance_deltas(session, reserved=reserved)
+
+
+async def register_reservation(session: AsyncSession, reservation: Reservation) -> None:
+    """Add a new active reservation to stock_balance (the reservation itself is added by the caller)."""
+    key = (reservation.product_id, reservation.batch_id, reservation.location_id)
+    await apply_balance_deltas(session, reserved={key: reservation.quantity})
 
 
 async def release_reservation(session: AsyncSession, reservation_id: UUID) -> None:
     """Set reservation status to released if active."""
-    await session.execute(
+    result = await session.execute(
         Reservation.__table__.update()
-        .where(Reservation.id == reservation_id, Reservation.status == "active")
+        .where(Reservation.id == reservation_id, Reservation.status == "active", Reservation.deleted_at.is_(None))
         .values(status="released", updated_at=datetime.now(timezone.utc))
+        .returning(*_RESERVED_COLUMNS)
     )
+    await release_reserved_stock(session, result.all())
 
 
 async def fulfill_reservation(session: AsyncSession, reservation_id: UUID) -> None:
     """Set reservation status to fulfilled if active."""
-    await session.execute(
+    result = await session.execute(
         Reservation.__table__.update()
-        .where(Reservation.id == reservation_id, Reservation.status == "active")
+        .where(Reservation.id == reservation_id, Reservation.status == "active", Reservation.deleted_at.is_(None))
         .values(status="fulfilled", updated_at=datetime.now(timezone.utc))
+        .returning(*_RESERVED_COLUMNS)
     )
+    await release_reserved_stock(session, result.all())
 
 
 async def expire_reservations(session: AsyncSession) -> int:
@@ -36,13 +63,16 @@ async def expire_reservations(session: AsyncSession) -> int:
         Reservation.__table__.update()
         .where(
             Reservation.status == "active",
+            Reservation.deleted_at.is_(None),
             Reservation.reserved_until.isnot(None),
-            Reservation.reserved_until < now,
+            # reserved_until es TIMESTAMP sin zona (UTC): asyncpg rechaza comparar con un datetime aware
+            Reservation.reserved_until < now.replace(tzinfo=None),
         )
         .values(status="expired", updated_at=now)
-        .returning(Reservation.id)
+        .returning(*_RESERVED_COLUMNS)
     )
     expired = result.fetchall()
+    await release_reserved_stock(session, expired)
     return len(expired)
 
 
@@ -59,33 +89,32 @@ async def fulfill_reservation_with_movement(
     """
     # Load reservation
     res = await session.get(Reservation, reservation_id)
-    if not res or res.status != "active":
+    if not res or res.status != "active" or res.deleted_at is not None:
         raise ValueError("Reservation not found or not active")
 
-    # Resolve movement type (must exist)
-    mt_stmt = select(MovementType).where(MovementType.code == "outbound")
-    movement_type = (await session.execute(mt_stmt)).scalar_one_or_none()
+    # Resolve movement type (must exist) from the catalog cache
+    movement_type = await catalog_cache.get(session, MovementType, "outbound")
     if movement_type is None:
         raise ValueError("movement_type 'outbound' not found in catalog")
 
     # Resolve movement reason, prefer 'reservation_fulfillment', fallback to any reason
-    mr_stmt = select(MovementReason).where(MovementReason.code == "reservation_fulfillment")
-    movement_reason = (await session.execute(mr_stmt)).scalar_one_or_none()
+    movement_reason = await catalog_cache.get(session, MovementReason, "reservation_fulfillment")
     if movement_reason is None:
-        movement_reason = (await session.execute(select(MovementReason).limit(1))).scalar_one_or_none()
-        if movement_reason is None:
+        reasons = await catalog_cache.all(session, MovementReason)
+        if not reasons:
             raise ValueError("No movement_reason found in catalog; run seed script")
+        movement_reason = reasons[0]
 
     async with session.begin():
         movement = Movement(
             id=uuid.uuid4(),
             code=f"RES-{reservation_id.hex[:8]}",
-            movement_type_id=movement_type.id,
+            movement_type_id=movement_type["id"],
             product_id=res.product_id,
             batch_id=res.batch_id,
             from_location_id=res.location_id,
             to_location_id=None,
-            reason_id=movement_reason.id,
+            reason_id=movement_reason["id"],
             requested_by_user_id=None,
             executed_by_user_id=executed_by_user_id,
             quantity=res.quantity,
@@ -107,6 +136,7 @@ async def fulfill_reservation_with_movement(
         res.status = "fulfilled"
         res.updated_at = datetime.now(timezone.utc)
         await session.flush()
+        await release_reserved_stock(session, [(res.product_id, res.batch_id, res.location_id, res.quantity)])
 
         # Audit reservation fulfilment
         await log_audit(
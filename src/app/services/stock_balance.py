@@ -0,0 +1,65 @@
+# src/app/services/stock_balance.py
+# Proyección stock_balance: se actualiza en la misma transacción que inventario y reservas.
+
+from collections import defaultdict
+from decimal import Decimal
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.models.stock_balance import StockBalance
+
+# (product_id, batch_id, location_id)
+Triplet = Tuple[UUID, UUID, UUID]
+
+_COLUMNS = ("physical", "reserved", "consumed")
+
+# asyncpg admite como máximo 32767 parámetros por sentencia; los INSERT multi-fila
+# (hasta 6 columnas por fila) se parten en lotes de este tamaño
+UPSERT_BATCH_ROWS = 5000
+
+
+def batched(rows: Sequence, size: int = UPSERT_BATCH_ROWS) -> Iterator[List]:
+    """Split rows into consecutive lists of at most `size` items."""
+    for start in range(0, len(rows), size):
+        yield list(rows[start:start + size])
+
+
+async def apply_balance_deltas(
+    session: AsyncSession,
+    physical: Optional[Dict[Triplet, Decimal]] = None,
+    reserved: Optional[Dict[Triplet, Decimal]] = None,
+    consumed: Optional[Dict[Triplet, Decimal]] = None,
+) -> None:
+    """
+    Add the given deltas to stock_balance with INSERT ... ON CONFLICT DO UPDATE, one statement
+    per UPSERT_BATCH_ROWS triplets. Does not commit; the caller controls the transaction.
+    """
+    merged: Dict[Triplet, Dict[str, Decimal]] = defaultdict(lambda: dict.fromkeys(_COLUMNS, Decimal(0)))
+    for column, deltas in zip(_COLUMNS, (physical, reserved, consumed)):
+        for key, delta in (deltas or {}).items():
+            merged[key][column] += Decimal(delta)
+
+    rows = [
+        {"product_id": p, "batch_id": b, "location_id": l, **values}
+        # Orden de triplete (product_id, batch_id, location_id), igual que lock_inventory
+        for (p, b, l), values in sorted(merged.items())
+        if any(values.values())
+    ]
+    if not rows:
+        return
+
+    table = StockBalance.__table__
+    for batch in batched(rows):
+        stmt = pg_insert(table).values(batch)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.product_id, table.c.batch_id, table.c.location_id],
+            set_={
+                **{c: table.c[c] + stmt.excluded[c] for c in _COLUMNS},
+                "updated_at": func.now(),
+            },
+        )
+        await session.execute(stmt)
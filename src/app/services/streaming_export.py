@@ -0,0 +1,62 @@
+# src/app/services/streaming_export.py
+# Exportación en streaming (NDJSON / CSV) usando cursores del lado del servidor.
+
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, AsyncIterator
+from uuid import UUID
+
+from sqlalchemy import Select
+
+from src.app.db.session import read_sessionmaker
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, UUID)):
+        return str(value)
+    return value
+
+
+async def stream_query(stmt: Select, fmt: str, yield_per: int = 1000) -> AsyncIterator[str]:
+    """
+    Execute `stmt` on a server-side cursor and yield it serialized as NDJSON or CSV, one chunk per
+    fetched partition, so memory stays constant regardless of the result size.
+
+    Opens its own session: FastAPI tears down request dependencies before a streaming body is sent.
+    Exports are read-only, so the session goes to the read replica when it is within the lag limit.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Invalid format '{fmt}', expected one of {', '.join(EXPORT_FORMATS)}")
+
+    session_factory = await read_sessionmaker()
+    async with session_factory() as session:
+        result = await session.stream(stmt.execution_options(yield_per=yield_per))
+        keys = list(result.keys())
+
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        if fmt == "csv":
+            writer.writerow(keys)
+            yield buf.getvalue()
+
+        async for partition in result.partitions():
+            buf.seek(0)
+            buf.truncate()
+            for row in partition:
+                values = [_encode(v) for v in row]
+                if fmt == "csv":
+                    writer.writerow(values)
+                else:
+                    buf.write(json.dumps(dict(zip(keys, values))))
+                    buf.write("\n")
+            yield buf.getvalue()
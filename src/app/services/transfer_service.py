@@ -0,0 +1,125 @@
+# src/app/services/transfer_service.py
+# Transferencias entre ubicaciones: bloqueo de filas en orden de triplete y reintentos ante deadlocks.
+
+import asyncio
+import random
+import uuid
+from decimal import Decimal
+from typing import Dict
+from uuid import UUID
+
+from sqlalchemy import update, case, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.core.settings import settings
+from src.app.models.inventory import Inventory
+from src.app.services.audit_logger import log_audit_many
+from src.app.services.inventory_updater import inventory_audit_changes, lock_inventory
+from src.app.services.stock_balance import apply_balance_deltas
+
+# deadlock_detected. serialization_failure (40001) no se reintenta aquí: bajo REPEATABLE READ o
+# SERIALIZABLE el snapshot es el de toda la transacción y un SAVEPOINT no sirve para repetirla.
+RETRYABLE_SQLSTATES = {"40P01"}
+
+
+def is_retryable(exc: DBAPIError) -> bool:
+    """True if the database error is a deadlock worth retrying inside the transfer's savepoint."""
+    return getattr(exc.orig, "sqlstate", None) in RETRYABLE_SQLSTATES
+
+
+async def _transfer_once(
+    session: AsyncSession,
+    product_id: UUID,
+    batch_id: UUID,
+    from_location_id: UUID,
+    to_location_id: UUID,
+    quantity: Decimal,
+) -> Dict[UUID, UUID]:
+    table = Inventory.__table__
+    same_triplet = (table.c.product_id == product_id) & (table.c.batch_id == batch_id)
+
+    # Make sure the destination row exists so both rows can be locked together
+    await session.execute(
+        pg_insert(table)
+        .values(id=uuid.uuid4(), product_id=product_id, batch_id=batch_id, location_id=to_location_id, quantity=0)
+        .on_conflict_do_nothing(constraint="uq_inventory_triplet")
+    )
+
+    # Same lock order as bulk ingestion (lock_inventory): a transfer and a bulk chunk touching the
+    # same rows acquire them in the same sequence and cannot deadlock each other.
+    source = (product_id, batch_id, from_location_id)
+    quantities = await lock_inventory(session, [source, (product_id, batch_id, to_location_id)])
+    if quantities.get(source, Decimal(0)) < quantity:
+        raise IntegrityError(None, None, Exception("Insufficient stock"))
+
+    # Both legs in a single statement
+    result = await session.execute(
+        update(table)
+        .where(same_triplet, table.c.location_id.in_([from_location_id, to_location_id]))
+        .values(
+            quantity=table.c.quantity + case((table.c.location_id == to_location_id, quantity), else_=-quantity),
+            updated_at=func.now(),
+        )
+        .returning(table.c.location_id, table.c.id)
+    )
+    return dict(result.all())
+
+
+async def transfer_stock(
+    session: AsyncSession,
+    product_id: UUID,
+    batch_id: UUID,
+    from_location_id: UUID,
+    to_location_id: UUID,
+    quantity: Decimal,
+) -> None:
+    """
+    Move `quantity` of a (product, batch) from one location to another inside the caller's transaction.
+
+    Both inventory rows are locked in triplet order (see lock_inventory) and updated by one statement.
+    Each attempt runs in a SAVEPOINT, so a deadlock only rolls back the transfer itself and is retried with exponential backoff and jitter (settings.transfers_max_attempts). Raises IntegrityError
+    on insufficient stock. Does not commit.
+    """
+    if from_location_id == to_location_id:
+        raise ValueError("Source and destination locations must differ")
+
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            async with session.begin_nested():
+                ids = await _transfer_once(session, product_id, batch_id, from_location_id, to_location_id, quantity)
+            break
+        except DBAPIError as e:
+            if not is_retryable(e) or attempt >= settings.transfers_max_attempts:
+                raise
+            delay = settings.transfers_retry_base_ms / 1000 * (2 ** (attempt - 1))
+            await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+
+    source = (product_id, batch_id, from_location_id)
+    destination = (product_id, batch_id, to_location_id)
+    await apply_balance_deltas(
+        session,
+        physical={source: -quantity, destination: quantity},
+        consumed={source: quantity},
+    )
+    await log_audit_many(
+        session,
+        [
+            {
+                "entity_name": "inventory",
+                "entity_id": ids[from_location_id],
+                "action": "decrease",
+                "changes": inventory_audit_changes(source, direction="transfer_out", quantity=str(quantity)),
+            },
+            {
+                "entity_name": "inventory",
+                "entity_id": ids[to_location_id],
+                "action": "increase",
+                "changes": inventory_audit_changes(destination, direction="transfer_in", quantity=str(quantity)),
+            },
+        ],
+        critical=False,
+    )
@@ -1,7 +1,9 @@
 # src/main.py
 import os
 import sys
+import time
 import asyncio
+import logging
 
 # Asegurar que el paquete src esté en sys.path cuando ejecutes desde la raíz
 ROOT = os.path.dirname(__file__)
@@ -10,11 +12,22 @@ sys.path.append(ROOT)
 # Forzar selector en Windows para evitar errores IOCP/WinError64 con asyncpg
 asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
-from fastapi import FastAPI
+import sqlalchemy as sa
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 # Importa el router agregado que exporta todos los routers de src.app.api.routes
 from src.app.api.routes import router as api_router
+from src.app.core.settings import settings
+from src.app.db.partitions import PARTITION_MONTHS_AHEAD, PARTITIONED_TABLES, ensure_monthly_partitions
+from src.app.db.session import AsyncSessionLocal, engine, pool_stats, replica_available, replica_status, shutdown_engine
+from src.app.services.audit_logger import audit_writer
+from src.app.services.catalog_cache import catalog_cache
+from src.app.services.movement_writer import movement_writer
+from src.app.services.password_hasher import PasswordHasherBusy, password_hasher
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title="Enterprise Inventory System",
@@ -39,6 +52,73 @@ app.add_middleware(
 app.include_router(api_router)
 
 
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy) -> JSONResponse:
+    # Login, signup y alta/edición de usuarios: el pool de bcrypt está saturado, reintentar en breve
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Password hashing temporarily unavailable"},
+        headers={"Retry-After": str(settings.password_hash_retry_after_seconds)},
+    )
+
+
+@app.on_event("startup")
+async def on_startup() -> None:
+    # Precargar catálogos para que los caminos calientes no consulten la BD; si la BD no responde
+    # al arrancar, la caché se llena en la primera consulta de cada catálogo
+    try:
+        async with AsyncSessionLocal() as session:
+            await catalog_cache.warm(session)
+    except Exception:
+        logger.warning("Catalog cache warm-up failed; catalogs will load on first use", exc_info=True)
+    # Particiones del mes en curso y siguientes, además del job diario de scripts/scheduler.py
+    try:
+        async with AsyncSessionLocal() as session:
+            for table in PARTITIONED_TABLES:
+                await ensure_monthly_partitions(session, table, PARTITION_MONTHS_AHEAD)
+            await session.commit()
+    except Exception:
+        logger.warning("Could not ensure monthly partitions at startup", exc_info=True)
+    if settings.movements_group_commit:
+        movement_writer.start()
+    if settings.audit_async_writer:
+        audit_writer.start()
+
+
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    # Vaciar la cola de movimientos antes de cerrar el engine
+    await movement_writer.stop()
+    await audit_writer.stop()
+    password_hasher.shutdown()
+    await shutdown_engine()
+
+
 @app.get("/health", tags=["system"])
 async def health_check():
     return {"status": "ok"}
+
+
+@app.get("/health/db", tags=["system"])
+async def db_health():
+    """Connection pool usage plus a round-trip check against the database."""
+    started = time.perf_counter()
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(sa.text("SELECT 1"))
+        db_status, error = "ok", None
+    except Exception as exc:
+        db_status, error = "error", str(exc)
+    return {
+        "status": db_status,
+        "error": error,
+        "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+        "pool": pool_stats(),
+        "replica": {"in_use": await replica_available(), **replica_status()},
+    }
+
+
+@app.get("/health/password_hasher", tags=["system"])
+async def password_hasher_health():
+    """Queue depth and timings of the bcrypt thread pool."""
+    return password_hasher.stats()
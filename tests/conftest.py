@@ -0,0 +1,69 @@
+# tests/conftest.py
+# Pruebas de integración: corren contra la base de DATABASE_URL ya migrada (alembic upgrade head),
+# igual que scripts/apply_seeds_and_tests.ps1. Cada prueba crea sus propios catálogos con códigos únicos.
+
+import uuid
+from decimal import Decimal
+
+import pytest_asyncio
+import sqlalchemy as sa
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from src.app.api.routes import router as api_router
+from src.app.db.session import AsyncSessionLocal, engine, shutdown_engine
+from src.app.services.inventory_updater import apply_movement
+
+_CATALOG_SQL = [
+    "INSERT INTO category (id, name) VALUES (:category, 'test-' || :tag)",
+    "INSERT INTO unit (id, code) VALUES (:unit, 'test-' || :tag)",
+    "INSERT INTO product (id, name, sku, category_id, unit_id, is_serialized, is_perishable) "
+    "VALUES (:product, 'test product', 'TEST-' || :tag, :category, :unit, false, false)",
+    "INSERT INTO batch (id, product_id, code, origin_type) VALUES (:batch, :product, 'TEST-' || :tag, 'supplier')",
+    "INSERT INTO warehouse (id, code, name) VALUES (:warehouse, 'TEST-' || :tag, 'test')",
+    "INSERT INTO location (id, warehouse_id, code, type) VALUES (:loc1, :warehouse, 'A-' || :tag, 'bin')",
+    "INSERT INTO location (id, warehouse_id, code, type) VALUES (:loc2, :warehouse, 'B-' || :tag, 'bin')",
+    "INSERT INTO movement_type (id, code) VALUES (:movement_type, 'test-' || :tag)",
+    "INSERT INTO movement_reason (id, code, requires_approval) VALUES (:reason, 'test-' || :tag, false)",
+]
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def _dispose_engine():
+    # Cada prueba corre en su propio event loop: no reutilizar conexiones del pool entre loops
+    yield
+    await shutdown_engine()
+
+
+@pytest_asyncio.fixture
+async def client():
+    """HTTP client over the API routers (without the src.main startup hooks)."""
+    app = FastAPI()
+    app.include_router(api_router)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as http:
+        yield http
+
+
+@pytest_asyncio.fixture
+async def catalog() -> dict:
+    """
+    Ids of a new product with one batch and two locations (loc1, loc2) of one warehouse,
+    plus a movement type and reason.
+    """
+    keys = ("category", "unit", "product", "batch", "warehouse", "loc1", "loc2", "movement_type", "reason")
+    ids = {k: uuid.uuid4() for k in keys}
+    async with engine.begin() as conn:
+        for sql in _CATALOG_SQL:
+            await conn.execute(sa.text(sql), {**ids, "tag": ids["product"].hex[:8]})
+    return ids
+
+
+@pytest_asyncio.fixture
+async def stocked(catalog) -> dict:
+    """`catalog` with 10 units of the batch at loc1."""
+    async with AsyncSessionLocal() as session:
+        await apply_movement(
+            session, catalog["product"], catalog["batch"], catalog["loc1"], Decimal("10"), direction="in"
+        )
+        await session.commit()
+    return catalog
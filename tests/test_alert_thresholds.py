@@ -0,0 +1,31 @@
+# tests/test_alert_thresholds.py
+
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_threshold_can_be_recreated_after_soft_delete(client, catalog):
+    body = {"product_id": str(catalog["product"]), "min_stock": "5"}
+    response = await client.post("/alerts/thresholds", json=body)
+    assert response.status_code == 201, response.text
+    threshold_id = response.json()["id"]
+
+    response = await client.post("/alerts/thresholds", json=body)
+    assert response.status_code == 400, response.text
+
+    response = await client.delete(f"/alerts/thresholds/{threshold_id}")
+    assert response.status_code == 204, response.text
+
+    response = await client.post("/alerts/thresholds", json={**body, "min_stock": "8"})
+    assert response.status_code == 201, response.text
+    response = await client.get("/alerts/thresholds", params={"product_id": str(catalog["product"])})
+    assert [float(t["min_stock"]) for t in response.json()] == [8]
+
+
+@pytest.mark.asyncio
+async def test_threshold_needs_exactly_one_target(client, catalog):
+    response = await client.post(
+        "/alerts/thresholds",
+        json={"product_id": str(catalog["product"]), "category_id": str(catalog["category"]), "min_stock": "5"},
+    )
+    assert response.status_code == 422, response.text
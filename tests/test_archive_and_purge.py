@@ -0,0 +1,300 @@
+# tests/test_archive_and_purge.py
+# Integración de scripts/maintenance/archive_and_purge.py contra la base migrada.
+
+import csv
+import gzip
+import json
+import uuid
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+import sqlalchemy as sa
+
+from scripts.maintenance import archive_and_purge as ap
+from src.app.db.partitions import ensure_monthly_partitions
+from src.app.db.session import AsyncSessionLocal, engine
+
+_RESERVATION_SQL = (
+    "INSERT INTO reservation (id, product_id, batch_id, location_id, quantity, status, deleted_at) "
+    "VALUES (:id, :product, :batch, :loc1, 1, 'cancelled', :deleted_at)"
+)
+_SERIAL_SQL = (
+    "INSERT INTO serial (id, product_id, batch_id, serial_number, deleted_at) "
+    "VALUES (:id, :product, :batch, :number, :deleted_at)"
+)
+
+
+async def _ids_in(table: str, ids: list) -> list:
+    async with engine.connect() as conn:
+        result = await conn.execute(
+            sa.text(f"SELECT id FROM {table} WHERE id = ANY(CAST(:ids AS uuid[]))"), {"ids": ids}
+        )
+        return result.scalars().all()
+
+
+def _manifest(root) -> dict:
+    """Latest manifest entry per file path."""
+    latest = {}
+    manifest = root / "manifest.jsonl"
+    if manifest.exists():
+        for line in manifest.read_text(encoding="utf-8").splitlines():
+            entry = json.loads(line)
+            latest[entry["path"]] = entry
+    return latest
+
+
+def _archived_ids(root, table: str) -> Counter:
+    """Ids per occurrence in the committed files of `table`."""
+    counts: Counter = Counter()
+    for entry in _manifest(root).values():
+        if entry["table"] != table or entry["status"] != "committed":
+            continue
+        with gzip.open(root / entry["path"], "rt", encoding="utf-8") as fh:
+            counts.update(uuid.UUID(row["id"]) for row in csv.DictReader(fh))
+    return counts
+
+
+@pytest.mark.asyncio
+async def test_interrupted_run_resumes_without_skipping_or_duplicating_rows(catalog, tmp_path, monkeypatch):
+    now = datetime.now(timezone.utc)
+    reservations = [uuid.uuid4() for _ in range(10)]
+    serials = [uuid.uuid4() for _ in range(10)]
+    async with engine.begin() as conn:
+        await conn.execute(sa.text("DELETE FROM maintenance_checkpoint"))
+        for rid in reservations:
+            await conn.execute(sa.text(_RESERVATION_SQL), {**catalog, "id": rid, "deleted_at": now - timedelta(days=365 * 3)})
+        for n, sid in enumerate(serials):
+            await conn.execute(
+                sa.text(_SERIAL_SQL),
+                {**catalog, "id": sid, "number": f"{catalog['product'].hex[:8]}-{n}", "deleted_at": now - timedelta(days=365 * 4)},
+            )
+        # El lote solo se archiva cuando reservation y serial terminaron su pasada
+        await conn.execute(
+            sa.text("UPDATE batch SET deleted_at = :at WHERE id = :batch"),
+            {"batch": catalog["batch"], "at": now - timedelta(days=365 * 6)},
+        )
+
+    # Primera ejecución: el plazo (--max-runtime) vence tras el primer lote confirmado
+    state = {"out_of_time": False}
+    commit_batch = ap._commit_batch
+
+    async def commit_then_expire(session, archive, entries):
+        await commit_batch(session, archive, entries)
+        state["out_of_time"] = True
+
+    monkeypatch.setattr(ap, "_commit_batch", commit_then_expire)
+    monkeypatch.setattr(ap, "_out_of_time", lambda deadline: state["out_of_time"])
+    await ap.maintenance_job(dry_run=False, batch_size=3, max_runtime=3600, target="files", archive_dir=str(tmp_path))
+
+    remaining = await _ids_in("reservation", reservations) + await _ids_in("serial", serials)
+    assert 0 < len(remaining) < len(reservations) + len(serials)
+    assert await _ids_in("batch", [catalog["batch"]]) == [catalog["batch"]]
+
+    # Segunda ejecución: retoma desde los checkpoints y termina
+    monkeypatch.undo()
+    await ap.maintenance_job(dry_run=False, batch_size=3, target="files", archive_dir=str(tmp_path))
+
+    assert await _ids_in("reservation", reservations) == []
+    assert await _ids_in("serial", serials) == []
+    assert await _ids_in("batch", [catalog["batch"]]) == []
+    for table, ids in (("reservation", reservations), ("serial", serials), ("batch", [catalog["batch"]])):
+        archived = _archived_ids(tmp_path, table)
+        assert {i: archived[i] for i in ids} == {i: 1 for i in ids}, table
+
+
+@pytest.mark.asyncio
+async def test_pending_files_are_resolved_against_the_source(catalog, tmp_path):
+    deleted_at = datetime.now(timezone.utc) - timedelta(days=365 * 3)
+    committed_ids, rolled_back_ids = [uuid.uuid4() for _ in range(2)], [uuid.uuid4() for _ in range(2)]
+    async with engine.begin() as conn:
+        for rid in committed_ids + rolled_back_ids:
+            await conn.execute(sa.text(_RESERVATION_SQL), {**catalog, "id": rid, "deleted_at": deleted_at})
+
+    # Dos lotes cuyo proceso muere tras el commit / antes del rollback: el manifest solo tiene "pending"
+    archive = ap.FileArchive(tmp_path, "crashed")
+    outcomes = {}
+    for name, ids, finish in (("committed", committed_ids, "commit"), ("rolled_back", rolled_back_ids, "rollback")):
+        async with AsyncSessionLocal() as session:
+            _, _, entries = await ap._move_batch_to_files(
+                session, archive, "reservation", ap.RESERVATION_COLUMNS, "deleted_at",
+                deleted_at + timedelta(days=1), extra_filter="id = ANY(CAST(:ids AS uuid[]))", params={"ids": ids},
+            )
+            archive.prepare(entries)
+            await getattr(session, finish)()
+        outcomes[name] = entries
+    assert {e["status"] for e in _manifest(tmp_path).values()} == {"pending"}
+
+    async with AsyncSessionLocal() as session:
+        assert await ap._reconcile_archive(session, ap.FileArchive(tmp_path, "next")) == (1, 1)
+
+    latest = _manifest(tmp_path)
+    [committed], [rolled_back] = outcomes["committed"], outcomes["rolled_back"]
+    assert latest[committed["path"]]["status"] == "committed"
+    assert latest[rolled_back["path"]]["status"] == "discarded"
+    assert not (tmp_path / rolled_back["path"]).exists()
+    assert sorted(_archived_ids(tmp_path, "reservation")) == sorted(committed_ids)
+    assert sorted(await _ids_in("reservation", rolled_back_ids)) == sorted(rolled_back_ids)
+
+
+@pytest.mark.asyncio
+async def test_move_batch_is_one_statement_and_tolerates_archived_ids(catalog):
+    deleted_at = datetime.now(timezone.utc) - timedelta(days=365 * 3)
+    ids = [uuid.uuid4() for _ in range(3)]
+    async with engine.begin() as conn:
+        for rid in ids:
+            await conn.execute(sa.text(_RESERVATION_SQL), {**catalog, "id": rid, "deleted_at": deleted_at})
+        # Una copia ya archivada (p. ej. por una ejecución interrumpida con el esquema anterior)
+        await conn.execute(
+            sa.text(
+                f"INSERT INTO reservation_archive ({', '.join(ap.RESERVATION_COLUMNS)}) "
+                f"SELECT {', '.join(ap.RESERVATION_COLUMNS)} FROM reservation WHERE id = :id"
+            ),
+            {"id": ids[0]},
+        )
+
+    only_ours = {"extra_filter": "product_id = :product", "params": {"product": catalog["product"]}}
+    async with AsyncSessionLocal() as session:
+        assert await ap._move_batch_atomic(
+            session, "reservation", "reservation_archive", ap.RESERVATION_COLUMNS, "deleted_at",
+            deleted_at + timedelta(days=1), dry_run=True, **only_ours,
+        ) == (0, None)
+        moved, last_id = await ap._move_batch_atomic(
+            session, "reservation", "reservation_archive", ap.RESERVATION_COLUMNS, "deleted_at",
+            deleted_at + timedelta(days=1), dry_run=False, **only_ours,
+        )
+        await session.commit()
+
+    assert (moved, last_id) == (3, max(ids))
+    assert await _ids_in("reservation", ids) == []
+    assert sorted(await _ids_in("reservation_archive", ids)) == sorted(ids)
+
+
+@pytest.mark.asyncio
+async def test_retired_partition_leaves_opening_balance(catalog):
+    month = date(2001, 1, 1)
+    tag = catalog["product"].hex[:8]
+    async with AsyncSessionLocal() as session:
+        await ensure_monthly_partitions(session, "movement", months_ahead=0, start=month)
+        await session.commit()
+    legs = [
+        (f"OB-{tag}-in", None, catalog["loc1"], Decimal("10"), None),
+        (f"OB-{tag}-tr", catalog["loc1"], catalog["loc2"], Decimal("3"), None),
+        # Los movimientos borrados no cuentan en el histórico
+        (f"OB-{tag}-del", catalog["loc1"], None, Decimal("5"), datetime(2001, 1, 20, tzinfo=timezone.utc)),
+    ]
+    async with engine.begin() as conn:
+        for code, source, target, quantity, deleted_at in legs:
+            await conn.execute(
+                sa.text(
+                    "INSERT INTO movement (id, code, movement_type_id, product_id, batch_id, from_location_id, "
+                    "to_location_id, reason_id, quantity, occurred_at, deleted_at) VALUES (:id, :code, "
+                    ":movement_type, :product, :batch, :source, :target, :reason, :quantity, :at, :deleted_at)"
+                ),
+                {
+                    **catalog, "id": uuid.uuid4(), "code": code, "source": source, "target": target,
+                    "quantity": quantity, "at": datetime(2001, 1, 15, tzinfo=timezone.utc), "deleted_at": deleted_at,
+                },
+            )
+
+    async with AsyncSessionLocal() as session:
+        result = await ap._retire_movement_partitions(
+            session, datetime(2001, 2, 1, tzinfo=timezone.utc), months_ahead=0, dry_run=False,
+        )
+    assert "movement_p200101" in result["retired"]
+
+    async with engine.connect() as conn:
+        balances = dict(
+            (
+                await conn.execute(
+                    sa.text(
+                        "SELECT location_id, quantity FROM movement_opening_balance "
+                        "WHERE product_id = :product AND batch_id = :batch"
+                    ),
+                    catalog,
+                )
+            ).all()
+        )
+        archived = (
+            await conn.execute(
+                sa.text("SELECT count(*) FROM movement_archive WHERE code LIKE :codes"), {"codes": f"OB-{tag}-%"}
+            )
+        ).scalar_one()
+        registered = (
+            await conn.execute(
+                sa.text("SELECT count(*) FROM movement_code_registry WHERE code LIKE :codes"), {"codes": f"OB-{tag}-%"}
+            )
+        ).scalar_one()
+        partition = (await conn.execute(sa.text("SELECT to_regclass('movement_p200101')"))).scalar_one()
+
+    assert balances == {catalog["loc1"]: 7, catalog["loc2"]: 3}
+    assert archived == 3
+    assert registered == 0
+    assert partition is None
+
+
+@pytest.mark.asyncio
+async def test_batch_whose_opening_balance_nets_to_zero_is_archived(catalog):
+    month = date(2001, 3, 1)
+    tag = catalog["product"].hex[:8]
+    kept = uuid.uuid4()
+    async with AsyncSessionLocal() as session:
+        await ensure_monthly_partitions(session, "movement", months_ahead=0, start=month)
+        await session.commit()
+    legs = [
+        (f"ZB-{tag}-in", catalog["batch"], None, catalog["loc1"], Decimal("10")),
+        (f"ZB-{tag}-out", catalog["batch"], catalog["loc1"], None, Decimal("10")),
+        (f"ZB-{tag}-kept", kept, None, catalog["loc1"], Decimal("5")),
+    ]
+    async with engine.begin() as conn:
+        await conn.execute(
+            sa.text("INSERT INTO batch (id, product_id, code, origin_type) VALUES (:id, :product, :code, 'supplier')"),
+            {"id": kept, "product": catalog["product"], "code": f"ZB-{tag}"},
+        )
+        for code, batch, source, target, quantity in legs:
+            await conn.execute(
+                sa.text(
+                    "INSERT INTO movement (id, code, movement_type_id, product_id, batch_id, from_location_id, "
+                    "to_location_id, reason_id, quantity, occurred_at) VALUES (:id, :code, :movement_type, "
+                    ":product, :batch, :source, :target, :reason, :quantity, :at)"
+                ),
+                {
+                    **catalog, "id": uuid.uuid4(), "code": code, "batch": batch, "source": source, "target": target,
+                    "quantity": quantity, "at": datetime(2001, 3, 15, tzinfo=timezone.utc),
+                },
+            )
+
+    async with AsyncSessionLocal() as session:
+        result = await ap._retire_movement_partitions(
+            session, datetime(2001, 4, 1, tzinfo=timezone.utc), months_ahead=0, dry_run=False,
+        )
+    assert "movement_p200103" in result["retired"]
+
+    deleted_at = datetime(2001, 6, 1, tzinfo=timezone.utc)
+    async with engine.begin() as conn:
+        await conn.execute(
+            sa.text("UPDATE batch SET deleted_at = :at WHERE id IN (:batch, :kept)"),
+            {"at": deleted_at, "batch": catalog["batch"], "kept": kept},
+        )
+        balances = dict(
+            (
+                await conn.execute(
+                    sa.text("SELECT batch_id, quantity FROM movement_opening_balance WHERE product_id = :product"),
+                    catalog,
+                )
+            ).all()
+        )
+    assert balances == {kept: 5}
+
+    async with AsyncSessionLocal() as session:
+        moved, _ = await ap._move_batch_atomic(
+            session, "batch", "batch_archive", ap.BATCH_COLUMNS, "deleted_at", deleted_at + timedelta(days=1),
+            dry_run=False, extra_filter=f"product_id = :product AND {ap.BATCH_UNREFERENCED}",
+            params={"product": catalog["product"]},
+        )
+        await session.commit()
+
+    assert moved == 1
+    assert await _ids_in("batch", [catalog["batch"], kept]) == [kept]
+    assert await _ids_in("batch_archive", [catalog["batch"], kept]) == [catalog["batch"]]
@@ -0,0 +1,104 @@
+# tests/test_audit_logger.py
+
+import asyncio
+import uuid
+
+import pytest
+import sqlalchemy as sa
+
+from src.app.core.settings import settings
+from src.app.db.session import AsyncSessionLocal, engine
+from src.app.services.audit_logger import AuditWriter, audit_writer, log_audit
+
+
+async def _actions(entity_id: uuid.UUID) -> set:
+    async with engine.connect() as conn:
+        result = await conn.execute(
+            sa.text("SELECT action FROM audit_log WHERE entity_id = :id"), {"id": entity_id}
+        )
+        return set(result.scalars())
+
+
+@pytest.mark.asyncio
+async def test_audit_rows_follow_savepoints_and_commit():
+    entity_id = uuid.uuid4()
+    audit_writer.start()
+    try:
+        async with AsyncSessionLocal() as session:
+            await log_audit(session, "test", entity_id, "root")
+            outer = await session.begin_nested()
+            async with session.begin_nested():
+                await log_audit(session, "test", entity_id, "inner")
+            await log_audit(session, "test", entity_id, "after_inner")
+            await log_audit(session, "test", entity_id, "after_inner_async", critical=False)
+            await outer.rollback()
+            await log_audit(session, "test", entity_id, "async", critical=False)
+            await session.commit()
+
+        async with AsyncSessionLocal() as session:
+            await log_audit(session, "test", entity_id, "rolled_back_async", critical=False)
+            await session.rollback()
+    finally:
+        await audit_writer.stop()
+
+    assert await _actions(entity_id) == {"root", "async"}
+
+
+def _row(entity_id: uuid.UUID, action: str) -> dict:
+    return {"id": uuid.uuid4(), "entity_name": "test", "entity_id": entity_id, "action": action}
+
+
+@pytest.mark.asyncio
+async def test_rows_submitted_while_stopping_are_written():
+    entity_id = uuid.uuid4()
+    writer = AuditWriter(max_queue=10, max_batch=10, max_wait_ms=50)
+    writer.start()
+    writer.submit([_row(entity_id, "queued")])
+
+    stopping = asyncio.get_running_loop().create_task(writer.stop())
+    await asyncio.sleep(0)
+    assert not writer.running
+    writer.submit([_row(entity_id, "during_stop")])
+    await stopping
+
+    assert await _actions(entity_id) == {"queued", "during_stop"}
+
+
+@pytest.mark.asyncio
+async def test_failed_insert_is_retried(monkeypatch):
+    monkeypatch.setattr(settings, "audit_write_retry_base_ms", 1)
+    entity_id = uuid.uuid4()
+    writer = AuditWriter(max_queue=10, max_batch=10, max_wait_ms=50)
+    real_insert = writer._insert
+    failures = []
+
+    async def flaky_insert(rows):
+        if not failures:
+            failures.append(rows)
+            raise ConnectionResetError("connection lost")
+        await real_insert(rows)
+
+    monkeypatch.setattr(writer, "_insert", flaky_insert)
+    writer.start()
+    try:
+        writer.submit([_row(entity_id, "first"), _row(entity_id, "second")])
+    finally:
+        await writer.stop()
+
+    assert failures
+    assert await _actions(entity_id) == {"first", "second"}
+
+
+@pytest.mark.asyncio
+async def test_invalid_row_does_not_drop_its_batch(monkeypatch):
+    monkeypatch.setattr(settings, "audit_write_retry_base_ms", 1)
+    entity_id = uuid.uuid4()
+    writer = AuditWriter(max_queue=10, max_batch=10, max_wait_ms=50)
+    writer.start()
+    try:
+        # action NOT NULL: esta fila nunca se podrá insertar
+        writer.submit([_row(entity_id, "valid"), _row(entity_id, None)])
+    finally:
+        await writer.stop()
+
+    assert await _actions(entity_id) == {"valid"}
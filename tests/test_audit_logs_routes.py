@@ -0,0 +1,32 @@
+# tests/test_audit_logs_routes.py
+
+import json
+from decimal import Decimal
+
+import pytest
+
+from src.app.db.session import AsyncSessionLocal
+from src.app.services.transfer_service import transfer_stock
+
+
+@pytest.mark.asyncio
+async def test_filter_transfer_out_by_batch(client, stocked):
+    async with AsyncSessionLocal() as session:
+        await transfer_stock(
+            session, stocked["product"], stocked["batch"], stocked["loc1"], stocked["loc2"], Decimal("3")
+        )
+        await session.commit()
+
+    contained = {"direction": "transfer_out", "batch_id": str(stocked["batch"])}
+    response = await client.get("/audit/", params={"entity_name": "inventory", "changes": json.dumps(contained)})
+    assert response.status_code == 200, response.text
+    logs = response.json()
+    assert len(logs) == 1
+    assert logs[0]["action"] == "decrease"
+    assert logs[0]["changes"] == {
+        "product_id": str(stocked["product"]),
+        "batch_id": str(stocked["batch"]),
+        "location_id": str(stocked["loc1"]),
+        "direction": "transfer_out",
+        "quantity": "3",
+    }
@@ -0,0 +1,36 @@
+# tests/test_auth_principal.py
+
+import uuid
+
+import pytest
+import sqlalchemy as sa
+
+from src.app.api.deps.auth import _load_principal
+from src.app.db.session import AsyncSessionLocal, engine
+
+
+@pytest.mark.asyncio
+async def test_subject_resolves_to_one_account_when_username_equals_other_email():
+    tag = uuid.uuid4().hex[:8]
+    owner, lookalike = uuid.uuid4(), uuid.uuid4()
+    email = f"owner-{tag}@example.com"
+    async with engine.begin() as conn:
+        await conn.execute(
+            sa.text(
+                "INSERT INTO user_account (id, username, email, password_hash) VALUES "
+                "(:owner, :owner_name, :email, 'x'), (:lookalike, :email, :other_email, 'x')"
+            ),
+            {
+                "owner": owner,
+                "owner_name": f"owner-{tag}",
+                "email": email,
+                "lookalike": lookalike,
+                "other_email": f"lookalike-{tag}@example.com",
+            },
+        )
+
+    async with AsyncSessionLocal() as session:
+        # /auth/login firma el email como sub
+        assert (await _load_principal(session, {"sub": email})).user_id == owner
+        # El uid firmado manda sobre sub
+        assert (await _load_principal(session, {"sub": email, "uid": str(lookalike)})).user_id == lookalike
@@ -0,0 +1,23 @@
+# tests/test_catalog_routes.py
+
+import pytest
+
+from src.app.services.catalog_cache import catalog_cache
+
+
+@pytest.mark.asyncio
+async def test_unit_list_is_served_from_cache_and_invalidated_on_write(client):
+    catalog_cache.invalidate()
+    before = {u["code"] for u in (await client.get("/units/")).json()}
+
+    code = f"cache-{len(before)}-{id(before)}"
+    response = await client.post("/units/", json={"code": code})
+    assert response.status_code == 201, response.text
+    unit_id = response.json()["id"]
+
+    listed = {u["code"]: u for u in (await client.get("/units/")).json()}
+    assert listed[code]["id"] == unit_id
+
+    response = await client.delete(f"/units/{unit_id}")
+    assert response.status_code == 204, response.text
+    assert code not in {u["code"] for u in (await client.get("/units/")).json()}
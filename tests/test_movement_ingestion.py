@@ -0,0 +1,67 @@
+# tests/test_movement_ingestion.py
+
+from decimal import Decimal
+
+import pytest
+import sqlalchemy as sa
+
+from src.app.db.session import AsyncSessionLocal, engine
+from src.app.schemas.movement import MovementCreate
+from src.app.services.movement_ingestion import ingest_movements
+
+# Máximo de chunk_size que acepta POST /movements/bulk
+MAX_CHUNK = 5000
+
+
+@pytest.mark.asyncio
+async def test_bulk_transfers_at_max_chunk_size(catalog):
+    # Cada transferencia toca dos tripletes distintos: 10000 filas en los upserts del chunk
+    async with engine.begin() as conn:
+        locations = (
+            await conn.execute(
+                sa.text(
+                    "INSERT INTO location (id, warehouse_id, code, type) "
+                    "SELECT gen_random_uuid(), :warehouse, 'bulk-' || :tag || '-' || g, 'bin' "
+                    "FROM generate_series(1, :n) g RETURNING id"
+                ),
+                {"warehouse": catalog["warehouse"], "tag": catalog["product"].hex[:8], "n": 2 * MAX_CHUNK},
+            )
+        ).scalars().all()
+        sources, targets = locations[:MAX_CHUNK], locations[MAX_CHUNK:]
+        await conn.execute(
+            sa.text(
+                "INSERT INTO inventory (id, product_id, batch_id, location_id, quantity) "
+                "SELECT gen_random_uuid(), :product, :batch, loc, 5 FROM unnest(CAST(:locations AS uuid[])) loc"
+            ),
+            {"product": catalog["product"], "batch": catalog["batch"], "locations": sources},
+        )
+
+    movements = [
+        MovementCreate(
+            code=f"BULK-{catalog['product'].hex[:8]}-{i}",
+            movement_type_id=catalog["movement_type"],
+            product_id=catalog["product"],
+            batch_id=catalog["batch"],
+            from_location_id=source,
+            to_location_id=target,
+            reason_id=catalog["reason"],
+            quantity=Decimal("2"),
+        )
+        for i, (source, target) in enumerate(zip(sources, targets))
+    ]
+    async with AsyncSessionLocal() as session:
+        results = await ingest_movements(session, movements, chunk_size=MAX_CHUNK)
+
+    assert [r["error"] for r in results if r["status"] != "created"] == []
+    async with engine.connect() as conn:
+        totals = (
+            await conn.execute(
+                sa.text(
+                    "SELECT sum(quantity) FILTER (WHERE location_id = ANY(CAST(:sources AS uuid[]))), "
+                    "sum(quantity) FILTER (WHERE location_id = ANY(CAST(:targets AS uuid[]))) "
+                    "FROM inventory WHERE product_id = :product"
+                ),
+                {"product": catalog["product"], "sources": sources, "targets": targets},
+            )
+        ).one()
+    assert totals == (3 * MAX_CHUNK, 2 * MAX_CHUNK)
@@ -0,0 +1,54 @@
+# tests/test_movement_writer.py
+
+import asyncio
+from decimal import Decimal
+
+import pytest
+
+from src.app.db.session import AsyncSessionLocal
+from src.app.schemas.movement import MovementCreate
+from src.app.services import movement_writer as writer_module
+from src.app.services.movement_writer import MovementWriter
+
+
+def _transfer(ids: dict, code: str) -> MovementCreate:
+    return MovementCreate(
+        code=code,
+        movement_type_id=ids["movement_type"],
+        product_id=ids["product"],
+        batch_id=ids["batch"],
+        from_location_id=ids["loc1"],
+        to_location_id=ids["loc2"],
+        reason_id=ids["reason"],
+        quantity=Decimal("1"),
+    )
+
+
+@pytest.mark.asyncio
+async def test_unexpected_error_fails_only_its_caller(stocked, monkeypatch):
+    real_apply = writer_module.apply_movement_batch
+
+    async def apply_or_explode(session, movements):
+        if any(m.code.endswith("-boom") for m in movements):
+            raise RuntimeError("boom")
+        return await real_apply(session, movements)
+
+    monkeypatch.setattr(writer_module, "apply_movement_batch", apply_or_explode)
+    tag = stocked["product"].hex[:8]
+    writer = MovementWriter(AsyncSessionLocal, max_queue=10, max_batch=10, max_wait_ms=50)
+    writer.start()
+    try:
+        # Ambos caen en el mismo grupo: el grupo falla y cada movimiento se reintenta por separado
+        bad, good = await asyncio.gather(
+            writer.submit(_transfer(stocked, f"{tag}-boom")),
+            writer.submit(_transfer(stocked, f"{tag}-ok")),
+            return_exceptions=True,
+        )
+        assert isinstance(bad, RuntimeError)
+        assert good["status"] == "created", good
+
+        assert writer.running
+        later = await writer.submit(_transfer(stocked, f"{tag}-later"))
+        assert later["status"] == "created", later
+    finally:
+        await writer.stop()
@@ -0,0 +1,47 @@
+# tests/test_partitions.py
+
+import uuid
+from datetime import date
+
+import pytest
+import sqlalchemy as sa
+
+from src.app.db.partitions import ensure_monthly_partitions
+from src.app.db.session import AsyncSessionLocal, engine
+
+# Mes lejano: nunca tiene partición propia antes de la prueba
+FAR_MONTH = date(2199, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_audit_rows_without_partition_land_in_default_and_move_out():
+    entity_id = uuid.uuid4()
+    async with engine.begin() as conn:
+        await conn.execute(
+            sa.text(
+                "INSERT INTO audit_log (id, entity_name, entity_id, action, occurred_at) "
+                "VALUES (:id, 'test', :entity, 'late', '2199-01-15T10:00:00+00:00')"
+            ),
+            {"id": uuid.uuid4(), "entity": entity_id},
+        )
+
+    async def holder() -> str:
+        async with engine.connect() as conn:
+            return (
+                await conn.execute(
+                    sa.text("SELECT tableoid::regclass::text FROM audit_log WHERE entity_id = :entity"),
+                    {"entity": entity_id},
+                )
+            ).scalar_one()
+
+    try:
+        assert await holder() == "audit_log_default"
+        async with AsyncSessionLocal() as session:
+            created = await ensure_monthly_partitions(session, "audit_log", months_ahead=0, start=FAR_MONTH)
+            await session.commit()
+        assert created == ["audit_log_p219901"]
+        assert await holder() == "audit_log_p219901"
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(sa.text("DELETE FROM audit_log WHERE entity_id = :entity"), {"entity": entity_id})
+            await conn.execute(sa.text("DROP TABLE IF EXISTS audit_log_p219901"))
@@ -0,0 +1,34 @@
+# tests/test_query_plans.py
+# Mismo criterio que scripts/explain_hot_queries.py (enable_seqscan=off): el índice
+# esperado debe acotar las filas con un Index Cond, no recorrerse entero.
+
+from decimal import Decimal
+
+import pytest
+
+from scripts.explain_hot_queries import _capture, _explain, _index_usage
+from src.app.services.reservation_lifecycle import expire_reservations
+from src.app.services.reservation_validator import validate_reservation
+
+
+async def _reservation_indexes(fn) -> set:
+    used, full = set(), set()
+    for statement, parameters in await _capture(fn):
+        plan_used, plan_full = _index_usage(await _explain(statement, parameters, seqscan=False))
+        used |= plan_used.get("reservation", set())
+        full |= plan_full
+    assert "reservation" not in full
+    return used
+
+
+@pytest.mark.asyncio
+async def test_expire_reservations_uses_expiry_index():
+    assert await _reservation_indexes(expire_reservations) == {"idx_reservation_active_expiry"}
+
+
+@pytest.mark.asyncio
+async def test_validate_reservation_uses_triplet_index(catalog):
+    def validate(session):
+        return validate_reservation(session, catalog["product"], catalog["batch"], catalog["loc1"], Decimal("1"))
+
+    assert await _reservation_indexes(validate) == {"idx_reservation_triplet_status"}
@@ -0,0 +1,44 @@
+# tests/test_replica_guard.py
+
+import asyncio
+import time
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.app.core.settings import settings
+from src.app.db import session as db_session
+
+
+@pytest.mark.asyncio
+async def test_unresponsive_replica_does_not_block_reads(monkeypatch):
+    # Servidor que acepta la conexión TCP y nunca responde al handshake de Postgres
+    clients = []
+    server = await asyncio.start_server(lambda reader, writer: clients.append(writer), "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    blackhole = create_async_engine(f"postgresql+asyncpg://u:p@127.0.0.1:{port}/replica")
+    monkeypatch.setattr(db_session, "read_engine", blackhole)
+    monkeypatch.setattr(db_session, "_replica_refresh", None)
+    monkeypatch.setattr(
+        db_session, "_replica_state", {"healthy": True, "lag_seconds": 0.0, "error": None, "checked_at": None}
+    )
+    monkeypatch.setattr(settings, "replica_lag_check_timeout_seconds", 0.3)
+    try:
+        started = time.monotonic()
+        # Responde con el último estado conocido sin esperar al sondeo
+        assert await db_session.replica_available() is True
+        assert time.monotonic() - started < 0.1
+        refresh = db_session._replica_refresh
+        assert refresh is not None
+
+        await asyncio.wait_for(refresh, 2)
+        assert time.monotonic() - started < 1.5
+        assert await db_session.replica_available() is False
+        assert db_session._replica_state["error"]
+        assert await db_session.read_sessionmaker() is db_session.AsyncSessionLocal
+    finally:
+        for writer in clients:
+            writer.close()
+        server.close()
+        await server.wait_closed()
+        await blackhole.dispose()
@@ -0,0 +1,55 @@
+# tests/test_reservation_integration.py
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import sqlalchemy as sa
+
+from src.app.db.session import engine
+
+
+async def _reserved(ids: dict, location: str = "loc1"):
+    async with engine.connect() as conn:
+        return (
+            await conn.execute(
+                sa.text(
+                    "SELECT reserved FROM stock_balance "
+                    "WHERE product_id = :product AND batch_id = :batch AND location_id = :location"
+                ),
+                {"product": ids["product"], "batch": ids["batch"], "location": ids[location]},
+            )
+        ).scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_deleted_reservation_is_not_released_again_on_expiry(client, stocked):
+    # reserved_until ya vencido: el siguiente /expire la alcanzaría si siguiera activa
+    expired_at = (datetime.now(timezone.utc) - timedelta(hours=1)).replace(tzinfo=None)
+    response = await client.post(
+        "/reservations/",
+        json={
+            "product_id": str(stocked["product"]),
+            "batch_id": str(stocked["batch"]),
+            "location_id": str(stocked["loc1"]),
+            "quantity": "4",
+            "reserved_until": expired_at.isoformat(),
+        },
+    )
+    assert response.status_code == 201, response.text
+    reservation_id = response.json()["id"]
+    assert await _reserved(stocked) == 4
+
+    response = await client.delete(f"/reservations/{reservation_id}")
+    assert response.status_code == 204, response.text
+    assert await _reserved(stocked) == 0
+
+    response = await client.post("/reservations/expire")
+    assert response.status_code == 200, response.text
+    response = await client.post(f"/reservations/{reservation_id}/release")
+    assert await _reserved(stocked) == 0
+
+    async with engine.connect() as conn:
+        status = (
+            await conn.execute(sa.text("SELECT status FROM reservation WHERE id = :id"), {"id": reservation_id})
+        ).scalar_one()
+    assert status == "cancelled"
@@ -0,0 +1,109 @@
+# tests/test_transfer_service.py
+
+import asyncio
+import uuid
+from decimal import Decimal
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.exc import IntegrityError
+
+from src.app.core.settings import settings
+from src.app.db.session import AsyncSessionLocal, engine
+from src.app.schemas.movement import MovementCreate
+from src.app.services.movement_ingestion import ingest_movements
+from src.app.services.transfer_service import transfer_stock
+
+
+async def _quantities(ids: dict) -> dict:
+    async with engine.connect() as conn:
+        result = await conn.execute(
+            sa.text(
+                "SELECT i.location_id, i.quantity, b.physical FROM inventory i "
+                "JOIN stock_balance b USING (product_id, batch_id, location_id) "
+                "WHERE i.product_id = :product AND i.batch_id = :batch"
+            ),
+            {"product": ids["product"], "batch": ids["batch"]},
+        )
+        rows = result.all()
+    assert all(quantity == physical for _, quantity, physical in rows)
+    return {location: quantity for location, quantity, _ in rows}
+
+
+@pytest.mark.asyncio
+async def test_transfer_and_bulk_chunk_lock_in_the_same_order(catalog, monkeypatch):
+    ids = catalog
+    # Sin reintentos: un deadlock tiene que salir como error, no quedar oculto por el savepoint
+    monkeypatch.setattr(settings, "transfers_max_attempts", 1)
+    first, second = sorted([ids["loc1"], ids["loc2"]])
+    # ids de inventario en orden inverso al de ubicación: un camino que bloqueara por id
+    # tomaría las filas en orden distinto al de la transferencia
+    async with engine.begin() as conn:
+        await conn.execute(
+            sa.text(
+                "INSERT INTO inventory (id, product_id, batch_id, location_id, quantity) VALUES "
+                "(:high, :product, :batch, :first, 10), (:low, :product, :batch, :second, 10)"
+            ),
+            {
+                "high": uuid.UUID(int=(1 << 128) - 1 - ids["product"].int % 1000),
+                "low": uuid.UUID(int=ids["product"].int % 1000),
+                "product": ids["product"],
+                "batch": ids["batch"],
+                "first": first,
+                "second": second,
+            },
+        )
+        await conn.execute(
+            sa.text(
+                "INSERT INTO stock_balance (product_id, batch_id, location_id, physical) "
+                "VALUES (:product, :batch, :first, 10), (:product, :batch, :second, 10)"
+            ),
+            {"product": ids["product"], "batch": ids["batch"], "first": first, "second": second},
+        )
+
+    async def transfer() -> None:
+        async with AsyncSessionLocal() as session:
+            await transfer_stock(session, ids["product"], ids["batch"], first, second, Decimal("1"))
+            await session.commit()
+
+    async def bulk() -> list:
+        movement = MovementCreate(
+            code=f"LOCK-{ids['product'].hex[:8]}",
+            movement_type_id=ids["movement_type"],
+            product_id=ids["product"],
+            batch_id=ids["batch"],
+            from_location_id=second,
+            to_location_id=first,
+            reason_id=ids["reason"],
+            quantity=Decimal("1"),
+        )
+        async with AsyncSessionLocal() as session:
+            return await ingest_movements(session, [movement], chunk_size=1)
+
+    # Una tercera transacción retiene la primera fila mientras ambos escritores hacen cola detrás
+    async with engine.connect() as holder:
+        await holder.execute(
+            sa.text("SELECT 1 FROM inventory WHERE product_id = :product AND location_id = :first FOR UPDATE"),
+            {"product": ids["product"], "first": first},
+        )
+        transfer_task = asyncio.create_task(transfer())
+        await asyncio.sleep(0.3)
+        bulk_task = asyncio.create_task(bulk())
+        await asyncio.sleep(0.3)
+        await holder.commit()
+    _, results = await asyncio.wait_for(asyncio.gather(transfer_task, bulk_task), timeout=30)
+
+    assert [r["status"] for r in results] == ["created"], results
+    assert await _quantities(ids) == {first: 10, second: 10}
+
+
+@pytest.mark.asyncio
+async def test_insufficient_stock_rolls_back_only_the_transfer(stocked):
+    ids = stocked
+    async with AsyncSessionLocal() as session:
+        await transfer_stock(session, ids["product"], ids["batch"], ids["loc1"], ids["loc2"], Decimal("4"))
+        with pytest.raises(IntegrityError):
+            await transfer_stock(session, ids["product"], ids["batch"], ids["loc1"], ids["loc2"], Decimal("7"))
+        await session.commit()
+
+    assert await _quantities(ids) == {ids["loc1"]: 6, ids["loc2"]: 4}